@@ -1,17 +1,31 @@
+import java.io.BufferedReader;
 import java.io.FileWriter;
 import java.io.IOException;
+import java.io.InputStreamReader;
+import java.util.ArrayList;
 import java.util.Arrays;
+import java.util.List;
+import java.util.concurrent.Callable;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
 
 public class MatrixProductFloat {
-    // Interface for matrix operations
+    // Interface for matrix operations. lo/hi limit the loop over the rows (i) or
+    // columns (j) of C that the version writes, so each thread owns a disjoint block.
     @FunctionalInterface
     private interface MatrixOperation {
-        void apply(int n, float[] A, float[] B, float[] C);
+        void apply(int n, float[] A, float[] B, float[] C, int lo, int hi);
     }
 
+    // Número de hilos que se reparten cada versión; se cambia con -p <threads>
+    static int numThreads = 1;
+    static ExecutorService pool;
+
     // Versión ijk
-    public static void productMatA(int n, float[] A, float[] B, float[] C) {
-        for (int i = 0; i < n; i++) {
+    public static void productMatA(int n, float[] A, float[] B, float[] C, int lo, int hi) {
+        for (int i = lo; i < hi; i++) {
             for (int j = 0; j < n; j++) {
                 float sum = 0;
                 for (int k = 0; k < n; k++) {
@@ -23,8 +37,8 @@ public class MatrixProductFloat {
     }
 
     // Versión jik
-    public static void productMatB(int n, float[] A, float[] B, float[] C) {
-        for (int j = 0; j < n; j++) {
+    public static void productMatB(int n, float[] A, float[] B, float[] C, int lo, int hi) {
+        for (int j = lo; j < hi; j++) {
             for (int i = 0; i < n; i++) {
                 float sum = 0;
                 for (int k = 0; k < n; k++) {
@@ -36,8 +50,8 @@ public class MatrixProductFloat {
     }
 
     // Versión jki
-    public static void productMatC(int n, float[] A, float[] B, float[] C) {
-        for (int j = 0; j < n; j++) {
+    public static void productMatC(int n, float[] A, float[] B, float[] C, int lo, int hi) {
+        for (int j = lo; j < hi; j++) {
             for (int k = 0; k < n; k++) {
                 float r = B[k + j * n];
                 for (int i = 0; i < n; i++) {
@@ -48,9 +62,9 @@ public class MatrixProductFloat {
     }
 
     // Versión kji
-    public static void productMatD(int n, float[] A, float[] B, float[] C) {
+    public static void productMatD(int n, float[] A, float[] B, float[] C, int lo, int hi) {
         for (int k = 0; k < n; k++) {
-            for (int j = 0; j < n; j++) {
+            for (int j = lo; j < hi; j++) {
                 float r = B[k + j * n];
                 for (int i = 0; i < n; i++) {
                     C[i + j * n] += A[i + k * n] * r;
@@ -60,9 +74,9 @@ public class MatrixProductFloat {
     }
 
     // Versión kij
-    public static void productMatE(int n, float[] A, float[] B, float[] C) {
+    public static void productMatE(int n, float[] A, float[] B, float[] C, int lo, int hi) {
         for (int k = 0; k < n; k++) {
-            for (int i = 0; i < n; i++) {
+            for (int i = lo; i < hi; i++) {
                 float r = A[i + k * n];
                 for (int j = 0; j < n; j++) {
                     C[i + j * n] += r * B[k + j * n];
@@ -72,8 +86,8 @@ public class MatrixProductFloat {
     }
 
     // Versión ikj
-    public static void productMatF(int n, float[] A, float[] B, float[] C) {
-        for (int i = 0; i < n; i++) {
+    public static void productMatF(int n, float[] A, float[] B, float[] C, int lo, int hi) {
+        for (int i = lo; i < hi; i++) {
             for (int k = 0; k < n; k++) {
                 float r = A[i + k * n];
                 for (int j = 0; j < n; j++) {
@@ -83,6 +97,160 @@ public class MatrixProductFloat {
         }
     }
 
+    // Tamaño de bloque para las versiones por bloques (G y H); se cambia con -t <tile>
+    static int tileSize = 32;
+
+    // Versión ijk por bloques (tiled)
+    public static void productMatG(int n, float[] A, float[] B, float[] C, int lo, int hi) {
+        for (int ii = lo; ii < hi; ii += tileSize) {
+            int iMax = Math.min(ii + tileSize, hi);
+            for (int jj = 0; jj < n; jj += tileSize) {
+                int jMax = Math.min(jj + tileSize, n);
+                for (int kk = 0; kk < n; kk += tileSize) {
+                    int kMax = Math.min(kk + tileSize, n);
+                    for (int i = ii; i < iMax; i++) {
+                        for (int j = jj; j < jMax; j++) {
+                            float sum = 0;
+                            for (int k = kk; k < kMax; k++) {
+                                sum += A[i + k * n] * B[k + j * n]; // C[i][j] += A[i][k] * B[k][j]
+                            }
+                            C[i + j * n] += sum;
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    // Versión kij por bloques (tiled)
+    public static void productMatH(int n, float[] A, float[] B, float[] C, int lo, int hi) {
+        for (int kk = 0; kk < n; kk += tileSize) {
+            int kMax = Math.min(kk + tileSize, n);
+            for (int ii = lo; ii < hi; ii += tileSize) {
+                int iMax = Math.min(ii + tileSize, hi);
+                for (int jj = 0; jj < n; jj += tileSize) {
+                    int jMax = Math.min(jj + tileSize, n);
+                    for (int k = kk; k < kMax; k++) {
+                        for (int i = ii; i < iMax; i++) {
+                            float r = A[i + k * n];
+                            for (int j = jj; j < jMax; j++) {
+                                C[i + j * n] += r * B[k + j * n];
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    // Divide [0, n) en bloques contiguos, uno por hilo, y espera a que terminen todos
+    static void runParallel(MatrixOperation op, int n, float[] A, float[] B, float[] C) throws Exception {
+        if (numThreads <= 1) {
+            op.apply(n, A, B, C, 0, n);
+            return;
+        }
+        List<Callable<Object>> tasks = new ArrayList<>();
+        int chunk = (n + numThreads - 1) / numThreads;
+        for (int lo = 0; lo < n; lo += chunk) {
+            int start = lo;
+            int end = Math.min(lo + chunk, n);
+            tasks.add(Executors.callable(() -> op.apply(n, A, B, C, start, end)));
+        }
+        for (Future<Object> f : pool.invokeAll(tasks)) {
+            f.get();
+        }
+    }
+
+    // Versiones y sus nombres
+    static final MatrixOperation[] versions = new MatrixOperation[] {
+        MatrixProductFloat::productMatA,
+        MatrixProductFloat::productMatB,
+        MatrixProductFloat::productMatC,
+        MatrixProductFloat::productMatD,
+        MatrixProductFloat::productMatE,
+        MatrixProductFloat::productMatF,
+        MatrixProductFloat::productMatG,
+        MatrixProductFloat::productMatH
+    };
+    static final char[] versionNames = {'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H'};
+
+    // Mide una muestra de la versión v y devuelve su fila de resultados
+    static String timeSample(int v, int n, float[] A, float[] B, float[] C, int s) throws Exception {
+        Arrays.fill(C, 0, n * n, 0.0f);
+        long start = System.nanoTime();
+        runParallel(versions[v], n, A, B, C);
+        long end = System.nanoTime();
+
+        double seconds = (end - start) / 1.0e9;
+        double timeNormalized = (seconds * 1.0e9) / ((double) n * n * n);
+        return String.format("Java_ver(%c)\tfloat\tx64\t%05d\t%05d\t%.4f\t%.4f\t%d",
+                versionNames[v], s, n, seconds, timeNormalized, numThreads);
+    }
+
+    // Modo batch (--batch): una sola JVM atiende muchos trabajos leídos de stdin, uno por
+    // línea con el formato "<versiones> <n> <samples> [warmup]" (p. ej. "AG 1024 10"). Antes
+    // de las muestras de cada versión se ejecutan warmup iteraciones (-w, por defecto 3) que
+    // se marcan con warmup=1. Cada trabajo termina con una línea vacía; "quit" o el fin de
+    // stdin terminan el modo batch.
+    static void runBatch(int warmup) throws Exception {
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in));
+        float[] A = new float[0];
+        float[] B = new float[0];
+        float[] C = new float[0];
+
+        System.out.println("ver\ttypeData\tISA\t#sample\tn\ttime(s)\tNormalized(ns)\tthreads\twarmup");
+        String line;
+        while ((line = in.readLine()) != null) {
+            line = line.trim();
+            if (line.isEmpty()) {
+                continue;
+            }
+            if (line.equals("quit")) {
+                break;
+            }
+            String[] job = line.split("\\s+");
+            try {
+                String selected = job[0].toUpperCase();
+                int n = Integer.parseInt(job[1]);
+                int samples = Integer.parseInt(job[2]);
+                int jobWarmup = job.length > 3 ? Integer.parseInt(job[3]) : warmup;
+
+                // Las matrices se reutilizan entre trabajos y solo crecen cuando n lo requiere
+                if (A.length < n * n) {
+                    A = new float[n * n];
+                    B = new float[n * n];
+                    C = new float[n * n];
+                    Arrays.fill(A, 2.0f);
+                    Arrays.fill(B, 4.0f);
+                }
+                for (int v = 0; v < versions.length; v++) {
+                    if (selected.indexOf(versionNames[v]) < 0) {
+                        continue;
+                    }
+                    for (int s = 0; s < jobWarmup; s++) {
+                        System.out.println(timeSample(v, n, A, B, C, s) + "\t1");
+                    }
+                    for (int s = 0; s < samples; s++) {
+                        System.out.println(timeSample(v, n, A, B, C, s) + "\t0");
+                    }
+                }
+            } catch (InterruptedException e) {
+                // Se restaura la interrupción y se termina el lote tras informar del trabajo
+                Thread.currentThread().interrupt();
+                System.out.println("Error: trabajo interrumpido \"" + line + "\": " + e);
+                System.out.println();
+                System.out.flush();
+                return;
+            } catch (Exception e) {
+                // Un trabajo fallido (p. ej. ExecutionException de la versión paralela) no detiene la JVM
+                Throwable cause = e instanceof ExecutionException && e.getCause() != null ? e.getCause() : e;
+                System.out.println("Error: trabajo fallido \"" + line + "\": " + cause);
+            }
+            System.out.println();
+            System.out.flush();
+        }
+    }
+
     // Función para imprimir matrices
     public static void printMat(int n, float[] M) {
         for (int j = 0; j < n; j++) {
@@ -94,25 +262,62 @@ public class MatrixProductFloat {
         System.out.println();
     }
 
-    public static void main(String[] args) {
+    public static void main(String[] args) throws Exception {
+        // Con --batch no se pasan n ni samples: los trabajos llegan por stdin
+        if (args.length > 0 && args[0].equals("--batch")) {
+            int warmup = 3;
+            for (int a = 1; a + 1 < args.length; a += 2) {
+                if (args[a].equals("-t")) {
+                    tileSize = Integer.parseInt(args[a + 1]);
+                } else if (args[a].equals("-p")) {
+                    numThreads = Math.max(Integer.parseInt(args[a + 1]), 1);
+                } else if (args[a].equals("-w")) {
+                    warmup = Math.max(Integer.parseInt(args[a + 1]), 0);
+                }
+            }
+            if (tileSize < 1) {
+                System.out.println("Error: el tamaño de bloque debe ser positivo");
+                return;
+            }
+            if (numThreads > 1) {
+                pool = Executors.newFixedThreadPool(numThreads);
+            }
+            runBatch(warmup);
+            if (pool != null) {
+                pool.shutdown();
+            }
+            return;
+        }
+
         if (args.length < 2) {
-            System.out.println("Uso: java MatrixProductFloat <n> <samples>");
+            System.out.println("Uso: java MatrixProductFloat <n> <samples> [-t tile] [-p threads] [-v versiones] [print]");
+            System.out.println("     java MatrixProductFloat --batch [-t tile] [-p threads] [-w warmup] < trabajos");
             return;
         }
 
         int n = Integer.parseInt(args[0]); // Tamaño de la matriz
         int samples = Integer.parseInt(args[1]); // Número de muestras
+        boolean printMatrices = false;
+        String selected = null; // Versiones a ejecutar (p. ej. "GH"); null = todas
 
-        // Definir las versiones y sus nombres
-        MatrixOperation[] versions = new MatrixOperation[] {
-            MatrixProductFloat::productMatA,
-            MatrixProductFloat::productMatB,
-            MatrixProductFloat::productMatC,
-            MatrixProductFloat::productMatD,
-            MatrixProductFloat::productMatE,
-            MatrixProductFloat::productMatF
-        };
-        char[] versionNames = {'A', 'B', 'C', 'D', 'E', 'F'};
+        // Argumentos opcionales: -t <tile> fija el tamaño de bloque de G y H, -p <threads> el
+        // número de hilos, -v <versiones> limita las versiones a ejecutar; cualquier otro
+        // argumento imprime las matrices.
+        for (int a = 2; a < args.length; a++) {
+            if (args[a].equals("-t") && a + 1 < args.length) {
+                tileSize = Integer.parseInt(args[++a]);
+            } else if (args[a].equals("-p") && a + 1 < args.length) {
+                numThreads = Math.max(Integer.parseInt(args[++a]), 1);
+            } else if (args[a].equals("-v") && a + 1 < args.length) {
+                selected = args[++a];
+            } else {
+                printMatrices = true;
+            }
+        }
+        if (tileSize < 1) {
+            System.out.println("Error: el tamaño de bloque debe ser positivo");
+            return;
+        }
 
         // Inicializar matrices
         float[] A = new float[n * n];
@@ -121,26 +326,29 @@ public class MatrixProductFloat {
         Arrays.fill(A, 2.0f);
         Arrays.fill(B, 4.0f);
 
-        System.out.println("ver\ttypeData\tISA\t#sample\tn\ttime(s)\tNormalized(ns)");
+        // El pool se crea antes de medir para no incluir el arranque de los hilos
+        if (numThreads > 1) {
+            pool = Executors.newFixedThreadPool(numThreads);
+        }
+
+        System.out.println("ver\ttypeData\tISA\t#sample\tn\ttime(s)\tNormalized(ns)\tthreads");
         
         // Ejecutar todas las versiones
         for (int v = 0; v < versions.length; v++) {
+            if (selected != null && selected.indexOf(versionNames[v]) < 0) {
+                continue;
+            }
             for (int s = 0; s < samples; s++) {
-                Arrays.fill(C, 0.0f);
-                long start = System.nanoTime();
-                versions[v].apply(n, A, B, C);
-                long end = System.nanoTime();
-
-                double seconds = (end - start) / 1.0e9;
-                double timeNormalized = (seconds * 1.0e9) / (n * n * n);
-                String result = String.format("Java_ver(%c)\tfloat\tx64\t%05d\t%05d\t%.4f\t%.4f",
-                        versionNames[v], s, n, seconds, timeNormalized);
-                System.out.println(result);
+                System.out.println(timeSample(v, n, A, B, C, s));
             }
         }
 
-        // Imprimir matrices si hay un tercer argumento
-        if (args.length > 2) {
+        if (pool != null) {
+            pool.shutdown();
+        }
+
+        // Imprimir matrices si se pidió con un argumento adicional
+        if (printMatrices) {
             printMat(n, A);
             printMat(n, B);
             printMat(n, C);
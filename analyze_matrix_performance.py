@@ -1,3 +1,5 @@
+import argparse
+import os
 import pandas as pd
 import numpy as np
 import seaborn as sns
@@ -5,30 +7,29 @@ import matplotlib.pyplot as plt
 from statsmodels.stats.anova import anova_lm
 from statsmodels.formula.api import ols
 import researchpy as rp
-from scipy import stats
 from statsmodels.stats.multicomp import MultiComparison
-from scipy.stats import shapiro, levene, mannwhitneyu, kruskal
-import statsmodels.api as sm
 from statsmodels.stats.outliers_influence import variance_inflation_factor
 
+import cell_stats
+import cleaning
+import plot_aggregates
+import plot_pipeline
+import posthoc
+import qq_grid
+import results_store
+
 def load_and_prepare_data():
-    # Load Ryzen 5 data
-    df_r5 = pd.read_excel("data/tr5.xlsx")
-    df_r5['processor'] = 'Ryzen 5'
-    
-    # Load Ryzen 9 data
-    df_r9 = pd.read_excel("data/tr9.xlsx")
-    df_r9['processor'] = 'Ryzen 9'
-    
-    # Combine datasets
-    df = pd.concat([df_r5, df_r9], ignore_index=True)
-    
-    # Clean and prepare data
-    df = df.rename(columns={
-        "Normalized(ns)": "Normalized_ns",
-        "ver": "version",
-        "typeData": "data_type"
-    })
+    if results_store.store_exists():
+        # C++ runs of both processors from the results store (see results_store.py)
+        df = results_store.load_results(source=['data/tr5.xlsx', 'data/tr9.xlsx'], language='Cpp',
+                                        columns=['processor', 'version', 'data_type', 'n', 'sample', 'normalized_ns'])
+        df = df.rename(columns={"normalized_ns": "Normalized_ns"})
+    else:
+        # Same rows straight from the workbooks: every C++ sheet of both processors
+        df = pd.concat([results_store.read_workbook("data/tr5.xlsx", 'Ryzen 5'),
+                        results_store.read_workbook("data/tr9.xlsx", 'Ryzen 9')], ignore_index=True)
+        df = df.loc[df['language'] == 'Cpp', ['processor', 'version', 'data_type', 'n', 'sample', 'normalized_ns']]
+        df = df.rename(columns={"normalized_ns": "Normalized_ns"}).reset_index(drop=True)
     
     # Convert categorical variables
     df['version'] = df['version'].astype('category')
@@ -46,57 +47,50 @@ def check_assumptions(df):
     
     # Normality test (Shapiro-Wilk)
     print("\nNormality Test (Shapiro-Wilk):")
-    for group in df.groupby(['processor', 'version', 'data_type'], observed=True):
-        stat, p_value = shapiro(group[1]['Normalized_ns'])
-        print(f"Group {group[0]}: W={stat:.4f}, p={p_value:.4f}")
+    for name, row in cell_stats.shapiro_by_cell(df).iterrows():
+        print(f"Group {name}: W={row['W']:.4f}, p={row['p']:.4f}")
     
     # Homogeneity of variances (Levene's test)
     print("\nHomogeneity of Variances (Levene's test):")
-    groups = [group for _, group in df.groupby(['processor', 'version', 'data_type'], observed=True)['Normalized_ns']]
-    if len(groups) > 1:
-        stat, p_value = levene(*groups)
+    if df.groupby(cell_stats.FACTORS, observed=True).ngroups > 1:
+        stat, p_value = cell_stats.levene(df)
         print(f"Levene's test: W={stat:.4f}, p={p_value:.4f}")
     else:
         print("Not enough groups for Levene's test")
 
-def perform_statistical_analysis(df):
+def perform_statistical_analysis(df, cells=None):
     """Perform both parametric and non-parametric analysis"""
     print("\nPerforming Statistical Analysis:")
     
+    # Every one-way test below is derived from one table of per-cell sums and rank sums
+    cells = cells or cell_stats.CellStats(df)
+    
     # One-way analysis for each factor
     print("\nOne-way Analysis Results:")
-    for factor in ['processor', 'version', 'data_type']:
+    for factor in cell_stats.FACTORS:
         if df[factor].nunique() > 1:
-            groups = [group for _, group in df.groupby(factor, observed=True)['Normalized_ns']]
+            result = cells.one_way(factor)
             
             # Parametric test (ANOVA)
-            f_stat, p_val = stats.f_oneway(*groups)
             print(f"\n{factor.capitalize()} effect (ANOVA):")
-            print(f"F={f_stat:.4f}, p={p_val:.4f}")
-            
-            # Calculate effect size (Eta-squared)
-            ss_total = sum((df['Normalized_ns'] - df['Normalized_ns'].mean())**2)
-            ss_between = sum(len(g) * ((g.mean() - df['Normalized_ns'].mean())**2) for g in groups)
-            eta_squared = ss_between / ss_total
-            print(f"Eta-squared: {eta_squared:.4f}")
+            print(f"F={result['F']:.4f}, p={result['p_anova']:.4f}")
+            print(f"Eta-squared: {result['eta_squared']:.4f}")
             
             # Non-parametric test (Kruskal-Wallis)
-            h_stat, p_val = kruskal(*groups)
             print(f"\n{factor.capitalize()} effect (Kruskal-Wallis):")
-            print(f"H={h_stat:.4f}, p={p_val:.4f}")
-            
-            # Calculate effect size (Epsilon-squared)
-            n = len(df)
-            epsilon_squared = (h_stat - (len(groups) - 1)) / (n - len(groups))
-            print(f"Epsilon-squared: {epsilon_squared:.4f}")
+            print(f"H={result['H']:.4f}, p={result['p_kruskal']:.4f}")
+            print(f"Epsilon-squared: {result['epsilon_squared']:.4f}")
         else:
             print(f"\n{factor.capitalize()} effect: Only one level present, skipping analysis")
 
-def perform_post_hoc_tests(df):
+def perform_post_hoc_tests(df, cells=None, correction='holm'):
     """Perform both parametric and non-parametric post-hoc tests"""
     print("\nPost-hoc Analysis:")
     
-    for factor in ['processor', 'version', 'data_type']:
+    # Dunn's test of every factor from one ranking of the pooled data
+    cells = cells or cell_stats.CellStats(df)
+    tables = []
+    for factor in cell_stats.FACTORS:
         if df[factor].nunique() > 1:
             print(f"\nPost-hoc tests for {factor}:")
             
@@ -106,63 +100,67 @@ def perform_post_hoc_tests(df):
             result = mc.tukeyhsd()
             print(result)
             
-            # Non-parametric test (Mann-Whitney U with Bonferroni correction)
-            print("\nMann-Whitney U (with Bonferroni correction):")
-            groups = df.groupby(factor, observed=True)['Normalized_ns']
-            group_names = list(groups.groups.keys())
-            
-            for i in range(len(group_names)):
-                for j in range(i+1, len(group_names)):
-                    group1 = groups.get_group(group_names[i])
-                    group2 = groups.get_group(group_names[j])
-                    stat, p_val = mannwhitneyu(group1, group2, alternative='two-sided')
-                    # Bonferroni correction
-                    p_val *= len(group_names) * (len(group_names) - 1) / 2
-                    print(f"{group_names[i]} vs {group_names[j]}:")
-                    print(f"U={stat:.4f}, p={p_val:.4f}")
+            # Non-parametric test (Dunn's test on the shared ranks)
+            print(f"\nDunn's test ({correction} correction):")
+            table = posthoc.dunn(df, factor, correction=correction, cells=cells)
+            print(table.drop(columns='factor').to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+            tables.append(table)
         else:
             print(f"\nSkipping post-hoc tests for {factor} (only one level)")
+    return pd.concat(tables, ignore_index=True) if tables else None
 
-def create_visualizations(df):
-    """Create comprehensive visualizations"""
-    # Set style
+def render_boxplot(df, path, raw_points=plot_aggregates.RAW_POINTS):
+    """Box plot by processor and version (5-95% whiskers without fliers above raw_points samples)"""
     sns.set(style="whitegrid")
-    
-    # 1. Box plot by processor and version
     plt.figure(figsize=(15, 8))
-    sns.boxplot(x='version', y='Normalized_ns', hue='processor', data=df)
+    aggregate = {} if plot_aggregates.use_raw(df, raw_points) else {'showfliers': False, 'whis': (5, 95)}
+    sns.boxplot(x='version', y='Normalized_ns', hue='processor', data=df, **aggregate)
     plt.title('Performance Distribution by Processor and Algorithm Version (Python Updated)')
     plt.xlabel('Algorithm Version')
     plt.ylabel('Normalized Time (ns)')
     plt.xticks(rotation=45)
     plt.tight_layout()
-    plt.savefig('performance_by_processor_version_python_updated.png')
-    plt.close()
-    
-    # 2. Scatter plot with regression line
+    plt.savefig(path)
+
+def render_regplot(df, path, raw_points=plot_aggregates.RAW_POINTS):
+    """Scatter plot with regression line; above raw_points samples, a density with the
+    median and interquartile band of every version and the regression line from per-size sums"""
+    sns.set(style="whitegrid")
     plt.figure(figsize=(15, 8))
-    sns.regplot(data=df, x='n', y='Normalized_ns', scatter_kws={'alpha':0.5})
+    if plot_aggregates.use_raw(df, raw_points):
+        sns.regplot(data=df, x='n', y='Normalized_ns', scatter_kws={'alpha':0.5})
+    else:
+        ax = plt.gca()
+        plot_aggregates.draw_density(ax, df, 'n', 'Normalized_ns')
+        bands = plot_aggregates.quantile_bands(df, 'n', 'Normalized_ns', by='version')
+        for version, part in bands.groupby(level='version', observed=True):
+            plot_aggregates.draw_bands(ax, part.droplevel('version'), label=str(version), outer=False)
+        intercept, slope = plot_aggregates.linear_fit(df, 'n', 'Normalized_ns')
+        sizes = np.array([df['n'].min(), df['n'].max()], dtype=float)
+        ax.plot(sizes, intercept + slope * sizes, color='black', linestyle='--', label='Linear fit')
+        ax.legend(title='Version (median, 25-75%)')
     plt.title('Performance vs Matrix Size with Regression Line (Python Updated)')
     plt.xlabel('Matrix Size (n)')
     plt.ylabel('Normalized Time (ns)')
     plt.tight_layout()
-    plt.savefig('performance_vs_matrix_size_python_updated.png')
-    plt.close()
-    
-    # 3. Interaction plot (only if we have multiple levels for both factors)
-    if df['version'].nunique() > 1 and df['processor'].nunique() > 1:
-        plt.figure(figsize=(15, 8))
-        sns.pointplot(data=df, x='version', y='Normalized_ns', hue='processor', 
-                     markers=['o', 's'], linestyles=['-', '--'])
-        plt.title('Interaction Plot: Version × Processor (Python Updated)')
-        plt.xlabel('Algorithm Version')
-        plt.ylabel('Mean Normalized Time (ns)')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.savefig('interaction_plot_python_updated.png')
-        plt.close()
-    
-    # 4. Violin plot
+    plt.savefig(path)
+
+def render_interaction(df, path):
+    """Interaction plot of version and processor"""
+    sns.set(style="whitegrid")
+    plt.figure(figsize=(15, 8))
+    sns.pointplot(data=df, x='version', y='Normalized_ns', hue='processor', 
+                 markers=['o', 's'], linestyles=['-', '--'])
+    plt.title('Interaction Plot: Version × Processor (Python Updated)')
+    plt.xlabel('Algorithm Version')
+    plt.ylabel('Mean Normalized Time (ns)')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(path)
+
+def render_violin(df, path):
+    """Violin plot by processor and version"""
+    sns.set(style="whitegrid")
     plt.figure(figsize=(15, 8))
     sns.violinplot(data=df, x='version', y='Normalized_ns', hue='processor', 
                   split=True, inner='quart')
@@ -171,52 +169,76 @@ def create_visualizations(df):
     plt.ylabel('Normalized Time (ns)')
     plt.xticks(rotation=45)
     plt.tight_layout()
-    plt.savefig('performance_violin_plot_python_updated.png')
-    plt.close()
-    
-    # 5. Q-Q plot for each group
-    plt.figure(figsize=(15, 8))
-    for i, (name, group) in enumerate(df.groupby(['processor', 'version', 'data_type'], observed=True)):
-        plt.subplot(1, len(df.groupby(['processor', 'version', 'data_type'], observed=True)), i+1)
-        sm.qqplot(group['Normalized_ns'], line='45')
-        plt.title(f'Q-Q Plot: {name} (Python Updated)')
-    plt.tight_layout()
-    plt.savefig('qq_plots_python_updated.png')
-    plt.close()
+    plt.savefig(path)
+
+def create_visualizations(df, workers=1, force=False, raw_points=plot_aggregates.RAW_POINTS):
+    """Create comprehensive visualizations, skipping those whose data has not changed"""
+    data = df[['processor', 'version', 'data_type', 'n', 'Normalized_ns']].reset_index(drop=True)
+    figures = [
+        plot_pipeline.Figure('performance_by_processor_version_python_updated.png', render_boxplot, data,
+                             raw_points=raw_points),
+        plot_pipeline.Figure('performance_vs_matrix_size_python_updated.png', render_regplot, data,
+                             raw_points=raw_points),
+        plot_pipeline.Figure('performance_violin_plot_python_updated.png', render_violin, data),
+    ]
+    # Q-Q grid of every group, paginated
+    figures += qq_grid.qq_figures(data, cell_stats.FACTORS, 'qq_plots_python_updated.png',
+                                  title='Q-Q Plots (Python Updated)')
+    # Interaction plot only if we have multiple levels for both factors
+    if df['version'].nunique() > 1 and df['processor'].nunique() > 1:
+        figures.insert(2, plot_pipeline.Figure('interaction_plot_python_updated.png', render_interaction, data))
+    plot_pipeline.render_all(figures, workers, force)
 
 def main():
+    parser = argparse.ArgumentParser(description="ANOVA, post-hoc tests and plots of the C++ results of both processors")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processes used to render figures")
+    parser.add_argument('--redraw', action='store_true',
+                        help="Render every figure, even those whose data and parameters are unchanged")
+    parser.add_argument('--raw-points', type=int, default=plot_aggregates.RAW_POINTS,
+                        help="Draw individual samples only up to this many rows; aggregate above it")
+    cleaning.add_arguments(parser)
+    args = parser.parse_args()
+    
     # Load and prepare data
     print("Loading and preparing data...")
     df = load_and_prepare_data()
     
+    # Flag warm-up samples and outliers per cell and keep the rest
+    df = cleaning.clean(df, cell_stats.FACTORS + ['n'], **cleaning.options(args))
+    
     # Print basic statistics
+    basic_stats = df.groupby(cell_stats.FACTORS, observed=True)['Normalized_ns'].describe()
     print("\nBasic Statistics:")
-    print(df.groupby(['processor', 'version', 'data_type'], observed=True)['Normalized_ns'].describe())
+    print(basic_stats)
     
     # Check ANOVA assumptions
     check_assumptions(df)
     
     # Perform statistical analysis
-    perform_statistical_analysis(df)
+    cells = cell_stats.CellStats(df)
+    perform_statistical_analysis(df, cells)
     
     # Perform post-hoc tests
-    perform_post_hoc_tests(df)
+    dunn_results = perform_post_hoc_tests(df, cells)
+    if dunn_results is not None:
+        dunn_results.to_csv('posthoc_dunn_results.csv', index=False)
     
     # Create visualizations
     print("\nCreating visualizations...")
-    create_visualizations(df)
+    create_visualizations(df, args.workers, args.redraw, args.raw_points)
     
     # Save results to file
     with open('statistical_analysis_results.txt', 'w') as f:
         f.write("Statistical Analysis Results\n")
         f.write("=========================\n\n")
         f.write("Basic Statistics:\n")
-        f.write(str(df.groupby(['processor', 'version', 'data_type'], observed=True)['Normalized_ns'].describe()))
+        f.write(str(basic_stats))
         f.write("\n\nAssumption Tests:\n")
         f.write("Normality and homogeneity of variances tests results are shown above.\n")
         f.write("\nStatistical Tests:\n")
         f.write("Both parametric (ANOVA) and non-parametric (Kruskal-Wallis) tests were performed.\n")
-        f.write("Post-hoc tests include both Tukey's HSD and Mann-Whitney U with Bonferroni correction.\n")
+        f.write("Post-hoc tests include both Tukey's HSD and Dunn's test with Holm correction "
+                "(posthoc_dunn_results.csv).\n")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
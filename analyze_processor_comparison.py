@@ -1,16 +1,50 @@
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-from scipy import stats
 import os
 import re
 
-def load_and_process_data(file_path):
-    """Load and process data from Excel file"""
+import bootstrap
+import cleaning
+import plot_aggregates
+import plot_pipeline
+import results_store
+import sheet_cache
+
+# Sheet headers, lower-cased without spaces or underscores, mapped to this script's columns.
+# The time column is the first candidate present in this order, so normalized(ns) wins over
+# time(s) when a sheet has both.
+COLUMN_ALIASES = {
+    'ver': 'version',
+    'version': 'version',
+    'typedata': 'data_type',
+    'datatype': 'data_type',
+    'threads': 'threads',
+    'n': 'n',
+    '#sample': 'sample',
+    'sample': 'sample',
+}
+TIME_ALIASES = ['normalized(ns)', 'normalizedns', 'normalized', 'time(s)', 'time']
+
+def resolve_columns(columns):
+    """Rename mapping from a sheet's header to version, data_type, threads, n, sample and Normalized_ns"""
+    cleaned = {str(col).lower().replace(' ', '').replace('_', ''): col for col in columns}
+    mapping = {cleaned[alias]: name for alias, name in COLUMN_ALIASES.items() if alias in cleaned}
+    time_col = next((cleaned[alias] for alias in TIME_ALIASES if alias in cleaned), None)
+    if time_col is not None:
+        mapping[time_col] = 'Normalized_ns'
+    return mapping
+
+def load_and_process_data(file_path, verbose=False, sheets=None, sheet_errors=None):
+    """Load and process data from Excel file (or its sheets, already parsed)"""
     print(f"Processing file: {file_path}")
+    if sheets is None:
+        sheet_errors = {}
+        sheets = sheet_cache.read_sheets(file_path, errors=sheet_errors)
     version_info = []
-    for sheet in pd.ExcelFile(file_path).sheet_names:
+    for sheet in sheet_cache.sheet_names(file_path):
         # More flexible regex pattern that handles various formats
         match = re.match(r'(Codigo\s*C|Cpp|Java|python)[\s-]+(float|double)[\s-]+ver\(?([a-f])\)?', sheet, re.IGNORECASE)
         if match:
@@ -54,7 +88,7 @@ def load_and_process_data(file_path):
             version_map = {'Hoja 7': 'b', 'Hoja 8': 'c', 'Hoja 9': 'd', 'Hoja 10': 'e', 'Hoja 11': 'f'}
             version = version_map[sheet]
             # Read the sheet to determine data_type
-            df = pd.read_excel(file_path, sheet_name=sheet)
+            df = sheets.get(sheet, pd.DataFrame())
             if 'TypeData' in df.columns:
                 if df['TypeData'].str.lower().str.contains('double').any():
                     version_info.append({
@@ -82,47 +116,23 @@ def load_and_process_data(file_path):
     # Combine data from all sheets
     all_data = []
     skipped_sheets = []
+    mappings = {}  # header -> rename mapping, resolved once per distinct header in the workbook
     for info in version_info:
         try:
-            # Read Excel sheet
-            df = pd.read_excel(file_path, sheet_name=info['sheet_name'])
+            # Sheet parsed up front; a parse error is reported for this sheet only
+            if info['sheet_name'] in sheet_errors:
+                raise sheet_errors[info['sheet_name']]
+            df = sheets[info['sheet_name']]
             
-            # Try to find the normalized time column
-            possible_names = [
-                'normalized(ns)', 'normalized_ns', 'normalized', 'normalized (ns)',
-                'Normalized(ns)', 'Normalized_ns', 'Normalized', 'Normalized (ns)',
-                'time(s)', 'time', 'Time(s)', 'Time'
-            ]
-            found_col = None
-            for col in df.columns:
-                col_clean = col.lower().replace(' ', '').replace('_', '')
-                for name in possible_names:
-                    name_clean = name.lower().replace(' ', '').replace('_', '')
-                    if col_clean == name_clean:
-                        found_col = col
-                        break
-                if found_col:
-                    break
-            if found_col is None:
+            header = tuple(df.columns)
+            if header not in mappings:
+                mappings[header] = resolve_columns(header)
+            mapping = mappings[header]
+            if 'Normalized_ns' not in mapping.values():
                 print(f"Could not find normalized time column in sheet {info['sheet_name']}. Columns found: {list(df.columns)}")
                 skipped_sheets.append(info['sheet_name'])
                 continue
-            # Rename the found column
-            df = df.rename(columns={found_col: 'Normalized_ns'})
-            
-            # Normalize other columns
-            df = df.rename(columns={
-                'ver': 'version',
-                'Ver': 'version',
-                'TypeData': 'data_type',
-                'typedata': 'data_type',
-                'typeData': 'data_type',
-                'version': 'version'
-            })
-            
-            # If 'data_type' is not in columns but 'TypeData' is, copy it
-            if 'data_type' not in df.columns and 'TypeData' in df.columns:
-                df['data_type'] = df['TypeData']
+            df = df[list(mapping)].rename(columns=mapping)
             
             # Set the version column for all rows if info['version'] is set
             if info['version']:
@@ -131,39 +141,31 @@ def load_and_process_data(file_path):
             # Add metadata
             df['language'] = info['language']
             
-            # Debug print for data_type values
+            # Thread count is a factor; sheets recorded before it existed were single-threaded
+            if 'threads' in df.columns:
+                df['threads'] = results_store.to_number(df['threads']).fillna(1).astype(int)
+            else:
+                df['threads'] = 1
+            
             if 'data_type' in df.columns:
-                df['data_type'] = df['data_type'].astype(str).str.strip().str.lower()
-                print(f"\nSheet {info['sheet_name']} - Before filtering:")
-                print(f"Unique data_type values: {df['data_type'].unique()}")
-                print(f"Filtering for: {info['data_type']}")
-                print(f"First few rows:\n{df.head()}")
-                
                 # If data_type is in the sheet, use it to filter
-                filtered = df[df['data_type'] == info['data_type'].strip().lower()]
-                print(f"\nAfter filtering for {info['data_type']}:")
-                print(f"Number of rows: {len(filtered)}")
-                if not filtered.empty:
-                    print(f"First few rows:\n{filtered.head()}")
-                df = filtered
+                df['data_type'] = df['data_type'].astype(str).str.strip().str.lower()
+                if verbose:
+                    print(f"\nSheet {info['sheet_name']}: data_type values {df['data_type'].unique()}, "
+                          f"filtering for {info['data_type']}")
+                df = df[df['data_type'] == info['data_type'].strip().lower()]
             else:
                 df['data_type'] = info['data_type']
             
-            # Convert time columns to numeric, handling both comma and dot decimal separators
-            if 'Normalized_ns' in df.columns:
-                df['Normalized_ns'] = df['Normalized_ns'].astype(str).str.replace(',', '.').astype(float)
-                print(f"\nAfter converting Normalized_ns to numeric:")
-                print(f"Number of rows: {len(df)}")
-                print(f"Number of NaN values: {df['Normalized_ns'].isna().sum()}")
-                if not df.empty:
-                    print(f"First few rows:\n{df.head()}")
+            # Numeric columns pass through; strings with comma or dot decimals are converted
+            df['Normalized_ns'] = results_store.to_number(df['Normalized_ns'])
             
             # Drop rows with missing values
             df = df.dropna(subset=['Normalized_ns', 'version', 'language', 'data_type'])
-            print(f"\nAfter dropping NaN values:")
-            print(f"Number of rows: {len(df)}")
-            if not df.empty:
-                print(f"First few rows:\n{df.head()}")
+            if verbose:
+                print(f"Sheet {info['sheet_name']}: {len(df)} rows")
+                if not df.empty:
+                    print(f"First few rows:\n{df.head()}")
             
             if not df.empty:
                 all_data.append(df)
@@ -185,131 +187,176 @@ def load_and_process_data(file_path):
     # Print summary of processed data
     print("\nProcessed data summary:")
     print(f"Total rows: {len(final_df)}")
-    print("\nVersions by language and data type:")
-    print(final_df.groupby(['language', 'data_type'])['version'].value_counts())
+    print("\nVersions by language, data type and threads:")
+    print(final_df.groupby(['language', 'data_type', 'threads'])['version'].value_counts())
     
     return final_df
 
+def load_from_store(source):
+    """Load the rows of one workbook from the columnar results store"""
+    print(f"Loading {source} from {results_store.DEFAULT_STORE}")
+    df = results_store.load_results(source=source,
+                                    columns=['version', 'language', 'data_type', 'threads', 'n', 'sample',
+                                             'normalized_ns'])
+    if df.empty:
+        raise ValueError(f"No rows for {source} in {results_store.DEFAULT_STORE}")
+    df = df.rename(columns={'normalized_ns': 'Normalized_ns'})
+    for column in ['version', 'language', 'data_type']:
+        df[column] = df[column].astype(str)
+    return df
+
 def create_high_contrast_palette():
     # High contrast colors for processors
     return ['#FF0000', '#0000FF']  # Red for R5, Blue for R9
 
-def plot_all_versions_comparison(r5_df, r9_df):
-    """Create boxplots comparing all versions between R5 and R9"""
-    # Create plots directory if it doesn't exist
-    os.makedirs('plots', exist_ok=True)
-    
+PROCESSORS = ['R5 5600X', 'R9 5900X']
+SUMMARY_KEYS = ['language_key', 'data_type_key', 'version', 'threads']
+
+def comparison_data(r5_df, r9_df):
+    """Rows of both processors in one frame, with lower-cased language and data type keys"""
+    data = pd.concat([r5_df.assign(Processor=PROCESSORS[0]), r9_df.assign(Processor=PROCESSORS[1])],
+                     ignore_index=True)
+    data['language_key'] = data['language'].astype(str).str.lower()
+    data['data_type_key'] = data['data_type'].astype(str).str.lower()
+    return data
+
+def render_comparison(plot_df, path, lang, dtype, dpi=300, raw_points=plot_aggregates.RAW_POINTS):
+    """Boxplot of every version on both processors, with the points (up to raw_points
+    samples; 5-95% whiskers without fliers above that) and mean ± std labels"""
     # Set the style for better visualization
     plt.style.use('default')
     
-    # Get unique combinations of language and data type
-    languages = sorted(r5_df['language'].unique())
-    data_types = sorted(r5_df['data_type'].unique())
+    # Create figure with larger size
+    plt.figure(figsize=(15, 8))
     
-    # Create a separate plot for each language and data type
-    for lang in languages:
-        for dtype in data_types:
-            # Filter data for this language and data type
-            r5_subset = r5_df[(r5_df['language'].str.lower() == lang.lower()) & 
-                              (r5_df['data_type'].str.lower() == dtype.lower())]
-            r9_subset = r9_df[(r9_df['language'].str.lower() == lang.lower()) & 
-                              (r9_df['data_type'].str.lower() == dtype.lower())]
-            
-            if r5_subset.empty or r9_subset.empty:
-                print(f"No data available for {lang} {dtype}")
+    # Create the boxplot with improved styling
+    raw = plot_aggregates.use_raw(plot_df, raw_points)
+    ax = sns.boxplot(x='version', y='Normalized_ns', hue='Processor', data=plot_df,
+                   palette=['#1f77b4', '#ff7f0e'], width=0.7,
+                   **({} if raw else {'showfliers': False, 'whis': (5, 95)}))
+    
+    # Add individual data points with some jitter
+    if raw:
+        sns.stripplot(x='version', y='Normalized_ns', hue='Processor', data=plot_df,
+                     palette=['#1f77b4', '#ff7f0e'], dodge=True, size=4, alpha=0.3)
+    
+    # Customize the plot
+    plt.title(f'Performance Comparison - {lang} {dtype}', fontsize=16, pad=20)
+    plt.xlabel('Algorithm Version', fontsize=12)
+    plt.ylabel('Normalized Time (ns)', fontsize=12)
+    
+    # Rotate x-axis labels for better readability
+    plt.xticks(rotation=45, ha='right')
+    
+    # Add grid for better readability
+    plt.grid(True, linestyle='--', alpha=0.7)
+    
+    # Adjust legend
+    plt.legend(title='Processor', title_fontsize=12, fontsize=10)
+    
+    # Add mean values as text above each box, from one groupby
+    box_stats = plot_df.groupby(['Processor', 'version'])['Normalized_ns'].agg(['mean', 'std'])
+    for i, processor in enumerate(PROCESSORS):
+        for j, version in enumerate(sorted(plot_df['version'].unique())):
+            if (processor, version) not in box_stats.index:
                 continue
-            
-            # Create figure with larger size
-            plt.figure(figsize=(15, 8))
-            
-            # Create boxplot
-            plot_df = pd.concat([
-                r5_subset.assign(Processor='R5 5600X'),
-                r9_subset.assign(Processor='R9 5900X')
-            ])
-            
-            # Create the boxplot with improved styling
-            ax = sns.boxplot(x='version', y='Normalized_ns', hue='Processor', data=plot_df,
-                           palette=['#1f77b4', '#ff7f0e'], width=0.7)
-            
-            # Add individual data points with some jitter
-            sns.stripplot(x='version', y='Normalized_ns', hue='Processor', data=plot_df,
-                         palette=['#1f77b4', '#ff7f0e'], dodge=True, size=4, alpha=0.3)
-            
-            # Customize the plot
-            plt.title(f'Performance Comparison - {lang} {dtype}', fontsize=16, pad=20)
-            plt.xlabel('Algorithm Version', fontsize=12)
-            plt.ylabel('Normalized Time (ns)', fontsize=12)
-            
-            # Rotate x-axis labels for better readability
-            plt.xticks(rotation=45, ha='right')
-            
-            # Add grid for better readability
-            plt.grid(True, linestyle='--', alpha=0.7)
-            
-            # Adjust legend
-            plt.legend(title='Processor', title_fontsize=12, fontsize=10)
-            
-            # Add mean values as text above each box
-            for i, processor in enumerate(['R5 5600X', 'R9 5900X']):
-                for j, version in enumerate(sorted(plot_df['version'].unique())):
-                    subset = plot_df[(plot_df['Processor'] == processor) & (plot_df['version'] == version)]
-                    mean_val = subset['Normalized_ns'].mean()
-                    std_val = subset['Normalized_ns'].std()
-                    plt.text(j + (i-0.5)*0.4, mean_val, f'{mean_val:.1f}\n±{std_val:.1f}', 
-                            ha='center', va='bottom', fontsize=8)
-            
-            # Adjust layout to prevent label cutoff
-            plt.tight_layout()
-            
-            # Save plot with high DPI for better quality
-            plt.savefig(f'plots/performance_comparison_{lang}_{dtype}.png', dpi=300, bbox_inches='tight')
-            plt.close()
+            mean_val, std_val = box_stats.loc[(processor, version)]
+            plt.text(j + (i-0.5)*0.4, mean_val, f'{mean_val:.1f}\n±{std_val:.1f}', 
+                    ha='center', va='bottom', fontsize=8)
     
-    # Create performance summary
-    summary = []
-    for lang in languages:
-        for dtype in data_types:
-            r5_subset = r5_df[(r5_df['language'].str.lower() == lang.lower()) & 
-                              (r5_df['data_type'].str.lower() == dtype.lower())]
-            r9_subset = r9_df[(r9_df['language'].str.lower() == lang.lower()) & 
-                              (r9_df['data_type'].str.lower() == dtype.lower())]
-            
-            if not r5_subset.empty and not r9_subset.empty:
-                r5_stats = r5_subset.groupby('version')['Normalized_ns'].agg(['mean', 'std', 'count']).reset_index()
-                r9_stats = r9_subset.groupby('version')['Normalized_ns'].agg(['mean', 'std', 'count']).reset_index()
-                
-                for _, row in r5_stats.iterrows():
-                    version = row['version']
-                    r9_row = r9_stats[r9_stats['version'] == version]
-                    if not r9_row.empty:
-                        summary.append({
-                            'Language': lang,
-                            'Data Type': dtype,
-                            'Version': version,
-                            'R5 Mean': row['mean'],
-                            'R5 Std': row['std'],
-                            'R5 Count': row['count'],
-                            'R9 Mean': r9_row['mean'].iloc[0],
-                            'R9 Std': r9_row['std'].iloc[0],
-                            'R9 Count': r9_row['count'].iloc[0]
-                        })
+    # Adjust layout to prevent label cutoff
+    plt.tight_layout()
     
-    # Save summary to CSV
-    summary_df = pd.DataFrame(summary)
+    # Save plot with high DPI for better quality
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+
+def plot_all_versions_comparison(r5_df, r9_df, workers=1, force=False, raw_points=plot_aggregates.RAW_POINTS):
+    """Create boxplots comparing all versions between R5 and R9"""
+    # Create plots directory if it doesn't exist
+    os.makedirs('plots', exist_ok=True)
+    
+    # Both processors in one frame, grouped once by language and data type
+    data = comparison_data(r5_df, r9_df)
+    r5_rows = data['Processor'] == PROCESSORS[0]
+    names = data[r5_rows].groupby(['language_key', 'data_type_key'])[['language', 'data_type']].first()
+    
+    # One figure per language and data type present on both processors
+    figures = []
+    for (lang, dtype), plot_df in data.groupby(['language_key', 'data_type_key']):
+        if (lang, dtype) not in names.index:
+            continue
+        lang, dtype = names.loc[(lang, dtype)]
+        if plot_df['Processor'].nunique() < 2:
+            print(f"No data available for {lang} {dtype}")
+            continue
+        figures.append(plot_pipeline.Figure(f'plots/performance_comparison_{lang}_{dtype}.png', render_comparison,
+                                            plot_df[['version', 'Normalized_ns', 'Processor']].reset_index(drop=True),
+                                            lang=lang, dtype=dtype, raw_points=raw_points))
+    plot_pipeline.render_all(figures, workers, force)
+    
+    # Create performance summary: cells measured on both processors
+    def processor_stats(rows):
+        return data[rows].groupby(SUMMARY_KEYS)['Normalized_ns'].agg(['mean', 'std', 'count']).reset_index()
+    merged = processor_stats(r5_rows).merge(processor_stats(~r5_rows), on=SUMMARY_KEYS, suffixes=(' R5', ' R9'))
+    merged = merged.join(names, on=['language_key', 'data_type_key'], how='inner')
+    summary_df = pd.DataFrame({
+        'Language': merged['language'],
+        'Data Type': merged['data_type'],
+        'Version': merged['version'],
+        'Threads': merged['threads'],
+        'R5 Mean': merged['mean R5'],
+        'R5 Std': merged['std R5'],
+        'R5 Count': merged['count R5'],
+        'R9 Mean': merged['mean R9'],
+        'R9 Std': merged['std R9'],
+        'R9 Count': merged['count R9'],
+    })
+    
+    # Save summary to CSV, with bootstrap CIs of the medians and of the R5/R9 speedup
+    if not summary_df.empty:
+        summary_df = add_bootstrap_columns(summary_df, data)
     summary_df.to_csv('plots/performance_summary.csv', index=False)
     print("Performance summary saved to plots/performance_summary.csv")
+    return summary_df
+
+def add_bootstrap_columns(summary_df, data):
+    """Median, speedup (R5 time / R9 time) and their 95% bootstrap CIs for every summary row"""
+    boot = bootstrap.BootstrapMedians(data, ['Processor'] + SUMMARY_KEYS)
+    medians = boot.table()
+    columns = {}
+    for label, processor in zip(['R5', 'R9'], PROCESSORS):
+        part = medians.xs(processor, level='Processor')
+        columns.update({f'{label} Median': part['median'], f'{label} Median CI Low': part['ci_low'],
+                        f'{label} Median CI High': part['ci_high']})
+    speedup = boot.ratio('Processor', *PROCESSORS)
+    columns.update({'Speedup': speedup['ratio'], 'Speedup CI Low': speedup['ci_low'],
+                    'Speedup CI High': speedup['ci_high']})
+    keys = pd.MultiIndex.from_arrays([summary_df['Language'].astype(str).str.lower(),
+                                      summary_df['Data Type'].astype(str).str.lower(),
+                                      summary_df['Version'], summary_df['Threads']])
+    for name, column in columns.items():
+        summary_df[name] = column.reindex(keys).to_numpy()
+    return summary_df
+
+def insights(data):
+    """(language, data type, R5 median, R9 median, speedup, CI low, CI high) over all versions"""
+    boot = bootstrap.BootstrapMedians(data, ['Processor', 'language_key', 'data_type_key'])
+    medians = boot.table()['median']
+    speedup = boot.ratio('Processor', *PROCESSORS)
+    return [(lang, dtype, medians[PROCESSORS[0], lang, dtype], medians[PROCESSORS[1], lang, dtype], row['ratio'],
+             row['ci_low'], row['ci_high']) for (lang, dtype), row in speedup.iterrows()]
 
 def print_insights(summary):
     print("\n==== Performance Insights ====")
-    for lang, dtype, r5_mean, r9_mean, improvement in summary:
+    for lang, dtype, r5_median, r9_median, speedup, low, high in summary:
         print(f"\n{lang} {dtype}:")
-        print(f"R5 5600X average: {r5_mean:.2f} ns")
-        print(f"R9 5900X average: {r9_mean:.2f} ns")
-        print(f"Performance improvement: {improvement:.2f}%")
+        print(f"R5 5600X median: {r5_median:.2f} ns")
+        print(f"R9 5900X median: {r9_median:.2f} ns")
+        print(f"Performance improvement: {(speedup - 1) * 100:.2f}% "
+              f"(95% CI {(low - 1) * 100:.2f}% to {(high - 1) * 100:.2f}%)")
     
     print("\n==== Value Analysis ====")
-    avg_improvement = np.mean([imp for *_, imp in summary]) if summary else 0
+    avg_improvement = np.mean([(speedup - 1) * 100 for *_, speedup, _, _ in summary]) if summary else 0
     if avg_improvement > 10:
         print(f"\nThe R9 5900X shows significant performance gains:")
         print(f"- Average improvement: {avg_improvement:.1f}%")
@@ -327,13 +374,41 @@ def print_insights(summary):
         print("- Consider R9 only if you need the additional cores for other tasks")
 
 def main():
+    parser = argparse.ArgumentParser(description="Compare the R5 5600X and R9 5900X results")
+    parser.add_argument('--verbose', action='store_true', help="Print per-sheet details while loading workbooks")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes used to parse workbook sheets and render figures")
+    parser.add_argument('--redraw', action='store_true',
+                        help="Render every figure, even those whose data and parameters are unchanged")
+    parser.add_argument('--raw-points', type=int, default=plot_aggregates.RAW_POINTS,
+                        help="Draw individual samples only up to this many rows per figure; aggregate above it")
+    cleaning.add_arguments(parser)
+    args = parser.parse_args()
+    
     try:
         # Load data
-        r5_data = load_and_process_data('data/tr5.xlsx')
-        r9_data = load_and_process_data('data/tr9.xlsx')
+        # The results store is the source of truth once ingested; the workbooks otherwise
+        if results_store.store_exists():
+            r5_data = load_from_store('data/tr5.xlsx')
+            r9_data = load_from_store('data/tr9.xlsx')
+        else:
+            # Parse the sheets of both workbooks across one worker pool
+            files = ['data/tr5.xlsx', 'data/tr9.xlsx']
+            errors = {}
+            loaded = sheet_cache.read_workbooks([(f, None) for f in files], args.workers, errors)
+            r5_data, r9_data = [
+                load_and_process_data(f, args.verbose, loaded[f],
+                                      {sheet: error for (path, sheet), error in errors.items() if path == f})
+                for f in files]
+        
+        # Flag warm-up samples and outliers per cell and keep the rest
+        cells = ['language', 'data_type', 'version', 'threads', 'n']
+        r5_data = cleaning.clean(r5_data, cells, label='R5', **cleaning.options(args))
+        r9_data = cleaning.clean(r9_data, cells, label='R9', **cleaning.options(args))
         
         # Create comparison plots
-        plot_all_versions_comparison(r5_data, r9_data)
+        plot_all_versions_comparison(r5_data, r9_data, args.workers, args.redraw, args.raw_points)
+        print_insights(insights(comparison_data(r5_data, r9_data)))
         
     except Exception as e:
         print(f"Error in main execution: {str(e)}")
@@ -1,158 +1,251 @@
-import pandas as pd
+import argparse
 import os
+import shutil
+import tempfile
 
-# Read the Excel files
-file_n10 = "tiempos de ejecucion ryzen 9 n=10.xlsx"
-file_n5 = "tiempos de ejecucion ryzen 9 n=5.xlsx"
-
-# Create Excel writer for the output file
-output_file = "tiempos de ejecucion ryzen 9 n=15_combined.xlsx"
-
-# Read both Excel files
-excel_n10 = pd.ExcelFile(file_n10)
-excel_n5 = pd.ExcelFile(file_n5)
-
-# Normalize sheet names for matching (lowercase, strip spaces)
-def normalize_sheet_name(name):
-    return name.lower().replace(' ', '')
-
-# Get normalized sheet names from both files
-sheets_n10_norm = {normalize_sheet_name(sheet): sheet for sheet in excel_n10.sheet_names}
-sheets_n5_norm = {normalize_sheet_name(sheet): sheet for sheet in excel_n5.sheet_names}
-
-# Find common normalized sheets
-common_sheets_norm = set(sheets_n10_norm.keys()) & set(sheets_n5_norm.keys())
-
-if not common_sheets_norm:
-    print("No matching sheets found between the two files!")
-    exit(1)
-
-print("Found matching sheets:")
-for sheet_norm in common_sheets_norm:
-    print(f"- {sheets_n10_norm[sheet_norm]} (from n=10) matches {sheets_n5_norm[sheet_norm]} (from n=5)")
-
-# Define the desired order and pattern
-languages = ['Cpp', 'Java', 'python']
-types = ['float', 'double']
-versions = ['a', 'b', 'c', 'd', 'e', 'f']
-ordered_sheet_names = []
-for t in types:
-    for lang in languages:
-        for v in versions:
-            ordered_sheet_names.append(f"{lang} - {t} - ver({v})")
-
-# Lowercase, no-space mapping for matching
-ordered_sheet_names_norm = [normalize_sheet_name(s) for s in ordered_sheet_names]
-
-# Only process sheets that match the pattern and exist in both files
-filtered_common_sheets = [s for s in ordered_sheet_names_norm if s in common_sheets_norm]
-
-processed_dfs = {}
-for sheet_norm in filtered_common_sheets:
-    sheet_n10 = sheets_n10_norm[sheet_norm]
-    sheet_n5 = sheets_n5_norm[sheet_norm]
-    print(f"\nProcessing sheet: {sheet_n10}")
-    
-    # Read data from both files for the current sheet
-    df_n10 = pd.read_excel(file_n10, sheet_name=sheet_n10)
-    df_n5 = pd.read_excel(file_n5, sheet_name=sheet_n5, header=None)
-    
-    # Remove empty columns from n=5
-    df_n5 = df_n5.dropna(axis=1, how='all')
-    
-    # Get the headers from n=10
-    headers = df_n10.columns.tolist()
-    
-    # Check if column counts match
-    if len(df_n5.columns) != len(headers):
-        print(f"Warning: Column count mismatch in sheet {sheet_n10}")
-        print(f"n=10 has {len(headers)} columns: {headers}")
-        print(f"n=5 has {len(df_n5.columns)} columns")
-        
-        # If n=5 has fewer columns, add empty columns to match
-        if len(df_n5.columns) < len(headers):
-            missing_cols = len(headers) - len(df_n5.columns)
-            for i in range(missing_cols):
-                df_n5[len(df_n5.columns)] = None
-        # If n=5 has more columns, drop extra columns
-        else:
-            df_n5 = df_n5.iloc[:, :len(headers)]
-    
-    # Assign headers to n=5 data
-    df_n5.columns = headers
-    
-    # Convert #sample column to numeric in both dataframes
-    if '#sample' in df_n10.columns:
-        df_n10['#sample'] = pd.to_numeric(df_n10['#sample'], errors='coerce')
-    if '#sample' in df_n5.columns:
-        df_n5['#sample'] = pd.to_numeric(df_n5['#sample'], errors='coerce')
-    
-    # For Cpp float versions, always combine n=10 samples 0-9 and n=5 samples 0-4 (relabelled as 10-14)
-    if sheet_n10.startswith('Cpp - float - ver('):
-        df_n10_0_9 = df_n10[df_n10['#sample'].isin(range(10))] if '#sample' in df_n10.columns else df_n10
-        df_n5_0_4 = df_n5[df_n5['#sample'].isin(range(5))].copy() if '#sample' in df_n5.columns else pd.DataFrame(columns=df_n5.columns)
-        if not df_n5_0_4.empty:
-            df_n5_0_4['#sample'] = df_n5_0_4['#sample'] + 10
-        df_combined = pd.concat([df_n10_0_9, df_n5_0_4], ignore_index=True)
-    else:
-        # Only keep samples 0-9 from n=10
-        if '#sample' in df_n10.columns:
-            df_n10 = df_n10[df_n10['#sample'].isin([0, 1, 2, 3, 4, 5, 6, 7, 8, 9])]
-        # Only keep samples 0-4 from n=5, then relabel as 10-14
-        if '#sample' in df_n5.columns:
-            df_n5 = df_n5[df_n5['#sample'].isin([0, 1, 2, 3, 4])].copy()
-            df_n5['#sample'] = df_n5['#sample'] + 10
-        df_combined = pd.concat([df_n10, df_n5], ignore_index=True)
-    
-    # Sort by n and #sample if these columns exist
-    if 'n' in df_combined.columns and '#sample' in df_combined.columns:
-        df_combined = df_combined.sort_values(['n', '#sample']).reset_index(drop=True)
-        
-        # Ensure we have all samples from 0 to 14
-        expected_samples = list(range(15))  # 0 to 14
-        if '#sample' in df_combined.columns:
-            actual_samples = sorted(df_combined['#sample'].dropna().unique())
-            missing_samples = set(expected_samples) - set(actual_samples)
-            if missing_samples:
-                print(f"Warning: Missing samples in sheet {sheet_n10}: {missing_samples}")
-    
-    # Store the processed dataframe
-    processed_dfs[sheet_n10] = df_combined
-    print(f"Sheet {sheet_n10} has {len(df_combined)} rows after blending.")
-    print(f"Successfully processed sheet: {sheet_n10}")
-
-if not processed_dfs:
-    print("No data was processed successfully!")
-    exit(1)
-
-# Write all processed dataframes to the Excel file in the specified order
-non_empty_sheets = []
-for sheet_name in ordered_sheet_names:
-    if sheet_name in processed_dfs:
-        df = processed_dfs[sheet_name]
-        if not df.empty:
-            non_empty_sheets.append((sheet_name, df))
-        else:
-            print(f"Skipping empty sheet: {sheet_name}")
-
-if not non_empty_sheets:
-    print("No non-empty sheets to write! Output file will not be created.")
-    exit(1)
-
-with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-    for sheet_name, df in non_empty_sheets:
-        print(f"Writing sheet: {sheet_name}")
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
-
-print(f"\nNew Excel file created: {output_file}")
-
-# Verify the file was created and has content
-if os.path.exists(output_file):
-    file_size = os.path.getsize(output_file)
-    print(f"File size: {file_size} bytes")
-    if file_size == 0:
-        print("Warning: The file was created but is empty!")
-    else:
-        print("File was created successfully with content.")
-else:
-    print("Error: File was not created!") 
\ No newline at end of file
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+import results_store
+
+# Merge benchmark runs (workbooks, TSV logs or results store directories) into one data
+# set. Each run can keep a declared range of its samples; samples are then renumbered by
+# a rule and rows are deduplicated on (processor, language, dtype, version, n, sample).
+# Runs are read chunk by chunk and written out the same way, so the memory needed
+# depends on the chunk size and the number of cells, not on how many runs are merged.
+#
+#   python blend_excel.py          # the original blend: n=10 samples 0-9 + n=5 samples 0-4
+#   python blend_excel.py "run1.xlsx#0-9" run2.txt results_store -o merged.tsv --rule sequential
+#
+# Renumbering rules, per cell (processor, language, dtype, version, n):
+#   offset      samples of a run are shifted past the highest sample kept from earlier runs
+#   sequential  samples are numbered 0, 1, 2, ... in the order they are read
+#   keep        sample numbers are left as they are (later duplicates are dropped)
+
+DEFAULT_RUNS = ["tiempos de ejecucion ryzen 9 n=10.xlsx#0-9", "tiempos de ejecucion ryzen 9 n=5.xlsx#0-4"]
+DEFAULT_OUTPUT = "tiempos de ejecucion ryzen 9 n=15_combined.xlsx"
+RULES = ['offset', 'sequential', 'keep']
+
+CELL = ['processor', 'language', 'data_type', 'version', 'n']
+HEADER = ['ver', 'typeData', 'ISA', '#sample', 'n', 'time(s)', 'Normalized(ns)', 'threads']
+VERSION_LABELS = {'Cpp': 'C++', 'Java': 'Java', 'Python': 'Py'}
+SHEET_LANGUAGES = {'Cpp': 'Cpp', 'Java': 'Java', 'Python': 'python'}
+SHEET_ORDER = [(t, lang, v) for t in ['float', 'double'] for lang in ['Cpp', 'Java', 'Python'] for v in 'abcdefgh']
+
+
+def parse_run(spec):
+    """'path#0-9,12' -> (path, [(0, 9), (12, 12)]); no '#' keeps every sample"""
+    path, _, samples = spec.rpartition('#') if '#' in spec else (spec, '', '')
+    ranges = []
+    for part in filter(None, samples.split(',')):
+        low, _, high = part.partition('-')
+        ranges.append((int(low), int(high or low)))
+    return path, ranges
+
+
+def read_run(path, processor):
+    """Store-schema chunks of one run"""
+    if os.path.isdir(path):
+        return results_store.iter_partitions(path)
+    return results_store.read_source(path, results_store.infer_processor(path, processor))
+
+
+def sample_mask(samples, ranges):
+    mask = np.zeros(len(samples), dtype=bool)
+    for low, high in ranges:
+        mask |= (samples >= low) & (samples <= high)
+    return mask
+
+
+class Renumberer:
+    """Renumbers and deduplicates samples per cell, run after run"""
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.base = {}     # cell -> first free sample for the current run (offset rule)
+        self.top = {}      # cell -> highest sample + 1 kept so far
+        self.counter = {}  # cell -> next sample in arrival order
+        self.seen = {}     # cell -> boolean array of samples already written
+        self.arrival = {}  # cell -> rows without a sample number read in the current run
+
+    def next_run(self):
+        self.base = dict(self.top)
+        self.arrival = {}
+
+    def _mark_new(self, cell, samples):
+        """Mask of samples not written before (first occurrence within the chunk too)"""
+        keep = np.zeros(len(samples), dtype=bool)
+        keep[np.unique(samples, return_index=True)[1]] = True
+        seen = self.seen.get(cell, np.zeros(0, dtype=bool))
+        if len(samples) and samples.max() >= len(seen):
+            size = max(int(samples.max()) + 1, 2 * len(seen))
+            seen = np.concatenate([seen, np.zeros(size - len(seen), dtype=bool)])
+        keep &= ~seen[samples]
+        seen[samples[keep]] = True
+        self.seen[cell] = seen
+        return keep
+
+    def apply(self, chunk):
+        """Chunk with renumbered samples and without duplicates"""
+        parts = []
+        for cell, group in chunk.groupby(CELL, observed=True, sort=False):
+            samples = group['sample'].to_numpy(dtype=np.int64)
+            # Rows without a sample number get one in the order they were read
+            missing = samples < 0
+            start = self.arrival.get(cell, 0)
+            if missing.any():
+                samples = samples.copy()
+                samples[missing] = start + np.arange(missing.sum())
+            self.arrival[cell] = start + int(missing.sum())
+            if self.rule == 'offset':
+                samples = samples + self.base.get(cell, 0)
+            elif self.rule == 'sequential':
+                first = self.counter.get(cell, 0)
+                samples = first + np.arange(len(samples))
+                self.counter[cell] = first + len(samples)
+            keep = self._mark_new(cell, samples)
+            if keep.any():
+                group = group[keep].copy()
+                group['sample'] = samples[keep]
+                self.top[cell] = max(self.top.get(cell, 0), int(samples[keep].max()) + 1)
+                parts.append(group)
+        return pd.concat(parts, ignore_index=True) if parts else chunk.iloc[:0]
+
+
+def output_rows(chunk):
+    """Chunk in the benchmark programs' column layout"""
+    labels = chunk['language'].astype(str).map(VERSION_LABELS).fillna(chunk['language'].astype(str))
+    return pd.DataFrame({
+        'ver': labels + '_ver(' + chunk['version'].astype(str).str.upper() + ')',
+        'typeData': chunk['data_type'].astype(str),
+        'ISA': chunk['isa'].astype(str),
+        '#sample': chunk['sample'].astype(np.int64),
+        'n': chunk['n'].astype(np.int64),
+        'time(s)': chunk['time_s'],
+        'Normalized(ns)': chunk['normalized_ns'],
+        'threads': chunk['threads'].astype(np.int64),
+    })
+
+
+class TsvWriter:
+    """Benchmark TSV log, appended chunk by chunk"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.file.write('\t'.join(HEADER) + '\n')
+
+    def write(self, chunk):
+        output_rows(chunk).to_csv(self.file, sep='\t', header=False, index=False, lineterminator='\n')
+
+    def close(self):
+        self.file.close()
+
+
+class StoreWriter:
+    """Results store directory, one part file per chunk and partition"""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        if not append and os.path.isdir(path):
+            shutil.rmtree(path)
+
+    def write(self, chunk):
+        results_store.write_store(results_store.as_schema(chunk), self.path, append=True)
+
+    def close(self):
+        pass
+
+
+class WorkbookWriter:
+    """Workbook with one sheet per language, dtype and version, like the original files.
+    Chunks are spilled to one temporary file per sheet; at the end each sheet is sorted by
+    (n, sample) and streamed into a write-only workbook, one sheet in memory at a time"""
+
+    def __init__(self, path):
+        self.path = path
+        self.spill_dir = tempfile.mkdtemp(prefix='blend_')
+        self.sheets = {}
+        self.processors = set()
+
+    def write(self, chunk):
+        self.processors.update(chunk['processor'].astype(str).unique())
+        for (dtype, language, version), group in chunk.groupby(['data_type', 'language', 'version'],
+                                                                 observed=True, sort=False):
+            key = (str(dtype), str(language), str(version))
+            if key not in self.sheets:
+                self.sheets[key] = os.path.join(self.spill_dir, f"{len(self.sheets)}.tsv")
+            output_rows(group).to_csv(self.sheets[key], sep='\t', header=False, index=False, mode='a')
+
+    def close(self):
+        if len(self.processors) > 1:
+            print(f"Warning: rows of several processors ({', '.join(sorted(self.processors))}) share the sheets")
+        order = {key: i for i, key in enumerate(SHEET_ORDER)}
+        try:
+            workbook = Workbook(write_only=True)
+            for key in sorted(self.sheets, key=lambda key: (order.get(key, len(order)), key)):
+                dtype, language, version = key
+                name = f"{SHEET_LANGUAGES.get(language, language)} - {dtype} - ver({version})"
+                df = pd.read_csv(self.sheets[key], sep='\t', header=None, names=HEADER)
+                df = df.sort_values(['n', '#sample'], kind='stable')
+                sheet = workbook.create_sheet(name[:31])
+                sheet.append(HEADER)
+                for row in df.itertuples(index=False):
+                    sheet.append([value.item() if hasattr(value, 'item') else value for value in row])
+                print(f"Writing sheet: {name} ({len(df)} rows)")
+            workbook.save(self.path)
+        finally:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+def open_writer(path, append=False):
+    if path.lower().endswith('.xlsx'):
+        return WorkbookWriter(path)
+    if path.lower().endswith(('.tsv', '.txt')):
+        return TsvWriter(path)
+    return StoreWriter(path, append)
+
+
+def blend(runs, output, rule='offset', processor='unknown', append=False):
+    """Merge the runs into output; returns the number of rows written"""
+    renumber = Renumberer(rule)
+    writer = open_writer(output, append)
+    total = 0
+    try:
+        for spec in runs:
+            path, ranges = parse_run(spec)
+            renumber.next_run()
+            rows = 0
+            for chunk in read_run(path, processor):
+                if ranges:
+                    chunk = chunk[sample_mask(chunk['sample'].to_numpy(), ranges)]
+                chunk = renumber.apply(chunk)
+                if not chunk.empty:
+                    writer.write(chunk)
+                    rows += len(chunk)
+            print(f"{path}: {rows} rows{' (samples ' + spec.rpartition('#')[2] + ')' if ranges else ''}")
+            total += rows
+    finally:
+        writer.close()
+    print(f"Wrote {total} rows to {output}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge benchmark runs, renumbering and deduplicating samples")
+    parser.add_argument('runs', nargs='*', default=DEFAULT_RUNS,
+                        help="Workbooks, TSV logs or store directories, each optionally with #samples "
+                             "to keep, e.g. 'run.xlsx#0-9'")
+    parser.add_argument('-o', '--output', default=DEFAULT_OUTPUT,
+                        help="Output .xlsx, .tsv/.txt, or a directory for a results store")
+    parser.add_argument('--rule', choices=RULES, default='offset', help="How samples are renumbered")
+    parser.add_argument('--processor', default='unknown',
+                        help="Processor for runs whose name does not identify it")
+    parser.add_argument('--append', action='store_true', help="Add to an existing store instead of replacing it")
+    args = parser.parse_args()
+
+    blend(args.runs, args.output, args.rule, args.processor, args.append)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+# Bootstrap confidence intervals for per-cell medians and for ratios of medians between
+# two levels of a factor (e.g. the R5/R9 speedup of every version). The values are sorted
+# by cell and, inside a cell, by value, so a resample of every cell at once is one row of
+# random positions, each drawn inside its own cell's slice. Sorting that index matrix row
+# by row keeps each cell in its slice and puts its draws in value order, so the resampled
+# medians of all cells are read off at fixed columns: no Python loop over cells or
+# resamples. Resamples are drawn in batches to bound the size of the index matrix.
+
+RESAMPLES = 2000
+CONFIDENCE = 0.95
+BATCH_CELLS = 4000000  # positions per index matrix batch (int64: 32 MB)
+
+
+class BootstrapMedians:
+    """Bootstrap distribution of the median of value in every cell of the factors"""
+
+    def __init__(self, df, factors, value='Normalized_ns', resamples=RESAMPLES, seed=0):
+        self.factors = list(factors)
+        df = df.dropna(subset=self.factors + [value])
+        df = df.sort_values(self.factors + [value], kind='stable')
+        values = df[value].to_numpy(dtype=float)
+        sizes = df.groupby(self.factors, observed=True, sort=True).size()
+        self.index = sizes.index
+        sizes = sizes.to_numpy()
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        low = starts + (sizes - 1) // 2   # the median is the mean of these two order statistics
+        high = starts + sizes // 2
+        self.medians = (values[low] + values[high]) / 2
+
+        # Cell slice of every position of a resample row
+        row_start = np.repeat(starts, sizes)
+        row_size = np.repeat(sizes, sizes)
+        rng = np.random.default_rng(seed)
+        batch = max(1, BATCH_CELLS // max(len(values), 1))
+        samples = []
+        for first in range(0, resamples, batch):
+            count = min(batch, resamples - first)
+            positions = row_start + (rng.random((count, len(values))) * row_size).astype(np.int64)
+            positions.sort(axis=1)
+            samples.append((values[positions[:, low]] + values[positions[:, high]]) / 2)
+        self.samples = np.vstack(samples) if samples else np.empty((0, len(self.medians)))
+
+    def table(self, confidence=CONFIDENCE):
+        """Median and percentile CI of every cell"""
+        low, high = percentile_ci(self.samples, confidence)
+        return pd.DataFrame({'median': self.medians, 'ci_low': low, 'ci_high': high}, index=self.index)
+
+    def ratio(self, factor, numerator, denominator, confidence=CONFIDENCE):
+        """Ratio of the medians of two levels of factor, with its percentile CI, for every
+        combination of the other factors where both levels are present"""
+        cells = self.index.to_frame(index=False)
+        others = [f for f in self.factors if f != factor]
+
+        def columns(level):
+            mask = (cells[factor] == level).to_numpy()
+            return pd.Series(np.flatnonzero(mask), index=pd.MultiIndex.from_frame(cells.loc[mask, others]))
+
+        top, bottom = columns(numerator), columns(denominator)
+        common = top.index.intersection(bottom.index, sort=False)
+        top, bottom = top[common].to_numpy(), bottom[common].to_numpy()
+        ratios = self.samples[:, top] / self.samples[:, bottom]
+        low, high = percentile_ci(ratios, confidence)
+        return pd.DataFrame({'ratio': self.medians[top] / self.medians[bottom], 'ci_low': low, 'ci_high': high},
+                            index=common)
+
+
+def percentile_ci(samples, confidence=CONFIDENCE):
+    """Percentile interval of each column of a resamples × cells matrix"""
+    if len(samples) == 0:
+        nan = np.full(samples.shape[1], np.nan)
+        return nan, nan
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(samples, [tail, 100 - tail], axis=0)
+    return low, high
@@ -0,0 +1,131 @@
+import argparse
+import ctypes
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import perf_counters
+
+# In-process driver for the C kernels. matrixProduct_Six_versions_float.c/double.c are
+# built as shared libraries (-DMATMUL_LIBRARY leaves out main) and ProductMat_a..h are
+# called through ctypes on NumPy buffers allocated once, so neither process creation nor
+# page-faulting fresh matrices lands in a sample. Times come from perf_counter_ns.
+
+SOURCES = {'float': 'matrixProduct_Six_versions_float.c', 'double': 'matrixProduct_Six_versions_double.c'}
+DTYPES = {'float': np.float32, 'double': np.float64}
+VERSIONS = 'ABCDEFGH'
+
+
+def library_path(dtype_name, lib_dir):
+    """Platform-specific file name of the shared library for one data type"""
+    if os.name == 'nt':
+        suffix = '.dll'
+    elif sys.platform == 'darwin':
+        suffix = '.dylib'
+    else:
+        suffix = '.so'
+    return os.path.join(lib_dir, f"libmatmul_{dtype_name}{suffix}")
+
+
+def build_library(dtype_name, lib_dir, compiler='gcc', openmp=True):
+    """Compile one of the C sources as a shared library, unless it is already up to date"""
+    source = os.path.join(os.path.dirname(os.path.abspath(__file__)), SOURCES[dtype_name])
+    path = library_path(dtype_name, lib_dir)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source):
+        return path
+    os.makedirs(lib_dir, exist_ok=True)
+    command = [compiler, '-O2', '-shared', '-fPIC', '-DMATMUL_LIBRARY', '-o', path, source]
+    if openmp:
+        command.insert(2, '-fopenmp')
+    subprocess.run(command, check=True)
+    return path
+
+
+def allocate_matrices(size, dtype_name):
+    """A, B and C for matrices up to size x size, initialized like the C main"""
+    count = size * size
+    A = np.full(count, 2.0, dtype=DTYPES[dtype_name])
+    B = np.full(count, 4.0, dtype=DTYPES[dtype_name])
+    C = np.zeros(count, dtype=DTYPES[dtype_name])
+    return A, B, C
+
+
+class CKernels:
+    """ProductMat_a..h from one shared library, callable on NumPy buffers"""
+
+    def __init__(self, dtype_name, path, threads=1, tile=32):
+        self.dtype_name = dtype_name
+        self.path = path
+        self.lib = ctypes.CDLL(path)
+        self.kernels = {}
+        for ver in VERSIONS:
+            kernel = getattr(self.lib, f"ProductMat_{ver.lower()}")
+            kernel.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p]
+            kernel.restype = None
+            self.kernels[ver] = kernel
+        # Same globals that -p and -t set in the executable
+        ctypes.c_int.in_dll(self.lib, 'numThreads').value = max(threads, 1)
+        ctypes.c_int.in_dll(self.lib, 'tileSize').value = tile
+
+    def time_sample(self, ver, n, A, B, C, counters=None):
+        """Run one sample on preallocated buffers and return the elapsed seconds; with
+        counters (a perf_counters.Counters) the hardware counters wrap the same call"""
+        if A.dtype != DTYPES[self.dtype_name] or A.size < n * n:
+            raise ValueError(f"buffers must hold at least {n}x{n} {self.dtype_name} values")
+        kernel = self.kernels[ver.upper()]
+        a, b, c = A.ctypes.data, B.ctypes.data, C.ctypes.data
+        C[:n * n] = 0
+        if counters is not None:
+            counters.start()
+        start = time.perf_counter_ns()
+        kernel(n, a, b, c)
+        end = time.perf_counter_ns()
+        if counters is not None:
+            counters.stop()
+        return (end - start) / 1.0e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the C kernels in-process through ctypes")
+    parser.add_argument('n', type=int, help="Matrix size")
+    parser.add_argument('samples', type=int, help="Samples per version")
+    parser.add_argument('--dtypes', default='float,double')
+    parser.add_argument('--versions', default=VERSIONS, help="Versions to run, e.g. ABC or GH")
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--tile', type=int, default=32)
+    parser.add_argument('--lib-dir', default='cpp_build', help="Directory for the shared libraries")
+    parser.add_argument('--compiler', default='gcc')
+    parser.add_argument('--counters', action='store_true',
+                        help="Add cycles, instructions and L1d/LLC/dTLB miss columns (Linux perf_event)")
+    args = parser.parse_args()
+
+    header = "ver\ttypeData\tISA\t#sample\tn\ttime(s)\tNormalized(ns)\tthreads"
+    counters = None
+    if args.counters:
+        header += "\t" + "\t".join(perf_counters.COUNTER_NAMES)
+        counters = perf_counters.Counters()
+        for name, error in counters.errors.items():
+            print(f"Warning: counter {name} unavailable ({error}), writing NA", file=sys.stderr)
+        if args.threads > 1:
+            print("Warning: with --threads > 1 the counters only cover the calling thread", file=sys.stderr)
+    print(header, flush=True)
+    for dtype_name in [name.strip() for name in args.dtypes.split(',') if name.strip()]:
+        path = build_library(dtype_name, args.lib_dir, args.compiler)
+        kernels = CKernels(dtype_name, path, args.threads, args.tile)
+        A, B, C = allocate_matrices(args.n, dtype_name)
+        for ver in args.versions.upper():
+            for s in range(args.samples):
+                seconds = kernels.time_sample(ver, args.n, A, B, C, counters)
+                normalized = (seconds * 1.0e9) / (args.n ** 3)
+                row = (f"C++_ver({ver})\t{dtype_name}\tx64\t{s:05d}\t{args.n:05d}\t{seconds:.4f}\t"
+                       f"{normalized:.4f}\t{args.threads}")
+                if counters is not None:
+                    row += "\t" + perf_counters.format_counts(counters.read())
+                print(row, flush=True)
+
+
+if __name__ == "__main__":
+    main()
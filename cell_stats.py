@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Per-cell sufficient statistics for the analysis scripts. The data is ranked once and
+# every cell of the factors gets its count, sum, sum of squares and rank sum from one
+# groupby. One-way ANOVA (F, eta²) and Kruskal-Wallis (H, epsilon²) for any factor, or for
+# any coarser grouping of the cells, are then derived from the cell table alone, so their
+# cost depends on the number of cells and not on the number of rows. Values are centred on
+# the grand mean before summing so the sums of squares do not lose precision.
+
+FACTORS = ['processor', 'version', 'data_type']
+
+
+class CellStats:
+    """Count, sum, sum of squares and rank sum of a value in every cell of the factors"""
+
+    def __init__(self, df, factors=FACTORS, value='Normalized_ns'):
+        self.factors = list(factors)
+        values = df[value].to_numpy(dtype=float)
+        self.n = len(values)
+        self.grand_mean = values.mean() if self.n else np.nan
+        centred = values - self.grand_mean
+        # Tie terms of Kruskal-Wallis and Dunn's test, from the sizes of the groups of tied values
+        _, ties = np.unique(values, return_counts=True)
+        ties = ties.astype(float)
+        self.tie_sum = (ties ** 3 - ties).sum()
+        self.tie_correction = 1 - self.tie_sum / (self.n ** 3 - self.n) if self.n > 1 else 1.0
+        frame = df[self.factors].assign(_sum=centred, _sumsq=centred ** 2, _ranks=stats.rankdata(values))
+        self.table = frame.groupby(self.factors, observed=True).agg(
+            count=('_sum', 'size'), sum=('_sum', 'sum'), sumsq=('_sumsq', 'sum'), rank_sum=('_ranks', 'sum'))
+
+    def cells(self, factors=None):
+        """Cell table collapsed to some of the factors (all of them by default)"""
+        factors = self.factors if factors is None else [factors] if isinstance(factors, str) else list(factors)
+        if factors == self.factors:
+            return self.table
+        return self.table.groupby(level=factors, observed=True).sum()
+
+    def means(self, factors=None):
+        cells = self.cells(factors)
+        return cells['sum'] / cells['count'] + self.grand_mean
+
+    def one_way(self, factors):
+        """One-way ANOVA and Kruskal-Wallis of the value across the levels of factors"""
+        cells = self.cells(factors)
+        count = cells['count'].to_numpy(dtype=float)
+        sums, sumsq, rank_sum = (cells[c].to_numpy() for c in ('sum', 'sumsq', 'rank_sum'))
+        k, n = len(cells), self.n
+        correction = sums.sum() ** 2 / n
+        ss_total = sumsq.sum() - correction
+        ss_between = (sums ** 2 / count).sum() - correction
+        ss_within = ss_total - ss_between
+        df_between, df_within = k - 1, n - k
+        f_stat = (ss_between / df_between) / (ss_within / df_within) if ss_within > 0 else np.inf
+        h_stat = (12 / (n * (n + 1)) * (rank_sum ** 2 / count).sum() - 3 * (n + 1)) / self.tie_correction
+        return {
+            'levels': k,
+            'F': f_stat,
+            'p_anova': stats.f.sf(f_stat, df_between, df_within),
+            'eta_squared': ss_between / ss_total,
+            'H': h_stat,
+            'p_kruskal': stats.chi2.sf(h_stat, df_between),
+            'epsilon_squared': (h_stat - df_between) / (n - k),
+        }
+
+
+def levene(df, factors=FACTORS, value='Normalized_ns'):
+    """Levene's test centred on the cell medians (scipy's default), as the one-way ANOVA
+    of the absolute deviations computed through CellStats"""
+    medians = df.groupby(factors, observed=True)[value].transform('median')
+    deviations = df[factors].assign(deviation=(df[value] - medians).abs())
+    result = CellStats(deviations, factors, 'deviation').one_way(factors)
+    return result['F'], result['p_anova']
+
+
+def shapiro_by_cell(df, factors=FACTORS, value='Normalized_ns'):
+    """Shapiro-Wilk W and p of every cell; the values are sorted into cells once and each
+    cell is a slice of one array (cells with fewer than 3 values get NaN)"""
+    codes = df.groupby(factors, observed=True).ngroup().to_numpy()
+    order = np.argsort(codes, kind='stable')
+    values = df[value].to_numpy(dtype=float)[order]
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    index = df.groupby(factors, observed=True).size().index
+    rows = []
+    for cell in np.split(values, bounds) if len(values) else []:
+        rows.append(stats.shapiro(cell) if len(cell) >= 3 else (np.nan, np.nan))
+    return pd.DataFrame(rows, index=index, columns=['W', 'p'])
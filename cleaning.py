@@ -0,0 +1,101 @@
+import pandas as pd
+
+# Cleaning stage shared by the analysis scripts. Rows are flagged, not deleted: a
+# 'warmup' flag for the first k samples of every cell (the JIT/cache warm-up spikes of
+# sample 0) and an 'outlier' flag from a per-cell robust rule computed with groupby
+# transforms over the remaining rows, then 'keep' for rows that pass both. The scripts
+# analyse the kept rows and print how many rows each rule removed in every cell. No rule
+# is applied unless one is asked for (--outliers, --warmup), so by default every row is kept.
+#
+# Rules (threshold in brackets):
+#   mad    |x - median| / (1.4826 * MAD) > [3.5]   (mean absolute deviation if MAD is 0)
+#   iqr    outside [Q1 - k * IQR, Q3 + k * IQR]     [1.5]
+#   sigma  |x - mean| > k * std                     [3.0]
+#   none   no outlier flags
+
+METHODS = {'mad': 3.5, 'iqr': 1.5, 'sigma': 3.0, 'none': None}
+SAMPLE_COLUMNS = ['sample', '#sample']
+FLAGS = ['warmup', 'outlier', 'keep']
+
+
+def _outliers(values, keys, method, threshold):
+    """Boolean outlier flags of values (NaN for rows left out) within the groups of keys"""
+    groups = values.groupby(keys, observed=True)
+    if method == 'mad':
+        median = groups.transform('median')
+        deviation = (values - median).abs()
+        by_cell = deviation.groupby(keys, observed=True)
+        scale = 1.4826 * by_cell.transform('median')
+        scale = scale.where(scale > 0, 1.2533 * by_cell.transform('mean'))
+        return (deviation / scale > threshold) & (scale > 0)
+    if method == 'iqr':
+        q1, q3 = groups.transform('quantile', 0.25), groups.transform('quantile', 0.75)
+        spread = threshold * (q3 - q1)
+        return (values < q1 - spread) | (values > q3 + spread)
+    if method == 'sigma':
+        mean, std = groups.transform('mean'), groups.transform('std', ddof=0)
+        return (values - mean).abs() > threshold * std
+    return pd.Series(False, index=values.index)
+
+
+def flag(df, cells, value='Normalized_ns', method='none', threshold=None, warmup=0, sample=None):
+    """Copy of df with boolean warmup, outlier and keep columns. Warm-up rows are the
+    first `warmup` samples of each cell, by the sample column (found among SAMPLE_COLUMNS
+    when not given) or by row order; outlier statistics leave them out"""
+    if method not in METHODS:
+        raise ValueError(f"Unknown outlier rule {method!r} (choose from {', '.join(METHODS)})")
+    threshold = METHODS[method] if threshold is None else threshold
+    df = df.copy()
+    cells = [cell for cell in cells if cell in df.columns]
+    keys = [df[cell] for cell in cells]
+
+    if warmup:
+        sample = sample or next((column for column in SAMPLE_COLUMNS if column in df.columns), None)
+        if sample:
+            order = pd.to_numeric(df[sample], errors='coerce').where(lambda s: s >= 0)
+        else:
+            order = df.groupby(cells, observed=True).cumcount()
+        df['warmup'] = (order < warmup).to_numpy()
+    else:
+        df['warmup'] = False
+
+    values = pd.to_numeric(df[value], errors='coerce').where(~df['warmup'])
+    df['outlier'] = _outliers(values, keys, method, threshold).fillna(False).astype(bool) & ~df['warmup']
+    df['keep'] = ~(df['warmup'] | df['outlier'])
+    return df
+
+
+def report(flagged, cells):
+    """Rows, warm-up and outlier flags and kept rows of every cell"""
+    cells = [cell for cell in cells if cell in flagged.columns]
+    return flagged.groupby(cells, observed=True).agg(rows=('keep', 'size'), warmup=('warmup', 'sum'),
+                                                     outlier=('outlier', 'sum'), kept=('keep', 'sum'))
+
+
+def clean(df, cells, value='Normalized_ns', method='none', threshold=None, warmup=0, sample=None, label=''):
+    """Kept rows of df (without the flag columns), after printing what each rule removed"""
+    flagged = flag(df, cells, value, method, threshold, warmup, sample)
+    counts = report(flagged, cells)
+    removed = counts[(counts['warmup'] > 0) | (counts['outlier'] > 0)]
+    print(f"\nCleaning{' ' + label if label else ''} (outliers: {method}, warm-up samples: {warmup}): "
+          f"{int(counts['warmup'].sum())} warm-up and {int(counts['outlier'].sum())} outlier rows "
+          f"removed of {len(flagged)}")
+    if not removed.empty:
+        print(removed.to_string())
+    return flagged[flagged['keep']].drop(columns=FLAGS)
+
+
+def add_arguments(parser):
+    """--outliers and --warmup options of the analysis scripts"""
+    parser.add_argument('--outliers', choices=list(METHODS), default='none',
+                        help="Per-cell outlier rule applied before the analysis (default: %(default)s, "
+                             "no rows dropped)")
+    parser.add_argument('--outlier-threshold', type=float,
+                        help="Threshold of the outlier rule (default: " +
+                             ", ".join(f"{m} {t}" for m, t in METHODS.items() if t) + ")")
+    parser.add_argument('--warmup', type=int, default=0, help="Drop the first K samples of every cell")
+
+
+def options(args):
+    """clean() keyword arguments from the parsed add_arguments options"""
+    return {'method': args.outliers, 'threshold': args.outlier_threshold, 'warmup': args.warmup}
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+# Shared fixtures of the tests in tests/. Living at the root of the repository, this file
+# also puts the root on sys.path, so the tests import the flat modules as the scripts do.
+
+
+@pytest.fixture
+def benchmark_frame():
+    """Unbalanced processor × version × data_type samples of Normalized_ns, with ties"""
+    rng = np.random.default_rng(7)
+    rows = []
+    for p, processor in enumerate(['Ryzen 5', 'Ryzen 9']):
+        for v, version in enumerate('abcd'):
+            for t, data_type in enumerate(['float', 'double']):
+                size = 6 + 3 * v + 2 * t + p
+                values = 1 + 0.4 * v + 0.2 * t + 0.3 * p + 0.1 * v * t + rng.gamma(2.0, 0.15, size)
+                for value in np.round(values, 2):  # rounding leaves tied values
+                    rows.append((processor, version, data_type, value))
+    return pd.DataFrame(rows, columns=['processor', 'version', 'data_type', 'Normalized_ns'])
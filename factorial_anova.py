@@ -0,0 +1,139 @@
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import cell_stats
+import results_store
+
+# N-way ANOVA from cell means and counts. A model whose terms are made of the factors is
+# constant within every cell of those factors, so its residual sum of squares is the
+# pure within-cell error plus the count-weighted squared error of its fit to the cell
+# means. Every model therefore fits on a design with one row per non-empty cell instead of
+# one row per sample: a four-factor model with all its interactions over tens of thousands
+# of rows is a least-squares problem of a few hundred rows. Type I, II and III sums of
+# squares are differences of those residual sums, as in statsmodels' anova_lm, and the
+# table has the same layout (rows 'C(a)', 'C(a):C(b)', ..., 'Residual').
+#
+#   python factorial_anova.py --factors version n data_type language --typ 3
+
+DEFAULT_FACTORS = ['version', 'n']
+
+
+def term_name(term):
+    return ':'.join(f"C({factor})" for factor in term)
+
+
+def all_terms(factors, max_order=None):
+    """Main effects and every interaction up to max_order factors, lower orders first"""
+    max_order = max_order or len(factors)
+    return [term for order in range(1, max_order + 1) for term in itertools.combinations(factors, order)]
+
+
+def _contrasts(levels, coding):
+    """Contrast matrix (levels × levels-1): 'treatment' drops the first level, 'sum' codes
+    the last one as -1 in every column"""
+    if coding == 'sum':
+        return np.vstack([np.eye(levels - 1), -np.ones((1, levels - 1))])
+    return np.eye(levels)[:, 1:]
+
+
+class CellModel:
+    """Weighted least squares of the cell means on any set of factor terms"""
+
+    def __init__(self, df, factors, value='Normalized_ns'):
+        self.factors = list(factors)
+        # Rows missing the value or a factor are left out, as the formula API does
+        df = df.dropna(subset=self.factors + [value])
+        table = cell_stats.CellStats(df, self.factors, value).table
+        self.n = int(table['count'].sum())
+        self.cells = len(table)
+        count = table['count'].to_numpy(dtype=float)
+        self.means = table['sum'].to_numpy() / count
+        self.weights = np.sqrt(count)
+        self.ss_within = float((table['sumsq'] - table['sum'] ** 2 / table['count']).sum())
+        index = table.index.to_frame(index=False)
+        self.codes = {factor: pd.factorize(index[factor], sort=True)[0] for factor in self.factors}
+        self.levels = {factor: int(self.codes[factor].max()) + 1 for factor in self.factors}
+
+    def design(self, terms, coding='treatment'):
+        """Cell design matrix: an intercept plus the columns of every term"""
+        columns = [np.ones((self.cells, 1))]
+        for term in terms:
+            block = np.ones((self.cells, 1))
+            for factor in term:
+                coded = _contrasts(self.levels[factor], coding)[self.codes[factor]]
+                block = (block[:, :, None] * coded[:, None, :]).reshape(self.cells, -1)
+            columns.append(block)
+        return np.hstack(columns)
+
+    def fit(self, terms, coding='treatment'):
+        """(residual sum of squares, rank) of the model with these terms"""
+        x = self.design(terms, coding) * self.weights[:, None]
+        y = self.means * self.weights
+        coef, _, rank, _ = np.linalg.lstsq(x, y, rcond=None)
+        return self.ss_within + float(((y - x @ coef) ** 2).sum()), int(rank)
+
+
+def contains(term, other):
+    return set(other) <= set(term)
+
+
+def anova_table(df, factors=DEFAULT_FACTORS, value='Normalized_ns', typ=2, terms=None, max_order=None):
+    """ANOVA table of value against the factors (all interactions by default), laid out
+    like statsmodels' anova_lm: sum_sq, df, F and PR(>F) per term plus the residual"""
+    factors = list(factors)
+    terms = [tuple(term) for term in terms] if terms else all_terms(factors, max_order)
+    model = CellModel(df, factors, value)
+    coding = 'sum' if typ == 3 else 'treatment'
+    rss_full, rank_full = model.fit(terms, coding)
+    df_resid = model.n - rank_full
+
+    rows = {}
+    for i, term in enumerate(terms):
+        if typ == 1:
+            reduced, extended = terms[:i], terms[:i + 1]
+        elif typ == 2:
+            reduced = [t for t in terms if not contains(t, term)]
+            extended = reduced + [term]
+        else:
+            reduced = [t for t in terms if t != term]
+            extended = terms
+        rss_reduced, rank_reduced = model.fit(reduced, coding)
+        rss_extended, rank_extended = (rss_full, rank_full) if extended is terms else model.fit(extended, coding)
+        rows[term_name(term)] = (max(rss_reduced - rss_extended, 0.0), rank_extended - rank_reduced)
+
+    table = pd.DataFrame.from_dict(rows, orient='index', columns=['sum_sq', 'df'])
+    mse = rss_full / df_resid if df_resid > 0 else np.nan
+    table['F'] = (table['sum_sq'] / table['df'].replace(0, np.nan)) / mse
+    table['PR(>F)'] = stats.f.sf(table['F'], table['df'], df_resid)
+    table.loc['Residual'] = [rss_full, df_resid, np.nan, np.nan]
+    table['df'] = table['df'].astype(float)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="N-way ANOVA of the results store from cell means")
+    parser.add_argument('--factors', nargs='+', default=DEFAULT_FACTORS,
+                        help="Store columns used as factors (e.g. version n data_type language)")
+    parser.add_argument('--typ', type=int, choices=[1, 2, 3], default=2, help="Type of sums of squares")
+    parser.add_argument('--max-order', type=int, help="Highest interaction order (default: all)")
+    parser.add_argument('--store', default=results_store.DEFAULT_STORE)
+    parser.add_argument('--processor', nargs='*', help="Only these processors")
+    parser.add_argument('--language', nargs='*', help="Only these languages")
+    args = parser.parse_args()
+
+    filters = {key: value for key, value in (('processor', args.processor), ('language', args.language)) if value}
+    df = results_store.load_results(args.store, columns=list(dict.fromkeys(args.factors + ['normalized_ns'])),
+                                    **filters)
+    if df.empty:
+        print(f"No results in {args.store} (run python results_store.py first)")
+        return
+    print(f"{len(df)} rows, {df.groupby(args.factors, observed=True).ngroups} cells")
+    print(anova_table(df, args.factors, 'normalized_ns', args.typ, max_order=args.max_order))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import argparse
+import codecs
+import io
+import itertools
+import re
+
+import pandas as pd
+
+import perf_counters
+
+# Streaming reader for the benchmark TSV logs: the results/*.txt files PowerShell wrote as
+# UTF-16 with a BOM, the raw javaresults_*.txt logs with decimal commas, results_python.txt
+# with decimal points, and console transcripts with the rows mixed into other output.
+# The format is sniffed from the first lines, then the file is parsed by pandas' C reader
+# in chunks of typed columns, so memory use depends on the chunk size, not the file size.
+# Columns are named from the log's header when it has one, so the warm-up flag of the Java
+# batch mode and the hardware counters are kept; warm-up rows are never returned.
+
+CHUNK_ROWS = 200000
+SNIFF_LINES = 200
+
+COLUMNS = ['version', 'data_type', 'isa', 'sample', 'n', 'time_s', 'normalized_ns', 'threads',
+           'warmup'] + perf_counters.COUNTER_NAMES
+POSITIONAL_COLUMNS = 8  # columns of a log without a header, in the order of COLUMNS
+DTYPES = {'version': 'category', 'data_type': 'category', 'isa': 'category', 'sample': 'float64',
+          'n': 'float64', 'time_s': 'float64', 'normalized_ns': 'float64', 'threads': 'float64',
+          'warmup': 'float64', **{name: 'float64' for name in perf_counters.COUNTER_NAMES}}
+# Header fields of the benchmark programs, lower-cased, mapped to COLUMNS
+HEADER_NAMES = {'ver': 'version', 'typedata': 'data_type', 'isa': 'isa', '#sample': 'sample', 'n': 'n',
+                'time(s)': 'time_s', 'normalized(ns)': 'normalized_ns', 'threads': 'threads',
+                'warmup': 'warmup', **{name.lower(): name for name in perf_counters.COUNTER_NAMES}}
+
+VERSION_CELL = r'(?:C\+\+|Cpp|Py|Java)_?ver\(?[A-Ha-h]\)?'
+ROW = re.compile(rf'^\s*{VERSION_CELL}\s', re.IGNORECASE)
+HEADER = re.compile(r'^\s*ver\s', re.IGNORECASE)
+
+
+class LogFormat:
+    """How a log is encoded and laid out"""
+
+    def __init__(self, encoding, delimiter, decimal, names, skip, clean):
+        self.encoding = encoding
+        self.delimiter = delimiter  # '\t' or r'\s+'
+        self.decimal = decimal
+        self.names = names          # name of every field of a row (None: a field not in COLUMNS)
+        self.skip = skip            # lines before the first row (header)
+        self.clean = clean          # only rows after those lines: parse without filtering
+
+    @property
+    def columns(self):
+        """Names of the fields that are read"""
+        return [name for name in self.names if name]
+
+    def __repr__(self):
+        return (f"LogFormat(encoding={self.encoding!r}, delimiter={self.delimiter!r}, "
+                f"decimal={self.decimal!r}, columns={self.columns}, skip={self.skip}, clean={self.clean})")
+
+
+def detect_encoding(head):
+    """Encoding from the BOM, or UTF-16 without one when every other byte is zero"""
+    if head.startswith(codecs.BOM_UTF16_LE) or head.startswith(codecs.BOM_UTF16_BE):
+        return 'utf-16'
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if len(head) >= 4 and head[1::2].count(0) > len(head) // 4:
+        return 'utf-16-le'
+    if len(head) >= 4 and head[0::2].count(0) > len(head) // 4:
+        return 'utf-16-be'
+    return 'utf-8'
+
+
+def sniff(path):
+    """LogFormat of a log, from its BOM and first lines"""
+    with open(path, 'rb') as f:
+        encoding = detect_encoding(f.read(4096))
+    with open(path, encoding=encoding, errors='replace') as f:
+        lines = list(itertools.islice(f, SNIFF_LINES))
+    skip = next((i for i, line in enumerate(lines) if ROW.match(line)), len(lines))
+    rows = [line for line in lines[skip:] if ROW.match(line)]
+    delimiter = '\t' if all('\t' in line for line in rows) else r'\s+'
+    fields = [re.split(r'\t' if delimiter == '\t' else r'\s+', line.strip()) for line in rows]
+    numbers = [value for row in fields for value in row[5:7]]
+    decimal = ',' if any(',' in value for value in numbers) and not any('.' in value for value in numbers) else '.'
+    header = next((line for line in reversed(lines[:skip]) if HEADER.match(line)), None)
+    if header:
+        names = [HEADER_NAMES.get(field.lower()) for field in header.split()]
+    else:
+        names = COLUMNS[:min(max((len(row) for row in fields), default=7), POSITIONAL_COLUMNS)]
+    # Anything but rows and blank lines after the header means a transcript to filter
+    clean = bool(rows) and all(ROW.match(line) or not line.strip() for line in lines[skip:])
+    return LogFormat(encoding, delimiter, decimal, names, skip, clean)
+
+
+def _read_csv(source, fmt, chunk_rows, typed, skip=0):
+    names = [name or f"_{i}" for i, name in enumerate(fmt.names)]
+    dtype = {name: DTYPES[name] for name in fmt.columns} if typed else str
+    return pd.read_csv(source, sep=fmt.delimiter, header=None, names=names, usecols=fmt.columns,
+                       decimal=fmt.decimal, dtype=dtype, chunksize=chunk_rows, skiprows=skip,
+                       encoding=fmt.encoding if isinstance(source, str) else None,
+                       on_bad_lines='skip', engine='c', skip_blank_lines=True)
+
+
+def _typed(chunk, fmt):
+    """Keep the benchmark rows of a chunk read as strings and give its columns their dtypes"""
+    chunk = chunk[chunk['version'].str.fullmatch(VERSION_CELL, case=False, na=False)].copy()
+    for name in chunk.columns:
+        if DTYPES[name] == 'category':
+            chunk[name] = chunk[name].astype('category')
+            continue
+        values = chunk[name]
+        if fmt.decimal == ',':
+            values = values.str.replace(',', '.', regex=False)
+        chunk[name] = pd.to_numeric(values, errors='coerce')
+    return _samples(chunk)
+
+
+def _samples(chunk):
+    """Timed samples of a typed chunk: rows without n or time and warm-up rows dropped"""
+    chunk = chunk.dropna(subset=['n', 'normalized_ns'])
+    if 'warmup' in chunk.columns:
+        chunk = chunk[chunk['warmup'] != 1].drop(columns='warmup')
+    return chunk
+
+
+def _blocks(path, fmt, chunk_rows):
+    """Lines of a log after its header, chunk_rows lines per list"""
+    with open(path, encoding=fmt.encoding, errors='replace') as f:
+        lines = itertools.islice(f, fmt.skip, None)
+        while True:
+            block = list(itertools.islice(lines, chunk_rows))
+            if not block:
+                return
+            yield block
+
+
+def _filtered_lines(path, fmt, chunk_rows):
+    """Benchmark rows of a transcript, joined into one text block per chunk"""
+    with open(path, encoding=fmt.encoding, errors='replace') as f:
+        rows = filter(ROW.match, f)
+        while True:
+            block = list(itertools.islice(rows, chunk_rows))
+            if not block:
+                return
+            yield ''.join(block)
+
+
+def _filtered_chunks(text, fmt, chunk_rows):
+    """Typed chunks of a block of benchmark rows read as strings"""
+    for chunk in _read_csv(io.StringIO(text), fmt, chunk_rows, typed=False):
+        chunk = _typed(chunk, fmt)
+        if not chunk.empty:
+            yield chunk
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS, fmt=None):
+    """Yield DataFrames of at most chunk_rows benchmark rows with typed columns
+    (version, data_type, isa, sample, n, time_s, normalized_ns[, threads][, counters])"""
+    fmt = fmt or sniff(path)
+    if not fmt.clean:
+        for block in _filtered_lines(path, fmt, chunk_rows):
+            yield from _filtered_chunks(block, fmt, chunk_rows)
+        return
+    # Fast path: the C parser converts numbers and decimal commas itself. A block of lines
+    # is parsed whole before any of it is yielded, so a stray line only sends its own block
+    # through the line filter and no row is skipped or repeated.
+    for block in _blocks(path, fmt, chunk_rows):
+        try:
+            chunks = list(_read_csv(io.StringIO(''.join(block)), fmt, chunk_rows, typed=True))
+        except ValueError:
+            yield from _filtered_chunks(''.join(filter(ROW.match, block)), fmt, chunk_rows)
+            continue
+        for chunk in chunks:
+            chunk = _samples(chunk)
+            if not chunk.empty:
+                yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize benchmark TSV logs without loading them whole")
+    parser.add_argument('logs', nargs='+')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    for path in args.logs:
+        fmt = sniff(path)
+        print(f"{path}: {fmt}")
+        # Running count/sum per cell, so the summary needs one chunk in memory at a time
+        totals = None
+        for chunk in read_chunks(path, args.chunk_rows, fmt):
+            part = chunk.groupby(['version', 'data_type', 'n'])['normalized_ns'].agg(['count', 'sum'])
+            totals = part if totals is None else totals.add(part, fill_value=0)
+        if totals is None:
+            print("  no benchmark rows")
+            continue
+        totals['mean'] = totals['sum'] / totals['count']
+        print(totals[['count', 'mean']].to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@
 #include <stdlib.h>
 #include <time.h>
 #include <string.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 
 // Adaptado de https://inst.eecs.berkeley.edu/~cs61c/fa12/labs/07/
 /* Para ahorrar tiempo, se incluiye las 6 variantes del orden de los bucles
@@ -17,11 +20,16 @@
    condiciones de la medici�n.
 */
 
+// Número de hilos OpenMP para todas las versiones; se cambia con -p <threads>.
+// Cada hilo escribe un bloque disjunto de filas o columnas de C (compilar con -fopenmp).
+int numThreads = 1;
+
 // Versión ijk
 void ProductMat_a(int n, float* A, float* B, float* C) {
     int i, j, k;
     float sum;
     /* This is ijk loop order version. */
+    #pragma omp parallel for private(j, k, sum) num_threads(numThreads)
     for (i = 0; i < n; i++) {
         for (j = 0; j < n; j++) {
             sum = 0;
@@ -38,6 +46,7 @@ void ProductMat_b(int n, float* A, float* B, float* C) {
     int i, j, k;
     float sum;
     /* This is jik loop order version. */
+    #pragma omp parallel for private(i, k, sum) num_threads(numThreads)
     for (j = 0; j < n; j++) {
         for (i = 0; i < n; i++) {
             sum = 0;
@@ -54,6 +63,7 @@ void ProductMat_c(int n, float* A, float* B, float* C) {
     int i, j, k;
     float r;
     /* This is jki loop order version. */
+    #pragma omp parallel for private(i, k, r) num_threads(numThreads)
     for (j = 0; j < n; j++) {
         for (k = 0; k < n; k++) {
             r = B[k + j * n];
@@ -68,8 +78,11 @@ void ProductMat_c(int n, float* A, float* B, float* C) {
 void ProductMat_d(int n, float* A, float* B, float* C) {
     int i, j, k;
     float r;
-    /* This is kji loop order. */
+    /* This is kji loop order. With OpenMP each thread keeps the same block of
+       columns j for every k, so the k loop stays outermost and writes never overlap. */
+    #pragma omp parallel private(i, j, k, r) num_threads(numThreads)
     for (k = 0; k < n; k++) {
+        #pragma omp for schedule(static) nowait
         for (j = 0; j < n; j++) {
             r = B[k + j * n];
             for (i = 0; i < n; i++) {
@@ -84,7 +97,9 @@ void ProductMat_e(int n, float* A, float* B, float* C) {
     int i, j, k;
     float r;
     /* This is kij loop order version. */
+    #pragma omp parallel private(i, j, k, r) num_threads(numThreads)
     for (k = 0; k < n; k++) {
+        #pragma omp for schedule(static) nowait
         for (i = 0; i < n; i++) {
             r = A[i + k * n];
             for (j = 0; j < n; j++) {
@@ -99,6 +114,7 @@ void ProductMat_f(int n, float* A, float* B, float* C) {
     int i, j, k;
     float r;
     /* This is ikj loop order version. */
+    #pragma omp parallel for private(j, k, r) num_threads(numThreads)
     for (i = 0; i < n; i++) {
         for (k = 0; k < n; k++) {
             r = A[i + k * n];
@@ -109,6 +125,73 @@ void ProductMat_f(int n, float* A, float* B, float* C) {
     }
 }
 
+// Tamaño de bloque para las versiones por bloques (G y H); se cambia con -t <tile>
+int tileSize = 32;
+
+#define MIN(a, b) ((a) < (b) ? (a) : (b))
+
+// Versión ijk por bloques (tiled)
+void ProductMat_g(int n, float* A, float* B, float* C) {
+    int i, j, k, ii, jj, kk, iMax, jMax, kMax;
+    float sum;
+    /* This is the tiled ijk loop order version. */
+    #pragma omp parallel for private(i, j, k, jj, kk, iMax, jMax, kMax, sum) num_threads(numThreads)
+    for (ii = 0; ii < n; ii += tileSize) {
+        iMax = MIN(ii + tileSize, n);
+        for (jj = 0; jj < n; jj += tileSize) {
+            jMax = MIN(jj + tileSize, n);
+            for (kk = 0; kk < n; kk += tileSize) {
+                kMax = MIN(kk + tileSize, n);
+                for (i = ii; i < iMax; i++) {
+                    for (j = jj; j < jMax; j++) {
+                        sum = 0;
+                        for (k = kk; k < kMax; k++) {
+                            sum += A[i + k * n] * B[k + j * n]; // C[i][j] += A[i][k] * B[k][j]
+                        }
+                        C[i + j * n] += sum;
+                    }
+                }
+            }
+        }
+    }
+}
+
+// Versión kij por bloques (tiled)
+void ProductMat_h(int n, float* A, float* B, float* C) {
+    int i, j, k, ii, jj, kk, iMax, jMax, kMax;
+    float r;
+    /* This is the tiled kij loop order version. */
+    #pragma omp parallel private(i, j, k, ii, jj, kk, iMax, jMax, kMax, r) num_threads(numThreads)
+    for (kk = 0; kk < n; kk += tileSize) {
+        kMax = MIN(kk + tileSize, n);
+        #pragma omp for schedule(static) nowait
+        for (ii = 0; ii < n; ii += tileSize) {
+            iMax = MIN(ii + tileSize, n);
+            for (jj = 0; jj < n; jj += tileSize) {
+                jMax = MIN(jj + tileSize, n);
+                for (k = kk; k < kMax; k++) {
+                    for (i = ii; i < iMax; i++) {
+                        r = A[i + k * n];
+                        for (j = jj; j < jMax; j++) {
+                            C[i + j * n] += r * B[k + j * n];
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+
+// Tiempo de pared en segundos. Con OpenMP se usa omp_get_wtime(), porque en Linux
+// clock() suma el tiempo de CPU de todos los hilos.
+double wallTime(void) {
+#ifdef _OPENMP
+    return omp_get_wtime();
+#else
+    return (double)clock() / CLOCKS_PER_SEC;
+#endif
+}
+
 //****************************************************************************************************/
 void PrintMat(int n, float* M) {
     int i, j;
@@ -125,14 +208,47 @@ void PrintMat(int n, float* M) {
 //****************************************************************************************************/
 FILE* fp;
 
+// Con -DMATMUL_LIBRARY se compila sin main, como biblioteca compartida que usa c_kernels.py:
+//   gcc -O2 -fopenmp -shared -fPIC -DMATMUL_LIBRARY -o libmatmul_float.so matrixProduct_Six_versions_float.c
+#ifndef MATMUL_LIBRARY
 int main(int argc, char* argv[]) {
     if (argc < 3) {
-        printf("Uso: %s <n> <samples>\n", argv[0]);
+        printf("Uso: %s <n> <samples> [-t tile] [-p threads] [-v versiones] [print]\n", argv[0]);
         return 1;
     }
 
     int n = atoi(argv[1]); // Tamaño de la matriz
     int samples = atoi(argv[2]); // Número de muestras
+    int printMatrices = 0;
+    char* selected = NULL; // Versiones a ejecutar (p. ej. "GH"); NULL = todas
+
+    // Argumentos opcionales: -t <tile> fija el tamaño de bloque de G y H, -p <threads> el
+    // número de hilos, -v <versiones> limita las versiones a ejecutar; cualquier otro
+    // argumento imprime las matrices.
+    for (int a = 3; a < argc; a++) {
+        if (strcmp(argv[a], "-t") == 0 && a + 1 < argc) {
+            tileSize = atoi(argv[++a]);
+        } else if (strcmp(argv[a], "-p") == 0 && a + 1 < argc) {
+            numThreads = atoi(argv[++a]);
+        } else if (strcmp(argv[a], "-v") == 0 && a + 1 < argc) {
+            selected = argv[++a];
+        } else {
+            printMatrices = 1;
+        }
+    }
+    if (numThreads < 1) {
+        numThreads = 1;
+    }
+#ifndef _OPENMP
+    if (numThreads > 1) {
+        fprintf(stderr, "Advertencia: compilado sin OpenMP, se usa 1 hilo\n");
+        numThreads = 1;
+    }
+#endif
+    if (tileSize < 1) {
+        printf("Error: el tamaño de bloque debe ser positivo\n");
+        return 1;
+    }
 
     // Definir las versiones y sus nombres
     void (*versions[])(int, float*, float*, float*) = {
@@ -141,9 +257,11 @@ int main(int argc, char* argv[]) {
         ProductMat_c,
         ProductMat_d,
         ProductMat_e,
-        ProductMat_f
+        ProductMat_f,
+        ProductMat_g,
+        ProductMat_h
     };
-    char versionNames[] = {'A', 'B', 'C', 'D', 'E', 'F'};
+    char versionNames[] = {'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H'};
     int numVersions = sizeof(versionNames) / sizeof(versionNames[0]);
 
     // Asignación de memoria para matrices
@@ -162,28 +280,31 @@ int main(int argc, char* argv[]) {
         B[i] = 4.0f;
     }
 
-    printf("ver\ttypeData\tISA\t#sample\tn\ttime(s)\tNormalized(ns)\n");
+    printf("ver\ttypeData\tISA\t#sample\tn\ttime(s)\tNormalized(ns)\tthreads\n");
 
     // Ejecutar todas las versiones
     for (int v = 0; v < numVersions; v++) {
+        if (selected && !strchr(selected, versionNames[v])) {
+            continue;
+        }
         for (int s = 0; s < samples; s++) {
             // Reiniciar matriz C
             memset(C, 0, n * n * sizeof(float));
 
-            clock_t start = clock();
+            double start = wallTime();
             versions[v](n, A, B, C);
-            clock_t end = clock();
+            double end = wallTime();
 
-            double seconds = (double)(end - start) / CLOCKS_PER_SEC;
+            double seconds = end - start;
             double timeNormalized = (seconds * 1.0e9) / ((double)n * n * n);
 
-            printf("C++_ver(%c)\tfloat\tx64\t%05d\t%05d\t%.4f\t%.4f\n",
-                   versionNames[v], s, n, seconds, timeNormalized);
+            printf("C++_ver(%c)\tfloat\tx64\t%05d\t%05d\t%.4f\t%.4f\t%d\n",
+                   versionNames[v], s, n, seconds, timeNormalized, numThreads);
         }
     }
 
-    // Imprimir matrices si hay un tercer argumento
-    if (argc > 3) {
+    // Imprimir matrices si se pidió con un argumento adicional
+    if (printMatrices) {
         PrintMat(n, A);
         PrintMat(n, B);
         PrintMat(n, C);
@@ -195,4 +316,5 @@ int main(int argc, char* argv[]) {
     free(C);
 
     return 0;
-}
\ No newline at end of file
+}
+#endif
\ No newline at end of file
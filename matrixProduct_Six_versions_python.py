@@ -1,15 +1,38 @@
+import argparse
+import functools
+import os
+import random
 import sys
 import time
+from multiprocessing import Barrier, Pool, resource_tracker, shared_memory
 import numpy as np
 
+import perf_counters
+from run_log import COMPLETED, RunLog, default_log_path, run_key
+
+# Numba es opcional: si no está instalado el backend "jit" cae al escalar
+try:
+    import numba
+except ImportError:
+    numba = None
+
 # Adaptado del código C++: https://inst.eecs.berkeley.edu/~cs61c/fa12/labs/07/
 # Se implementan las 6 versiones de multiplicación de matrices con diferentes órdenes de bucles.
 # Usamos numpy para definir explícitamente float32 y float64, manteniendo equivalencia con C++.
 # time.perf_counter() se usa para medir tiempos con alta precisión, similar a chrono.
+# lo/hi limitan el bucle que recorre las filas (i) o columnas (j) de C que escribe la
+# versión; así cada proceso de --threads escribe un bloque disjunto de C.
+
+# Tipos de datos a probar
+DTYPES = {
+    'float': np.float32,
+    'double': np.float64
+}
 
 # Versión ijk
-def product_mat_a(n, A, B, C, dtype):
-    for i in range(n):
+def product_mat_a(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
+    for i in range(lo, hi):
         for j in range(n):
             sum_val = dtype(0)  # Inicializar sum_val según el tipo de dato
             for k in range(n):
@@ -17,8 +40,9 @@ def product_mat_a(n, A, B, C, dtype):
             C[i + j * n] += sum_val
 
 # Versión jik
-def product_mat_b(n, A, B, C, dtype):
-    for j in range(n):
+def product_mat_b(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
+    for j in range(lo, hi):
         for i in range(n):
             sum_val = dtype(0)
             for k in range(n):
@@ -26,37 +50,286 @@ def product_mat_b(n, A, B, C, dtype):
             C[i + j * n] += sum_val
 
 # Versión jki
-def product_mat_c(n, A, B, C, dtype):
-    for j in range(n):
+def product_mat_c(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
+    for j in range(lo, hi):
         for k in range(n):
             r = B[k + j * n]
             for i in range(n):
                 C[i + j * n] += A[i + k * n] * r  # C[i][j] += A[i][k] * B[k][j]
 
 # Versión kji
-def product_mat_d(n, A, B, C, dtype):
+def product_mat_d(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
     for k in range(n):
-        for j in range(n):
+        for j in range(lo, hi):
             r = B[k + j * n]
             for i in range(n):
                 C[i + j * n] += A[i + k * n] * r  # C[i][j] += A[i][k] * B[k][j]
 
 # Versión kij
-def product_mat_e(n, A, B, C, dtype):
+def product_mat_e(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
     for k in range(n):
-        for i in range(n):
+        for i in range(lo, hi):
             r = A[i + k * n]
             for j in range(n):
                 C[i + j * n] += r * B[k + j * n]  # C[i][j] += A[i][k] * B[k][j]
 
 # Versión ikj
-def product_mat_f(n, A, B, C, dtype):
-    for i in range(n):
+def product_mat_f(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
+    for i in range(lo, hi):
         for k in range(n):
             r = A[i + k * n]
             for j in range(n):
                 C[i + j * n] += r * B[k + j * n]  # C[i][j] += A[i][k] * B[k][j]
 
+# Tamaño de bloque por defecto para las versiones por bloques (tiled): tres bloques
+# de 32x32 en double ocupan 24 KB y caben en la L1 de 32 KB de Zen 3.
+DEFAULT_TILE = 32
+
+# Versión ijk por bloques (tiled)
+def product_mat_g(n, A, B, C, dtype, lo=0, hi=None, tile=DEFAULT_TILE):
+    hi = n if hi is None else hi
+    for ii in range(lo, hi, tile):
+        for jj in range(0, n, tile):
+            for kk in range(0, n, tile):
+                for i in range(ii, min(ii + tile, hi)):
+                    for j in range(jj, min(jj + tile, n)):
+                        sum_val = dtype(0)
+                        for k in range(kk, min(kk + tile, n)):
+                            sum_val += A[i + k * n] * B[k + j * n]  # C[i][j] += A[i][k] * B[k][j]
+                        C[i + j * n] += sum_val
+
+# Versión kij por bloques (tiled)
+def product_mat_h(n, A, B, C, dtype, lo=0, hi=None, tile=DEFAULT_TILE):
+    hi = n if hi is None else hi
+    for kk in range(0, n, tile):
+        for ii in range(lo, hi, tile):
+            for jj in range(0, n, tile):
+                for k in range(kk, min(kk + tile, n)):
+                    for i in range(ii, min(ii + tile, hi)):
+                        r = A[i + k * n]
+                        for j in range(jj, min(jj + tile, n)):
+                            C[i + j * n] += r * B[k + j * n]  # C[i][j] += A[i][k] * B[k][j]
+
+# Backend vectorizado: cada versión conserva el orden de sus bucles externos, pero el
+# bucle más interno se reemplaza por una operación NumPy sobre un slice.
+# Con almacenamiento column-major, M.reshape(n, n)[c, r] == M[r + c * n], es decir,
+# la fila c de la vista es la columna c de la matriz (contigua en memoria).
+
+# Versión ijk: producto punto entre la fila i de A y la columna j de B
+def product_mat_a_vectorized(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
+    At, Bt, Ct = A.reshape(n, n), B.reshape(n, n), C.reshape(n, n)
+    for i in range(lo, hi):
+        for j in range(n):
+            Ct[j, i] += np.dot(At[:, i], Bt[j, :])  # C[i][j] += A[i][:] . B[:][j]
+
+# Versión jik
+def product_mat_b_vectorized(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
+    At, Bt, Ct = A.reshape(n, n), B.reshape(n, n), C.reshape(n, n)
+    for j in range(lo, hi):
+        for i in range(n):
+            Ct[j, i] += np.dot(At[:, i], Bt[j, :])
+
+# Versión jki: axpy sobre la columna j de C (contigua)
+def product_mat_c_vectorized(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
+    At, Bt, Ct = A.reshape(n, n), B.reshape(n, n), C.reshape(n, n)
+    for j in range(lo, hi):
+        for k in range(n):
+            Ct[j, :] += At[k, :] * Bt[j, k]  # C[:][j] += A[:][k] * B[k][j]
+
+# Versión kji
+def product_mat_d_vectorized(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
+    At, Bt, Ct = A.reshape(n, n), B.reshape(n, n), C.reshape(n, n)
+    for k in range(n):
+        for j in range(lo, hi):
+            Ct[j, :] += At[k, :] * Bt[j, k]
+
+# Versión kij: axpy sobre la fila i de C (con salto n entre elementos)
+def product_mat_e_vectorized(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
+    At, Bt, Ct = A.reshape(n, n), B.reshape(n, n), C.reshape(n, n)
+    for k in range(n):
+        for i in range(lo, hi):
+            Ct[:, i] += At[k, i] * Bt[:, k]  # C[i][:] += A[i][k] * B[k][:]
+
+# Versión ikj
+def product_mat_f_vectorized(n, A, B, C, dtype, lo=0, hi=None):
+    hi = n if hi is None else hi
+    At, Bt, Ct = A.reshape(n, n), B.reshape(n, n), C.reshape(n, n)
+    for i in range(lo, hi):
+        for k in range(n):
+            Ct[:, i] += At[k, i] * Bt[:, k]
+
+# Versiones por bloques: el recorrido de los bloques conserva el orden ijk / kij y
+# el producto de cada par de bloques se hace en una sola operación NumPy.
+def product_mat_g_vectorized(n, A, B, C, dtype, lo=0, hi=None, tile=DEFAULT_TILE):
+    hi = n if hi is None else hi
+    At, Bt, Ct = A.reshape(n, n), B.reshape(n, n), C.reshape(n, n)
+    for ii in range(lo, hi, tile):
+        for jj in range(0, n, tile):
+            for kk in range(0, n, tile):
+                Ct[jj:jj + tile, ii:min(ii + tile, hi)] += Bt[jj:jj + tile, kk:kk + tile] @ At[kk:kk + tile, ii:min(ii + tile, hi)]
+
+def product_mat_h_vectorized(n, A, B, C, dtype, lo=0, hi=None, tile=DEFAULT_TILE):
+    hi = n if hi is None else hi
+    At, Bt, Ct = A.reshape(n, n), B.reshape(n, n), C.reshape(n, n)
+    for kk in range(0, n, tile):
+        for ii in range(lo, hi, tile):
+            for jj in range(0, n, tile):
+                Ct[jj:jj + tile, ii:min(ii + tile, hi)] += Bt[jj:jj + tile, kk:kk + tile] @ At[kk:kk + tile, ii:min(ii + tile, hi)]
+
+# Etiqueta ISA que se escribe en cada fila; el backend escalar conserva "x64"
+# para que los resultados anteriores y los nuevos sigan siendo comparables.
+def isa_tag(backend):
+    return "x64" if backend == "scalar" else f"x64-{backend}"
+
+# Mapeo de versiones a funciones para cada backend; las versiones por bloques
+# (G y H) quedan ligadas al tamaño de bloque para conservar la misma firma.
+def get_versions(backend, tile=DEFAULT_TILE):
+    if backend == "jit":
+        # Se compilan las mismas funciones escalares (mismo indexado A[i + k*n]);
+        # Numba genera una especialización por cada dtype en la primera llamada.
+        return {
+            'A': numba.njit(product_mat_a),
+            'B': numba.njit(product_mat_b),
+            'C': numba.njit(product_mat_c),
+            'D': numba.njit(product_mat_d),
+            'E': numba.njit(product_mat_e),
+            'F': numba.njit(product_mat_f),
+            'G': functools.partial(numba.njit(product_mat_g), tile=tile),
+            'H': functools.partial(numba.njit(product_mat_h), tile=tile)
+        }
+    if backend == "vectorized":
+        return {
+            'A': product_mat_a_vectorized,
+            'B': product_mat_b_vectorized,
+            'C': product_mat_c_vectorized,
+            'D': product_mat_d_vectorized,
+            'E': product_mat_e_vectorized,
+            'F': product_mat_f_vectorized,
+            'G': functools.partial(product_mat_g_vectorized, tile=tile),
+            'H': functools.partial(product_mat_h_vectorized, tile=tile)
+        }
+    return {
+        'A': product_mat_a,
+        'B': product_mat_b,
+        'C': product_mat_c,
+        'D': product_mat_d,
+        'E': product_mat_e,
+        'F': product_mat_f,
+        'G': functools.partial(product_mat_g, tile=tile),
+        'H': functools.partial(product_mat_h, tile=tile)
+    }
+
+# Fuerza la compilación JIT de cada versión y dtype con matrices pequeñas,
+# para que el tiempo de compilación no quede dentro de la región medida.
+def warm_up_versions(versions, dtypes):
+    for dtype in dtypes.values():
+        A = np.full(4, 2.0, dtype=dtype)
+        B = np.full(4, 4.0, dtype=dtype)
+        for func in versions.values():
+            func(2, A, B, np.zeros(4, dtype=dtype), dtype)
+            func(2, A, B, np.zeros(4, dtype=dtype), dtype, 0, 2)  # firma usada por --threads
+
+# Estado de cada proceso del pool: versiones del backend y buffers compartidos adjuntos
+_worker_versions = None
+_worker_buffers = {}
+
+# Compila (si es jit) y adjunta los buffers de cada tipo de dato antes de la primera
+# medición, para que ni la compilación ni los fallos de página caigan en una muestra.
+def _init_worker(backend, tile, size, buffer_names, ready):
+    global _worker_versions
+    _worker_versions = get_versions(backend, tile)
+    if backend == "jit":
+        warm_up_versions(_worker_versions, {name: DTYPES[name] for name in buffer_names})
+    for dtype_name, names in buffer_names.items():
+        for M in _attach(names, size, DTYPES[dtype_name]):
+            M.sum()
+    ready.wait()
+
+# Los procesos del pool solo usan la memoria que creó el proceso principal; no deben
+# registrarla en el resource_tracker o éste la "liberaría" de nuevo al terminar.
+def _open_shared(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+# Adjunta A, B y C por nombre una sola vez; hay un juego de buffers por tipo de dato
+def _attach(names, size, dtype):
+    if names not in _worker_buffers:
+        shms = [_open_shared(name) for name in names]
+        arrays = [np.ndarray((size * size,), dtype=dtype, buffer=shm.buf) for shm in shms]
+        _worker_buffers[names] = (shms, arrays)
+    return _worker_buffers[names][1]
+
+def _run_block(ver, dtype_name, n, size, names, lo, hi):
+    dtype = DTYPES[dtype_name]
+    A, B, C = (M[:n * n] for M in _attach(names, size, dtype))
+    _worker_versions[ver](n, A, B, C, dtype, lo, hi)
+
+# Crea A, B y C para el mayor tamaño del barrido; cada n usa las vistas M[:n * n].
+# Con shared=True viven en memoria compartida para el pool de procesos.
+def allocate_matrices(size, dtype, shared):
+    if not shared:
+        return np.full((size * size), 2.0, dtype=dtype), np.full((size * size), 4.0, dtype=dtype), \
+            np.zeros((size * size), dtype=dtype), []
+    nbytes = max(size * size * np.dtype(dtype).itemsize, 1)
+    shms = [shared_memory.SharedMemory(create=True, size=nbytes) for _ in range(3)]
+    A, B, C = [np.ndarray((size * size,), dtype=dtype, buffer=shm.buf) for shm in shms]
+    A[:] = 2.0
+    B[:] = 4.0
+    C[:] = 0
+    return A, B, C, shms
+
+def release_matrices(shms):
+    for shm in shms:
+        shm.close()
+        shm.unlink()
+
+# Reparte [0, n) en bloques contiguos, uno por proceso, y espera a que terminen todos
+def run_parallel(pool, ver, dtype_name, n, size, names, threads):
+    bounds = [int(b) for b in np.linspace(0, n, threads + 1)]
+    tasks = [(ver, dtype_name, n, size, names, lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+    pool.starmap(_run_block, tasks)
+
+# Interpreta listas de versiones como "A-F", "GH" o "A-D,G"
+def parse_versions(spec, available):
+    selected = []
+    for part in spec.upper().replace(" ", "").split(","):
+        if len(part) == 3 and part[1] == "-":
+            part = "".join(chr(c) for c in range(ord(part[0]), ord(part[2]) + 1))
+        for ver in part:
+            if ver not in available:
+                raise ValueError(f"Versión desconocida: {ver}")
+            if ver not in selected:
+                selected.append(ver)
+    return selected
+
+# Genera todas las corridas (tipo, versión, n, muestra) del barrido. Con shuffle el orden
+# se aleatoriza como en script.ps1, para que la deriva térmica o de carga del sistema no
+# se confunda con el efecto de un factor.
+def build_runs(dtype_names, version_names, sizes, samples, shuffle=False, seed=None):
+    runs = [(dtype_name, ver, n, s)
+            for n in sizes
+            for dtype_name in dtype_names
+            for ver in version_names
+            for s in range(samples)]
+    if shuffle:
+        random.Random(seed).shuffle(runs)
+    return runs
+
 # Función para imprimir matrices (solo para depuración opcional)
 def print_mat(n, M):
     for j in range(n):
@@ -67,60 +340,181 @@ def print_mat(n, M):
 # Función principal
 def main():
     # Leer argumentos de línea de comandos
-    if len(sys.argv) < 3:
-        print("Uso: python script.py <n> <samples>")
-        return
+    parser = argparse.ArgumentParser(description="Producto de matrices con 6 órdenes de bucles")
+    parser.add_argument("n", type=int, nargs="?", help="Tamaño de la matriz")
+    parser.add_argument("samples", type=int, nargs="?", help="Número de muestras")
+    parser.add_argument("print_matrices", nargs="?", help="Cualquier valor imprime las matrices al final")
+    parser.add_argument("--backend", choices=["scalar", "vectorized", "jit"], default="scalar",
+                        help="scalar: triple bucle en Python; vectorized: bucle interno con NumPy; "
+                             "jit: triple bucle compilado con Numba")
+    parser.add_argument("--tile", type=int, default=DEFAULT_TILE,
+                        help="Tamaño de bloque para las versiones G y H (por defecto %(default)s)")
+    parser.add_argument("--versions", default=None,
+                        help="Versiones a ejecutar, p. ej. A-F, GH o A-D,G (por defecto todas)")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="Procesos que se reparten el bucle externo (por defecto %(default)s)")
+    # Modo barrido: todos los tamaños en un solo proceso, sin relanzar el intérprete
+    parser.add_argument("--sizes", default=None,
+                        help="Lista de tamaños separados por comas, p. ej. 91,128,157 (reemplaza a n)")
+    parser.add_argument("--samples", dest="samples_opt", type=int, default=None,
+                        help="Número de muestras por celda (alternativa al argumento posicional)")
+    parser.add_argument("--dtypes", default="float,double",
+                        help="Tipos de datos separados por comas (por defecto %(default)s)")
+    parser.add_argument("--shuffle", action="store_true",
+                        help="Aleatorizar el orden de todas las corridas, como script.ps1")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla para --shuffle")
+    parser.add_argument("--output", default=None,
+                        help="Archivo donde escribir las filas a medida que terminan (por defecto stdout)")
+    # Registro durable de corridas para poder retomar un barrido interrumpido
+    parser.add_argument("--run-log", default=None,
+                        help="Registro de corridas (por defecto <output>_runlog.jsonl si se usa --output)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Saltar las corridas completadas según el registro y añadir al --output existente")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="Intentos por corrida antes de abandonar una celda que falla (por defecto %(default)s)")
+    # Contadores de hardware (perf_event) alrededor de cada llamada medida
+    parser.add_argument("--counters", action="store_true",
+                        help="Añadir columnas con ciclos, instrucciones y fallos de L1d, LLC y dTLB (Linux)")
+    args = parser.parse_args()
+
+    log_path = args.run_log or (default_log_path(args.output) if args.output else None)
+    if args.resume and log_path is None:
+        parser.error("--resume requiere --output o --run-log")
+
+    if args.backend == "jit" and numba is None:
+        print("Advertencia: numba no está instalado, se usa el backend scalar", file=sys.stderr)
+        args.backend = "scalar"
 
-    n = int(sys.argv[1])  # Tamaño de la matriz
-    samples = int(sys.argv[2])  # Número de muestras
+    # Tamaños de matriz y número de muestras
+    if args.sizes:
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    elif args.n is not None:
+        sizes = [args.n]
+    else:
+        parser.error("se requiere <n> o --sizes")
+    samples = args.samples_opt if args.samples_opt is not None else args.samples
+    if samples is None and args.sizes and args.n is not None:
+        samples = args.n  # con --sizes, un único posicional es el número de muestras
+    if samples is None:
+        parser.error("se requiere <samples> o --samples")
 
     # Mapeo de versiones a funciones
-    versions = {
-        'A': product_mat_a,
-        'B': product_mat_b,
-        'C': product_mat_c,
-        'D': product_mat_d,
-        'E': product_mat_e,
-        'F': product_mat_f
-    }
+    versions = get_versions(args.backend, args.tile)
+    if args.versions:
+        try:
+            selected = parse_versions(args.versions, versions)
+        except ValueError as e:
+            parser.error(str(e))
+        versions = {ver: versions[ver] for ver in selected}
+    isa = isa_tag(args.backend)
 
     # Tipos de datos a probar
-    dtypes = {
-        'float': np.float32,
-        'double': np.float64
-    }
+    dtype_names = [name.strip() for name in args.dtypes.split(",") if name.strip()]
+    unknown = [name for name in dtype_names if name not in DTYPES]
+    if unknown:
+        parser.error(f"tipos de datos desconocidos: {', '.join(unknown)}")
+    dtypes = {name: DTYPES[name] for name in dtype_names}
+
+    # La compilación JIT se hace antes de medir cualquier muestra
+    if args.backend == "jit":
+        warm_up_versions(versions, dtypes)
+
+    # Un solo juego de matrices por tipo de dato, dimensionado para el mayor n
+    threads = max(args.threads, 1)
+    size = max(sizes)
+    buffers = {name: allocate_matrices(size, dtype, shared=threads > 1) for name, dtype in dtypes.items()}
+
+    # Con más de un proceso, el pool se crea (y compila, si es jit) antes de medir
+    pool = None
+    if threads > 1:
+        buffer_names = {name: tuple(shm.name for shm in buffers[name][3]) for name in dtypes}
+        ready = Barrier(threads + 1)
+        pool = Pool(threads, initializer=_init_worker,
+                    initargs=(args.backend, args.tile, size, buffer_names, ready))
+        ready.wait()  # todos los procesos terminaron de inicializarse
+
+    # Al retomar, las filas nuevas se añaden al archivo existente sin repetir el encabezado
+    append = args.resume and args.output and os.path.exists(args.output) and os.path.getsize(args.output) > 0
+    out = open(args.output, "a" if append else "w") if args.output else sys.stdout
+    header = "ver\ttypeData\tISA\t#sample\tn\ttime(s)\tNormalized(ns)\tthreads"
+    counters = None
+    if args.counters:
+        header += "\t" + "\t".join(perf_counters.COUNTER_NAMES)
+        counters = perf_counters.Counters()
+        if counters.errors:
+            unavailable = ", ".join(f"{name} ({error})" for name, error in counters.errors.items())
+            print(f"Advertencia: contadores no disponibles, se escribe NA: {unavailable}", file=sys.stderr)
+        if threads > 1:
+            print("Advertencia: con --threads > 1 los contadores solo cubren el proceso principal",
+                  file=sys.stderr)
+    if not append:
+        print(header, file=out, flush=True)
+    log = RunLog(log_path, resume=args.resume) if log_path else None
 
-    print("ver\ttypeData\tISA\t#sample\tn\ttime(s)\tNormalized(ns)")
-    
-    # Ejecutar experimentos para cada tipo de dato y versión
-    for dtype_name, dtype in dtypes.items():
-        for ver, func in versions.items():
-            # Crear matrices como arreglos numpy con el tipo de dato especificado
-            A = np.full((n * n), 2.0, dtype=dtype)
-            B = np.full((n * n), 4.0, dtype=dtype)
+    try:
+        # Ejecutar cada corrida del barrido (tipo de dato, versión, n, muestra)
+        for dtype_name, ver, n, s in build_runs(list(dtypes), list(versions), sizes, samples,
+                                                shuffle=args.shuffle, seed=args.seed):
+            key = run_key(ver, n, dtype_name, "Python", s)
+            if log is not None:
+                if not log.should_run(key, args.max_attempts):
+                    continue
+                log.start(key)
+            dtype = dtypes[dtype_name]
+            A_full, B_full, C_full, shms = buffers[dtype_name]
+            names = tuple(shm.name for shm in shms)
+            A, B, C = A_full[:n * n], B_full[:n * n], C_full[:n * n]
 
-            for s in range(samples):
-                # Reiniciar matriz C a ceros antes de cada ejecución
-                C = np.zeros((n * n), dtype=dtype)
+            # Reiniciar matriz C a ceros antes de cada ejecución
+            C[:] = 0
 
-                # Medir tiempo con alta precisión usando time.perf_counter()
+            # Medir tiempo con alta precisión usando time.perf_counter()
+            try:
+                if counters is not None:
+                    counters.start()
                 start = time.perf_counter()
-                func(n, A, B, C, dtype)
+                if pool is None:
+                    versions[ver](n, A, B, C, dtype)
+                else:
+                    run_parallel(pool, ver, dtype_name, n, size, names, threads)
                 end = time.perf_counter()
+                if counters is not None:
+                    counters.stop()
+            except Exception:
+                if log is not None:
+                    log.finish(key, "Execution Error")
+                raise
 
-                # Calcular tiempo en segundos y normalizado en ns
-                seconds = end - start
-                time_normalized = (seconds * 1.0e9) / (n * n * n)
+            # Calcular tiempo en segundos y normalizado en ns
+            seconds = end - start
+            time_normalized = (seconds * 1.0e9) / (n * n * n)
 
-                # Formatear y escribir resultados
-                result = f"Py_ver({ver})\t{dtype_name}\tx64\t{s:05d}\t{n:05d}\t{seconds:.4f}\t{time_normalized:.4f}"
-                print(result)
+            # Formatear y escribir resultados a medida que terminan
+            result = f"Py_ver({ver})\t{dtype_name}\t{isa}\t{s:05d}\t{n:05d}\t{seconds:.4f}\t{time_normalized:.4f}\t{threads}"
+            if counters is not None:
+                result += "\t" + perf_counters.format_counts(counters.read())
+            print(result, file=out, flush=True)
+            if log is not None:
+                log.finish(key, COMPLETED)
 
             # Imprimir matrices si hay un tercer argumento (opcional)
-            if len(sys.argv) > 3:
+            if args.print_matrices is not None and s == samples - 1:
                 print_mat(n, A)
                 print_mat(n, B)
                 print_mat(n, C)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if log is not None:
+            log.close()
+        if counters is not None:
+            counters.close()
+        if pool is not None:
+            pool.close()
+            pool.join()
+        for name in list(buffers):
+            shms = buffers.pop(name)[3]
+            release_matrices(shms)
 
 if __name__ == "__main__":
     main()
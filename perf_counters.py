@@ -0,0 +1,147 @@
+import ctypes
+import os
+import platform
+import struct
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Optional hardware performance counters for a timed kernel call, read through the Linux
+# perf_event_open syscall with ctypes (no perf binary or extra package needed). Counters
+# cover the calling thread only. Anything the machine or its perf_event_paranoid setting
+# does not allow reads as None, so callers can always ask for the full set.
+
+COUNTER_NAMES = ['cycles', 'instructions', 'L1d_misses', 'LLC_misses', 'dTLB_misses']
+
+# perf_event_open syscall number per architecture
+SYSCALL_NUMBERS = {'x86_64': 298, 'amd64': 298, 'aarch64': 241, 'arm64': 241, 'i686': 336, 'i386': 336}
+
+PERF_TYPE_HARDWARE = 0
+PERF_TYPE_HW_CACHE = 3
+PERF_COUNT_HW_CPU_CYCLES = 0
+PERF_COUNT_HW_INSTRUCTIONS = 1
+PERF_COUNT_HW_CACHE_L1D = 0
+PERF_COUNT_HW_CACHE_LL = 2
+PERF_COUNT_HW_CACHE_DTLB = 3
+PERF_COUNT_HW_CACHE_OP_READ = 0
+PERF_COUNT_HW_CACHE_RESULT_MISS = 1
+
+PERF_FORMAT_TOTAL_TIME_ENABLED = 1 << 0
+PERF_FORMAT_TOTAL_TIME_RUNNING = 1 << 1
+# attr.flags bits
+DISABLED = 1 << 0
+EXCLUDE_KERNEL = 1 << 5
+EXCLUDE_HV = 1 << 6
+
+PERF_EVENT_IOC_ENABLE = 0x2400
+PERF_EVENT_IOC_DISABLE = 0x2401
+PERF_EVENT_IOC_RESET = 0x2403
+
+
+def _cache_miss(cache):
+    return cache | (PERF_COUNT_HW_CACHE_OP_READ << 8) | (PERF_COUNT_HW_CACHE_RESULT_MISS << 16)
+
+
+EVENTS = {
+    'cycles': (PERF_TYPE_HARDWARE, PERF_COUNT_HW_CPU_CYCLES),
+    'instructions': (PERF_TYPE_HARDWARE, PERF_COUNT_HW_INSTRUCTIONS),
+    'L1d_misses': (PERF_TYPE_HW_CACHE, _cache_miss(PERF_COUNT_HW_CACHE_L1D)),
+    'LLC_misses': (PERF_TYPE_HW_CACHE, _cache_miss(PERF_COUNT_HW_CACHE_LL)),
+    'dTLB_misses': (PERF_TYPE_HW_CACHE, _cache_miss(PERF_COUNT_HW_CACHE_DTLB)),
+}
+
+
+class PerfEventAttr(ctypes.Structure):
+    # First version of struct perf_event_attr (PERF_ATTR_SIZE_VER1), accepted by every kernel
+    _fields_ = [
+        ('type', ctypes.c_uint32),
+        ('size', ctypes.c_uint32),
+        ('config', ctypes.c_uint64),
+        ('sample_period', ctypes.c_uint64),
+        ('sample_type', ctypes.c_uint64),
+        ('read_format', ctypes.c_uint64),
+        ('flags', ctypes.c_uint64),
+        ('wakeup_events', ctypes.c_uint32),
+        ('bp_type', ctypes.c_uint32),
+        ('config1', ctypes.c_uint64),
+        ('config2', ctypes.c_uint64),
+    ]
+
+
+def _perf_event_open(event_type, config):
+    """Open one counter for the calling thread on any CPU; returns its file descriptor"""
+    number = SYSCALL_NUMBERS.get(platform.machine().lower())
+    if platform.system() != 'Linux' or number is None or fcntl is None:
+        raise OSError("perf_event is only available on Linux")
+    libc = ctypes.CDLL(None, use_errno=True)
+    attr = PerfEventAttr()
+    attr.type = event_type
+    attr.size = ctypes.sizeof(PerfEventAttr)
+    attr.config = config
+    attr.read_format = PERF_FORMAT_TOTAL_TIME_ENABLED | PERF_FORMAT_TOTAL_TIME_RUNNING
+    # User space only, which perf_event_paranoid=2 (the usual default) still allows
+    attr.flags = DISABLED | EXCLUDE_KERNEL | EXCLUDE_HV
+    fd = libc.syscall(number, ctypes.byref(attr), 0, -1, -1, 0)
+    if fd < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    return fd
+
+
+class Counters:
+    """Hardware counters around a timed call: start()/stop() or a with block, then read()"""
+
+    def __init__(self, names=COUNTER_NAMES):
+        self.names = list(names)
+        self.fds = {}
+        self.errors = {}
+        for name in self.names:
+            try:
+                self.fds[name] = _perf_event_open(*EVENTS[name])
+            except OSError as e:
+                self.errors[name] = e.strerror or str(e)
+
+    @property
+    def available(self):
+        return bool(self.fds)
+
+    def start(self):
+        for fd in self.fds.values():
+            fcntl.ioctl(fd, PERF_EVENT_IOC_RESET, 0)
+            fcntl.ioctl(fd, PERF_EVENT_IOC_ENABLE, 0)
+
+    def stop(self):
+        for fd in self.fds.values():
+            fcntl.ioctl(fd, PERF_EVENT_IOC_DISABLE, 0)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def read(self):
+        """Counts of the last measured call, scaled up if the kernel multiplexed a counter"""
+        values = {}
+        for name in self.names:
+            fd = self.fds.get(name)
+            if fd is None:
+                values[name] = None
+                continue
+            value, enabled, running = struct.unpack('QQQ', os.read(fd, 24))
+            values[name] = round(value * enabled / running) if running else None
+        return values
+
+    def close(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds = {}
+
+
+def format_counts(values, names=COUNTER_NAMES):
+    """TSV fields for a read(), with NA for counters that are not available"""
+    return '\t'.join('NA' if values.get(name) is None else str(values[name]) for name in names)
@@ -0,0 +1,50 @@
+# Aggregated drawing for figures of per-sample data. Up to a threshold of rows the render
+# functions draw every sample as before; above it they draw what a groupby reduces the
+# samples to (quantile bands per x and series, a regression line from the sums of x, y,
+# xy and x²) over a hexbin density, so the time to draw a figure and the size of the PNG
+# depend on the number of cells, not on the number of samples.
+
+RAW_POINTS = 5000
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+def use_raw(df, raw_points=RAW_POINTS):
+    """Draw individual samples? (raw_points 0 or less: always aggregate)"""
+    return 0 < len(df) <= raw_points
+
+
+def quantile_bands(df, x, y, by=None, quantiles=QUANTILES):
+    """Quantiles of y at every x (and level of by): one column per quantile"""
+    keys = [by, x] if by else [x]
+    bands = df.groupby(keys, observed=True)[y].quantile(quantiles).unstack()
+    bands.columns = [f"q{int(round(q * 100))}" for q in quantiles]
+    return bands
+
+
+def linear_fit(df, x, y):
+    """Least-squares intercept and slope of y on x, from per-x sums"""
+    sums = df.groupby(x, observed=True)[y].agg(['count', 'sum'])
+    sums['sum_xy'] = df.assign(_xy=df[y] * df[x]).groupby(x, observed=True)['_xy'].sum()
+    xs = sums.index.to_numpy(dtype=float)
+    count, sum_y, sum_xy = sums['count'].to_numpy(), sums['sum'].to_numpy(), sums['sum_xy'].to_numpy()
+    n = count.sum()
+    mean_x, mean_y = (count * xs).sum() / n, sum_y.sum() / n
+    sxx = (count * (xs - mean_x) ** 2).sum()
+    slope = (sum_xy.sum() - n * mean_x * mean_y) / sxx if sxx > 0 else 0.0
+    return mean_y - slope * mean_x, slope
+
+
+def draw_bands(ax, bands, label=None, color=None, outer=True):
+    """Median line with 25-75% (and, with outer, 5-95%) bands of one series from quantile_bands"""
+    xs = bands.index.to_numpy(dtype=float)
+    line, = ax.plot(xs, bands['q50'], marker='o', markersize=3, label=label, color=color)
+    color = line.get_color()
+    ax.fill_between(xs, bands['q25'], bands['q75'], color=color, alpha=0.25, linewidth=0)
+    if outer:
+        ax.fill_between(xs, bands['q5'], bands['q95'], color=color, alpha=0.1, linewidth=0)
+
+
+def draw_density(ax, df, x, y, gridsize=40):
+    """Hexbin density of all samples (log counts)"""
+    return ax.hexbin(df[x].to_numpy(dtype=float), df[y].to_numpy(dtype=float), gridsize=gridsize, bins='log',
+                     mincnt=1, cmap='Greys', alpha=0.6, linewidths=0)
@@ -0,0 +1,149 @@
+import functools
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+# Rendering stage for the analysis scripts' figures. A script describes every figure as
+# a Figure (output path, a module-level render function, the data slice it draws and its
+# parameters); render_all() then skips the figures whose key is unchanged since they were
+# last written and renders the rest across a process pool. The key of a figure hashes its
+# data slice (pandas' vectorized row hashes), its parameters and the source of its render
+# function and of the drawing helper modules render functions call, so editing the
+# plotting code redraws its figures too. Keys are kept in a manifest next to the figures,
+# written only by the parent process.
+
+MANIFEST = '.plot_cache.json'
+# Modules of drawing helpers shared by render functions; add new ones here
+HELPER_MODULES = ['plot_aggregates', 'qq_grid']
+
+
+class Figure:
+    """One output image: render(data, path, **params) draws and saves it"""
+
+    def __init__(self, path, render, data, **params):
+        self.path = path
+        self.render = render
+        self.data = data
+        self.params = params
+
+
+def data_hash(df):
+    """Hash of a frame's columns, dtypes and values"""
+    digest = hashlib.sha256(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes))]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _function_key(render):
+    try:
+        source = inspect.getsource(render)
+    except (OSError, TypeError):
+        source = ''
+    return f"{render.__module__}.{render.__qualname__}:{hashlib.sha1(source.encode()).hexdigest()}"
+
+
+@functools.lru_cache(maxsize=None)
+def helpers_key():
+    """Hash of the source files of HELPER_MODULES (found without importing them)"""
+    digest = hashlib.sha1()
+    for name in HELPER_MODULES:
+        spec = importlib.util.find_spec(name)
+        if spec is not None and spec.origin and os.path.exists(spec.origin):
+            with open(spec.origin, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def figure_key(figure, hashes=None):
+    """Key of a figure; hashes memoizes the data hashes of slices shared by several figures"""
+    hashes = {} if hashes is None else hashes
+    if id(figure.data) not in hashes:
+        hashes[id(figure.data)] = data_hash(figure.data)
+    params = json.dumps(figure.params, sort_keys=True, default=str)
+    code = f"{_function_key(figure.render)}|{helpers_key()}"
+    return hashlib.sha256(f"{hashes[id(figure.data)]}|{code}|{params}".encode()).hexdigest()
+
+
+def _manifest_path(path):
+    return os.path.join(os.path.dirname(path) or '.', MANIFEST)
+
+
+def _load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(path, manifest):
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temp, path)
+
+
+def _render(render, data, path, params):
+    """Run one render function; the figure is closed even when it fails"""
+    try:
+        render(data, path, **params)
+    finally:
+        plt.close('all')
+
+
+def render_all(figures, workers=1, force=False):
+    """Render the figures whose data, parameters or code changed (all with force), across
+    a pool of worker processes. Returns (rendered paths, skipped paths); a figure that
+    fails is reported and left out of both"""
+    hashes, manifests, pending, skipped = {}, {}, [], []
+    for figure in figures:
+        os.makedirs(os.path.dirname(figure.path) or '.', exist_ok=True)
+        manifest_path = _manifest_path(figure.path)
+        if manifest_path not in manifests:
+            manifests[manifest_path] = _load_manifest(manifest_path)
+        key = figure_key(figure, hashes)
+        name = os.path.basename(figure.path)
+        if not force and manifests[manifest_path].get(name) == key and os.path.exists(figure.path):
+            skipped.append(figure.path)
+        else:
+            pending.append((figure, key))
+
+    results = []
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            futures = [executor.submit(_render, f.render, f.data, f.path, f.params) for f, _ in pending]
+            for (figure, key), future in zip(pending, futures):
+                try:
+                    future.result()
+                    results.append((figure, key, None))
+                except Exception as e:
+                    results.append((figure, key, e))
+    else:
+        for figure, key in pending:
+            try:
+                _render(figure.render, figure.data, figure.path, figure.params)
+                results.append((figure, key, None))
+            except Exception as e:
+                results.append((figure, key, e))
+
+    rendered = []
+    for figure, key, error in results:
+        manifest = manifests[_manifest_path(figure.path)]
+        name = os.path.basename(figure.path)
+        if error is not None:
+            print(f"Error rendering {figure.path}: {str(error)}")
+            manifest.pop(name, None)
+            continue
+        manifest[name] = key
+        rendered.append(figure.path)
+    for manifest_path, manifest in manifests.items():
+        _save_manifest(manifest_path, manifest)
+
+    print(f"Figures: {len(rendered)} rendered, {len(skipped)} unchanged")
+    return rendered, skipped
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+from statsmodels.stats.multitest import multipletests
+
+import cell_stats
+
+# All-pairs non-parametric post-hoc tests. Dunn's test compares the mean ranks of the
+# groups within one ranking of the pooled data, so the data is ranked once (by CellStats)
+# and every pair is computed at once from the per-group rank sums and counts, however many
+# groups the factors produce. Results come back as a tidy table, one row per pair.
+
+CORRECTIONS = {'bonferroni': 'bonferroni', 'holm': 'holm', 'bh': 'fdr_bh', 'fdr_bh': 'fdr_bh', 'none': None}
+
+
+def adjust_pvalues(p_values, correction='holm', alpha=0.05):
+    """Adjusted p-values and reject flags for 'bonferroni', 'holm', 'bh' or 'none'"""
+    method = CORRECTIONS[correction]
+    p_values = np.asarray(p_values, dtype=float)
+    if method is None or len(p_values) == 0:
+        return p_values, p_values < alpha
+    reject, adjusted, _, _ = multipletests(p_values, alpha=alpha, method=method)
+    return adjusted, reject
+
+
+def _label(key):
+    return ' | '.join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+def dunn(df, factors, value='Normalized_ns', correction='holm', alpha=0.05, cells=None):
+    """Dunn's test between every pair of levels of factors (one column or several, whose
+    combinations are the groups). cells can be a CellStats of df over a superset of the
+    factors to reuse its ranks"""
+    factors = [factors] if isinstance(factors, str) else list(factors)
+    if cells is None:
+        cells = cell_stats.CellStats(df, factors, value)
+    groups = cells.cells(factors)
+    count = groups['count'].to_numpy(dtype=float)
+    mean_rank = groups['rank_sum'].to_numpy() / count
+    n = cells.n
+
+    # Variance of a mean rank difference, with the tie correction of the pooled ranking
+    scale = n * (n + 1) / 12 - cells.tie_sum / (12 * (n - 1)) if n > 1 else np.nan
+    i, j = np.triu_indices(len(groups), k=1)
+    z = (mean_rank[i] - mean_rank[j]) / np.sqrt(scale * (1 / count[i] + 1 / count[j]))
+    p = 2 * stats.norm.sf(np.abs(z))
+    adjusted, reject = adjust_pvalues(p, correction, alpha)
+
+    labels = np.array([_label(key) for key in groups.index], dtype=object)
+    return pd.DataFrame({
+        'factor': ' × '.join(factors),
+        'group1': labels[i],
+        'group2': labels[j],
+        'n1': count[i].astype(int),
+        'n2': count[j].astype(int),
+        'mean_rank1': mean_rank[i],
+        'mean_rank2': mean_rank[j],
+        'z': z,
+        'p': p,
+        'p_adj': adjusted,
+        'reject': reject,
+    })
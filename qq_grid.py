@@ -0,0 +1,103 @@
+import glob
+import math
+import os
+import re
+
+import matplotlib.pyplot as plt
+import numpy as np
+from scipy import stats
+
+import plot_pipeline
+
+# Normal Q-Q plots of many cells as small multiples. The data is sorted by cell and value
+# once; every row's order statistic, plotting position, normal quantile and standardized
+# value then come from vectorized groupby transforms, so no cell is fitted on its own.
+# Cells with many samples are thinned to evenly spaced order statistics, so a page costs
+# the same however many samples a cell holds. Cells are laid out on a grid of subplots in
+# one figure per page; every page is a plot_pipeline.Figure, rendered and cached on its own.
+
+PER_PAGE = 24
+COLUMNS = 6
+MAX_POINTS = 200
+
+
+def qq_points(df, cells, value='Normalized_ns', max_points=MAX_POINTS):
+    """Normal quantile and standardized value of the points to plot, with the cell number
+    of every point (cells numbered in sorted order)"""
+    data = df[cells + [value]].dropna().sort_values(cells + [value], kind='stable').reset_index(drop=True)
+    groups = data.groupby(cells, observed=True, sort=False)
+    size = groups[value].transform('size').to_numpy()
+    position = groups.cumcount().to_numpy()
+    values = data[value].to_numpy(dtype=float)
+    mean = groups[value].transform('mean').to_numpy()
+    std = groups[value].transform('std').to_numpy()
+
+    # Plotting positions i / (n + 1), as statsmodels' qqplot
+    data['theoretical'] = stats.norm.ppf((position + 1) / (size + 1))
+    data['sample'] = np.where(std > 0, (values - mean) / np.where(std > 0, std, 1), 0.0)
+    data['cell'] = groups.ngroup().to_numpy()
+    step = np.maximum(1, np.ceil(size / max_points)).astype(int)
+    keep = (position % step == 0) | (position == size - 1)
+    return data.loc[keep, cells + ['cell', 'theoretical', 'sample']].reset_index(drop=True)
+
+
+def render_page(points, path, cells, title='', columns=COLUMNS, dpi=100):
+    """One page of Q-Q subplots, one per cell in points"""
+    codes = points['cell'].to_numpy()
+    cell_codes, starts = np.unique(codes, return_index=True)
+    stops = np.append(starts[1:], len(codes))
+    labels = points.iloc[starts][cells].astype(str).agg(', '.join, axis=1).to_numpy()
+    theoretical, sample = points['theoretical'].to_numpy(), points['sample'].to_numpy()
+
+    columns = min(columns, len(cell_codes))
+    rows = math.ceil(len(cell_codes) / columns)
+    fig, axes = plt.subplots(rows, columns, figsize=(3 * columns, 2.6 * rows), sharex=True, sharey=True,
+                             squeeze=False)
+    limit = np.abs(theoretical).max() if len(codes) else 1  # 45° reference over the normal quantiles
+    for ax, start, stop, label in zip(axes.flat, starts, stops, labels):
+        ax.scatter(theoretical[start:stop], sample[start:stop], s=6, alpha=0.7)
+        ax.plot([-limit, limit], [-limit, limit], color='red', linewidth=0.8)
+        ax.set_title(label, fontsize=8)
+    for ax in axes.flat[len(cell_codes):]:
+        ax.set_visible(False)
+    for ax in axes[-1]:
+        ax.set_xlabel('Theoretical quantiles', fontsize=8)
+    for ax in axes[:, 0]:
+        ax.set_ylabel('Standardized sample', fontsize=8)
+    if title:
+        fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+
+
+def page_path(path, page):
+    """path for the first page, then name_p2.png, name_p3.png, ..."""
+    if page == 0:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_p{page + 1}{ext}"
+
+
+def remove_stale_pages(path, pages):
+    """Delete the name_pN pages of path beyond the first `pages`, left by a larger grid"""
+    stem, ext = os.path.splitext(path)
+    pattern = re.compile(re.escape(os.path.basename(stem)) + r'_p(\d+)' + re.escape(ext) + '$')
+    for page in glob.glob(f"{glob.escape(stem)}_p*{ext}"):
+        match = pattern.match(os.path.basename(page))
+        if match and int(match.group(1)) > pages:
+            os.remove(page)
+
+
+def qq_figures(df, cells, path, value='Normalized_ns', title='', per_page=PER_PAGE, max_points=MAX_POINTS):
+    """plot_pipeline Figures of the Q-Q grid of every cell, per_page cells per page (pages
+    of an earlier, larger grid are deleted)"""
+    points = qq_points(df, list(cells), value, max_points)
+    cell_count = int(points['cell'].max()) + 1 if len(points) else 0
+    remove_stale_pages(path, math.ceil(cell_count / per_page))
+    figures = []
+    for page, first in enumerate(range(0, cell_count, per_page)):
+        rows = points['cell'].between(first, first + per_page - 1)
+        page_title = f"{title} ({page + 1}/{math.ceil(cell_count / per_page)})" if cell_count > per_page else title
+        figures.append(plot_pipeline.Figure(page_path(path, page), render_page,
+                                            points[rows].reset_index(drop=True), cells=list(cells), title=page_title))
+    return figures
@@ -0,0 +1,331 @@
+import argparse
+import glob
+import importlib.util
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+import log_reader
+import perf_counters
+import run_log
+import sheet_cache
+
+# Columnar store for every benchmark result. The ingest step reads the Excel workbooks,
+# the results/*.txt logs and the raw javaresults_*.txt / results_python.txt logs once
+# (logs are streamed in chunks by log_reader.py), normalizes them to one typed schema and
+# writes them partitioned by processor and language. The analysis scripts then read only
+# the partitions and columns they need. Hardware counters are kept as float columns (NaN
+# where a source has none); warm-up rows of the Java batch mode are never stored. The CSV
+# written by run_experiment.py is ingested too, its completed runs only.
+#
+#   python results_store.py                          # ingest the default sources
+#   python results_store.py new_run.txt --processor "Ryzen 9" --append
+
+DEFAULT_STORE = 'results_store'
+
+# Default sources and the processor each one was measured on (None: use --processor).
+# The "tiempos de ejecucion ryzen 9 n=*.xlsx" workbooks are left out: n=15_combined is
+# data/tr9.xlsx and n=5 / n=10 are its two halves, so they would store every Ryzen 9 row again.
+DEFAULT_SOURCES = [
+    ('data/tr5.xlsx', 'Ryzen 5'),
+    ('data/tr9.xlsx', 'Ryzen 9'),
+    ('results/*.txt', None),
+    ('javaresults_*.txt', None),
+    ('results_python.txt', None),
+    ('experiment_results.csv', None),
+]
+
+COUNTER_COLUMNS = perf_counters.COUNTER_NAMES
+SCHEMA = ['processor', 'language', 'data_type', 'version', 'n', 'sample', 'time_s', 'normalized_ns',
+          'threads', 'isa', 'source', 'sheet'] + COUNTER_COLUMNS
+CATEGORY_COLUMNS = ['processor', 'language', 'data_type', 'version', 'isa', 'source', 'sheet']
+PARTITION_COLUMNS = ['processor', 'language']
+
+# Header names seen in the workbooks and logs, lower-cased, mapped to the schema
+COLUMN_ALIASES = {
+    'ver': 'version', 'version': 'version',
+    'typedata': 'data_type', 'type': 'data_type', 'data_type': 'data_type',
+    'isa': 'isa',
+    '#sample': 'sample', 'sample': 'sample',
+    'n': 'n',
+    'time(s)': 'time_s', 'time_s': 'time_s', 'time': 'time_s',
+    'normalized(ns)': 'normalized_ns', 'normalized_ns': 'normalized_ns', 'normalized': 'normalized_ns',
+    'normalized (ns)': 'normalized_ns',
+    'threads': 'threads',
+    'warmup': 'warmup',
+    **{name.lower(): name for name in COUNTER_COLUMNS},
+}
+# Column order of the benchmark programs' TSV rows, for sheets and logs without a header
+POSITIONAL_COLUMNS = ['version', 'data_type', 'isa', 'sample', 'n', 'time_s', 'normalized_ns', 'threads']
+
+LANGUAGE_PATTERNS = [
+    (re.compile(r'codigo\s*c\b|c\+\+|\bcpp\b', re.IGNORECASE), 'Cpp'),
+    (re.compile(r'java', re.IGNORECASE), 'Java'),
+    (re.compile(r'python|\bpy\b|^py_', re.IGNORECASE), 'Python'),
+]
+VERSION_IN_SHEET = re.compile(r'ver\(?([a-h])\)?', re.IGNORECASE)
+VERSION_IN_CELL = re.compile(r'([a-h])\)?\s*$', re.IGNORECASE)
+DATA_TYPE_IN_NAME = re.compile(r'\b(float|double)\b', re.IGNORECASE)
+
+
+def infer_processor(path, default=None):
+    """Processor a source file was measured on, from its name"""
+    name = os.path.basename(path).lower()
+    if 'tr5' in name or 'ryzen 5' in name:
+        return 'Ryzen 5'
+    if 'tr9' in name or 'ryzen 9' in name:
+        return 'Ryzen 9'
+    return default
+
+
+def language_of(text):
+    for pattern, language in LANGUAGE_PATTERNS:
+        if pattern.search(text):
+            return language
+    return None
+
+
+def to_number(values):
+    """Numeric column from cells that may hold numbers or strings with decimal commas"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    return pd.to_numeric(values.astype(str).str.strip().str.replace(',', '.', regex=False), errors='coerce')
+
+
+def normalize_rows(raw, source, processor, sheet=''):
+    """Map a raw frame (header=None) of benchmark rows to the store schema; rows that are
+    not results (headers, blank or malformed lines) are dropped"""
+    raw = raw.dropna(how='all')
+    if raw.empty:
+        return pd.DataFrame(columns=SCHEMA)
+
+    # Header row if the sheet has one, otherwise the column order of the TSV output
+    first = [str(cell).strip().lower() for cell in raw.iloc[0]]
+    if first[0] in ('ver', 'version'):
+        names = [COLUMN_ALIASES.get(cell) for cell in first]
+        raw = raw.iloc[1:]
+    else:
+        names = POSITIONAL_COLUMNS[:raw.shape[1]]
+    columns = {name: raw.iloc[:, i] for i, name in enumerate(names) if name}
+    return normalize_columns(columns, raw.index, source, processor, sheet)
+
+
+def normalize_columns(columns, index, source, processor, sheet=''):
+    """Store-schema frame from a dict of named columns (COLUMN_ALIASES' targets)"""
+    if 'version' not in columns or 'normalized_ns' not in columns:
+        return pd.DataFrame(columns=SCHEMA)
+    if 'warmup' in columns:
+        timed = (to_number(columns['warmup']) != 1).to_numpy()
+        columns = {name: values[timed] for name, values in columns.items()}
+        index = index[timed]
+
+    ver = columns['version'].astype(str).str.strip()
+    df = pd.DataFrame(index=index)
+
+    # Sheet names win over cells: some sheets hold rows copied from another version
+    sheet_version = VERSION_IN_SHEET.search(sheet)
+    if sheet_version:
+        df['version'] = sheet_version.group(1).lower()
+    else:
+        df['version'] = ver.str.extract(VERSION_IN_CELL, expand=False).str.lower()
+    sheet_language = language_of(sheet)
+    if sheet_language:
+        df['language'] = sheet_language
+    elif sheet.lower().startswith('hoja'):
+        df['language'] = 'Python'  # tr5.xlsx keeps Python versions b-f in "Hoja 7".."Hoja 11"
+    else:
+        df['language'] = ver.map(language_of)
+
+    if 'data_type' in columns:
+        df['data_type'] = columns['data_type'].astype(str).str.strip().str.lower()
+    else:
+        match = DATA_TYPE_IN_NAME.search(sheet or source)
+        df['data_type'] = match.group(1).lower() if match else None
+    df['n'] = to_number(columns['n']) if 'n' in columns else np.nan
+    df['sample'] = to_number(columns['sample']) if 'sample' in columns else np.nan
+    df['time_s'] = to_number(columns['time_s']) if 'time_s' in columns else np.nan
+    df['normalized_ns'] = to_number(columns['normalized_ns'])
+    df['threads'] = to_number(columns['threads']) if 'threads' in columns else 1
+    df['isa'] = columns['isa'].astype(str).str.strip() if 'isa' in columns else 'x64'
+    for name in COUNTER_COLUMNS:
+        df[name] = to_number(columns[name]) if name in columns else np.nan
+    df['processor'] = processor
+    df['source'] = source
+    df['sheet'] = sheet
+
+    df = df.dropna(subset=['version', 'language', 'normalized_ns', 'n'])
+    df = df[df['data_type'].isin(['float', 'double'])]
+    return as_schema(df)
+
+
+def as_schema(df):
+    """Column order and compact dtypes of the store"""
+    df = df[SCHEMA].copy()
+    df['n'] = df['n'].astype('int32')
+    df['sample'] = df['sample'].fillna(-1).astype('int32')
+    df['threads'] = df['threads'].fillna(1).astype('int16')
+    df['time_s'] = df['time_s'].astype('float64')
+    df['normalized_ns'] = df['normalized_ns'].astype('float64')
+    for column in COUNTER_COLUMNS:
+        df[column] = df[column].astype('float64')
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype(str).astype('category')
+    return df.reset_index(drop=True)
+
+
+def read_workbook(path, processor):
+    """All result sheets of a workbook, parsed in a single pass over the file"""
+    sheets = sheet_cache.read_sheets(path, header=None)
+    frames = [normalize_rows(raw, path, processor, sheet) for sheet, raw in sheets.items()]
+    frames = [frame for frame in frames if not frame.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=SCHEMA)
+
+
+def read_log(path, processor):
+    """Benchmark rows of a TSV log in normalized chunks, streamed by log_reader"""
+    for chunk in log_reader.read_chunks(path):
+        yield normalize_columns({name: chunk[name] for name in chunk.columns}, chunk.index, path, processor)
+
+
+def read_experiment_csv(path, processor):
+    """Completed runs of a run_experiment.py output CSV in normalized chunks (repetition r
+    is sample r - 1; the CSV has no thread count, so threads is 1)"""
+    for chunk in pd.read_csv(path, chunksize=log_reader.CHUNK_ROWS, encoding='utf-8'):
+        chunk = chunk[chunk['Status'] == run_log.COMPLETED]
+        if chunk.empty:
+            continue
+        columns = {
+            'version': chunk['Lenguaje'].astype(str) + '_ver(' + chunk['Algoritmo'].astype(str) + ')',
+            'data_type': chunk['Tipo Dato'],
+            'n': chunk['Tamaño N'],
+            'sample': to_number(chunk['Repeticion']) - 1,
+            'time_s': to_number(chunk['Tiempo (ms)']) / 1000.0,
+            'normalized_ns': chunk['Normalized (ns)'] if 'Normalized (ns)' in chunk else pd.Series(np.nan, chunk.index),
+        }
+        columns.update({name: chunk[name] for name in COUNTER_COLUMNS if name in chunk})
+        yield normalize_columns(columns, chunk.index, path, processor)
+
+
+def read_source(path, processor):
+    """Normalized frames of one source: the whole workbook, or one per chunk of a log or
+    an experiment CSV"""
+    if path.lower().endswith(('.xlsx', '.xls')):
+        yield read_workbook(path, processor)
+    elif path.lower().endswith('.csv'):
+        yield from read_experiment_csv(path, processor)
+    else:
+        yield from read_log(path, processor)
+
+
+def expand_sources(patterns, default_processor):
+    """(path, processor) for every file matched by the source patterns"""
+    sources = []
+    for pattern, processor in patterns:
+        for path in sorted(glob.glob(pattern)):
+            sources.append((path.replace(os.sep, '/'), processor or infer_processor(path, default_processor)))
+    return sources
+
+
+def parquet_available():
+    return any(importlib.util.find_spec(engine) for engine in ('pyarrow', 'fastparquet'))
+
+
+def _partition_dir(store, values):
+    return os.path.join(store, *(f"{column}={value}" for column, value in zip(PARTITION_COLUMNS, values)))
+
+
+def write_store(df, store=DEFAULT_STORE, append=False):
+    """Write the frame partitioned by processor and language. Parquet when pyarrow or
+    fastparquet is installed, pickle otherwise (same dtypes, readable only from pandas)"""
+    if not append and os.path.isdir(store):
+        shutil.rmtree(store)
+    use_parquet = parquet_available()
+    for values, part in df.groupby(PARTITION_COLUMNS, observed=True):
+        directory = _partition_dir(store, values)
+        os.makedirs(directory, exist_ok=True)
+        index = len(glob.glob(os.path.join(directory, 'part-*')))
+        if use_parquet:
+            part.to_parquet(os.path.join(directory, f"part-{index:05d}.parquet"), index=False)
+        else:
+            part.to_pickle(os.path.join(directory, f"part-{index:05d}.pkl"))
+
+
+def store_exists(store=DEFAULT_STORE):
+    return bool(glob.glob(os.path.join(store, '*', '*', 'part-*')))
+
+
+def iter_partitions(store=DEFAULT_STORE, columns=None, **filters):
+    """Yield the store one partition file at a time, keeping only rows whose columns match
+    the filters (a value or a list of values). Processor and language filters skip whole
+    partitions without reading them"""
+    filters = {key: value if isinstance(value, (list, tuple, set)) else [value]
+               for key, value in filters.items()}
+    for path in sorted(glob.glob(os.path.join(store, '*', '*', 'part-*'))):
+        parts = dict(part.split('=', 1) for part in os.path.relpath(path, store).split(os.sep)[:2])
+        if any(key in filters and parts[key] not in filters[key] for key in PARTITION_COLUMNS):
+            continue
+        if path.endswith('.parquet'):
+            frame = pd.read_parquet(path, columns=columns and list(dict.fromkeys(columns + list(filters))))
+        else:
+            frame = pd.read_pickle(path)
+        for key, values in filters.items():
+            frame = frame[frame[key].isin(values)]
+        # Stores written before a column was added read it as NaN
+        yield frame.reindex(columns=SCHEMA if columns is None else columns)
+
+
+def load_results(store=DEFAULT_STORE, columns=None, **filters):
+    """Read the store into one frame; see iter_partitions for the filters"""
+    frames = list(iter_partitions(store, columns, **filters))
+    if not frames:
+        return pd.DataFrame(columns=columns or SCHEMA)
+    df = pd.concat(frames, ignore_index=True)
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(str).astype('category')
+    return df
+
+
+def ingest(sources, store=DEFAULT_STORE, append=False):
+    """Read every source and write the normalized rows to the store, one chunk at a time"""
+    if not append and os.path.isdir(store):
+        shutil.rmtree(store)
+    total = 0
+    for path, processor in sources:
+        rows = 0
+        try:
+            for frame in read_source(path, processor or 'unknown'):
+                if not frame.empty:
+                    write_store(frame, store, append=True)
+                    rows += len(frame)
+        except Exception as e:
+            print(f"Error reading {path}: {str(e)}")
+            continue
+        print(f"{path}: {rows} rows ({processor or 'unknown'})")
+        total += rows
+    if not total:
+        print("No results found")
+        return 0
+    print(f"Wrote {total} rows to {store} ({'parquet' if parquet_available() else 'pickle'})")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest benchmark results into the columnar store")
+    parser.add_argument('sources', nargs='*',
+                        help="Workbooks, TSV logs or run_experiment.py CSVs (default: the project's result files)")
+    parser.add_argument('--store', default=DEFAULT_STORE)
+    parser.add_argument('--processor', default='unknown',
+                        help="Processor for sources whose name does not identify it")
+    parser.add_argument('--append', action='store_true', help="Add to the store instead of rebuilding it")
+    args = parser.parse_args()
+
+    patterns = [(source, None) for source in args.sources] if args.sources else DEFAULT_SOURCES
+    ingest(expand_sources(patterns, args.processor), args.store, args.append)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,28 +12,27 @@ if (-not (Test-Path $resultsDir)) {
 # Function to run Python tests
 function Run-PythonTests {
     Write-Host "Running Python tests..."
-    foreach ($n in $matrixSizes) {
-        Write-Host "Running tests for matrix size $n..."
-        $output = python matrixProduct_Six_versions_python.py $n $samples
-        
-        # Process output and distribute to appropriate files
-        $output | ForEach-Object {
-            $line = $_
-            if ($line -match "Py_ver\(([A-F])\).*?(double|float)") {
-                $ver = $matches[1]
-                $type = $matches[2]
-                $filePath = Join-Path $resultsDir "Py_ver_${ver}_${type}.txt"
-                
-                # Create file with header if it doesn't exist
-                if (-not (Test-Path $filePath)) {
-                    "ver`ttypeData`tISA`t#sample`tn`ttime(s)`tNormalized(ns)" | Out-File -FilePath $filePath
-                }
-                
-                $line | Out-File -FilePath $filePath -Append
+    Write-Host "Running tests for matrix sizes $($matrixSizes -join ', ')..."
+    # Sweep mode: all sizes and versions in one Python process
+    $output = python matrixProduct_Six_versions_python.py --sizes ($matrixSizes -join ',') --samples $samples --versions ($versions -join '')
+
+    # Process output and distribute to appropriate files
+    $output | ForEach-Object {
+        $line = $_
+        if ($line -match "Py_ver\(([A-H])\).*?(double|float)") {
+            $ver = $matches[1]
+            $type = $matches[2]
+            $filePath = Join-Path $resultsDir "Py_ver_${ver}_${type}.txt"
+            
+            # Create file with header if it doesn't exist
+            if (-not (Test-Path $filePath)) {
+                "ver`ttypeData`tISA`t#sample`tn`ttime(s)`tNormalized(ns)`tthreads" | Out-File -FilePath $filePath
             }
+            
+            $line | Out-File -FilePath $filePath -Append
         }
-        Write-Host "Completed tests for matrix size $n"
     }
+    Write-Host "Completed tests for matrix sizes $($matrixSizes -join ', ')"
 }
 
 # Main execution
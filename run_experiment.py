@@ -0,0 +1,559 @@
+import argparse
+import csv
+import math
+import os
+import queue
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import c_kernels
+import perf_counters
+from run_log import CENSORED, COMPLETED, FINAL_STATUSES, RunLog, default_log_path, run_key
+
+# Cross-platform replacement for script.ps1: builds the same randomized full factorial
+# design (Algorithm x N x Data Type x Language x Repetition), runs every program through
+# a bounded worker pool and appends each result to the CSV as soon as it arrives.
+
+# --- Default factor levels (same as script.ps1) ---
+ALGORITHMS = ['a', 'b', 'c', 'd', 'e', 'f']
+MATRIX_SIZES = [64, 128, 256, 512, 1024, 1500, 2048, 3000, 4096, 5000, 6000, 8192, 10000]
+DATA_TYPES = ['float', 'double']
+LANGUAGES = ['C++', 'Python', 'Java']
+REPETITIONS = 10
+
+# Adaptive sampling: same confidence and relative error as the sample size check in tr9.py
+Z_95 = 1.96
+TARGET_ERROR = 3.0  # %
+
+CSV_COLUMNS = [
+    'Order Standard UniqueCombo', 'Algoritmo', 'Tamaño N', 'Tipo Dato', 'Lenguaje',
+    'Repeticion', 'Order Ejecucion', 'Tiempo (ms)', 'Normalized (ns)', 'Status', 'Censored',
+    'Wall (s)'
+] + perf_counters.COUNTER_NAMES + ['CommandExecuted', 'OutputRaw']
+
+JAVA_CLASSES = {'float': 'MatrixProductFloat', 'double': 'MatrixProductDouble'}
+KILL_GRACE = 5.0  # seconds a timed-out run's processes get to exit after SIGTERM
+
+
+def build_design(algorithms, sizes, data_types, languages, repetitions, rng=None):
+    """Generate the full factorial design and assign a randomized execution order"""
+    design = []
+    unique_combo = 1
+    for alg in algorithms:
+        for n in sizes:
+            for data_type in data_types:
+                for lang in languages:
+                    for rep in range(1, repetitions + 1):
+                        design.append({
+                            'Order Standard UniqueCombo': unique_combo,
+                            'Algoritmo': alg,
+                            'Tamaño N': n,
+                            'Tipo Dato': data_type,
+                            'Lenguaje': lang,
+                            'Repeticion': rep,
+                        })
+                    unique_combo += 1
+
+    (rng or random.Random()).shuffle(design)
+    for order, run in enumerate(design, start=1):
+        run['Order Ejecucion'] = order
+    return design
+
+
+def build_command(run, config):
+    """Build the command line that executes a single sample of one run"""
+    alg = run['Algoritmo'].upper()
+    n = str(run['Tamaño N'])
+    data_type = run['Tipo Dato']
+    options = ['-t', str(config.tile), '-p', str(config.threads), '-v', alg]
+
+    if run['Lenguaje'] == 'C++':
+        exe = os.path.join(config.cpp_dir, f"cpp_{data_type}" + ('.exe' if os.name == 'nt' else ''))
+        return [exe, n, '1'] + options
+    if run['Lenguaje'] == 'Java':
+        return ['java', '-cp', config.java_classpath, JAVA_CLASSES[data_type], n, '1'] + options
+    if run['Lenguaje'] == 'Python':
+        command = [sys.executable, config.python_script, n, '1',
+                   '--versions', alg, '--dtypes', data_type, '--backend', config.python_backend,
+                   '--tile', str(config.tile), '--threads', str(config.threads)]
+        if config.counters:
+            command.append('--counters')
+        return command
+    raise ValueError(f"Unknown language specified: {run['Lenguaje']}")
+
+
+def parse_result(output, alg):
+    """Return (seconds, normalized ns, hardware counters) from the TSV row of the requested
+    version; counters the program did not report are None"""
+    header = None
+    for line in output.splitlines():
+        fields = line.strip().split('\t')
+        if fields[0] == 'ver':
+            header = fields
+            continue
+        if header is None or len(fields) < len(header) or not fields[0].upper().endswith(f"({alg.upper()})"):
+            continue
+        row = dict(zip(header, fields))
+        if row.get('warmup') == '1':
+            continue  # warm-up rows of the Java batch mode are never samples
+        # Java formats numbers with the default locale, so "0,0025" is possible
+        seconds = float(row['time(s)'].replace(',', '.'))
+        normalized = float(row['Normalized(ns)'].replace(',', '.'))
+        counts = {name: int(row[name]) if row.get(name, 'NA') != 'NA' else None
+                  for name in perf_counters.COUNTER_NAMES}
+        return seconds, normalized, counts
+    return None
+
+
+# Worker slot of the calling pool thread: slots outlive the pools of the adaptive rounds
+_worker = threading.local()
+
+
+def run_command(command, timeout=None):
+    """Run a program in its own process group and return (returncode, stdout, stderr). On
+    timeout the whole group is stopped, pool workers of a --threads run included, and
+    TimeoutExpired is raised"""
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                               start_new_session=True)
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_group(process)
+        raise
+    return process.returncode, stdout, stderr
+
+
+def kill_group(process):
+    """Stop a process and everything in its process group"""
+    if not hasattr(os, 'killpg'):
+        process.kill()
+        process.communicate()
+        return
+    # SIGTERM first: multiprocessing's resource tracker ignores it and unlinks the shared
+    # memory of the stopped run once its parent is gone
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            pass
+        try:
+            process.communicate(timeout=KILL_GRACE)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+    process.communicate()
+
+
+def pin_worker(slots):
+    """Take a worker slot and pin the calling thread to the slot's CPUs (one per kernel
+    thread); processes it launches inherit the mask"""
+    _worker.slot, cpus = slots.get()
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+
+
+# Per-worker NumPy buffers for --cpp-mode library, allocated once for the largest N
+_buffers = threading.local()
+_counters_warned = threading.Event()
+
+
+def run_in_process(run, config):
+    """Time one C sample in-process through the shared library; returns (seconds,
+    normalized ns, hardware counters)"""
+    kernels = config.c_kernels[run['Tipo Dato']]
+    cache = getattr(_buffers, 'matrices', None)
+    if cache is None:
+        cache = _buffers.matrices = {}
+    if run['Tipo Dato'] not in cache:
+        cache[run['Tipo Dato']] = c_kernels.allocate_matrices(config.max_n, run['Tipo Dato'])
+    A, B, C = cache[run['Tipo Dato']]
+    # perf_event counters belong to the thread that opens them
+    counters = None
+    if config.counters:
+        counters = getattr(_buffers, 'counters', None)
+        if counters is None:
+            counters = _buffers.counters = perf_counters.Counters()
+    n = int(run['Tamaño N'])
+    seconds = kernels.time_sample(run['Algoritmo'], n, A, B, C, counters)
+    counts = counters.read() if counters is not None else {}
+    missing = [name for name, value in counts.items() if value is None]
+    if missing and not _counters_warned.is_set():
+        _counters_warned.set()
+        reasons = ', '.join(f"{name} ({counters.errors.get(name, 'not counted')})" for name in missing)
+        print(f"Warning: counters unavailable, writing NA: {reasons}", file=sys.stderr)
+    return seconds, (seconds * 1.0e9) / (n * n * n), counts
+
+
+class JavaSession:
+    """One warm JVM running MatrixProduct<Type> --batch, fed one job per run on stdin"""
+
+    def __init__(self, data_type, config):
+        self.command = ['java', '-cp', config.java_classpath, JAVA_CLASSES[data_type], '--batch',
+                        '-t', str(config.tile), '-p', str(config.threads), '-w', str(config.java_warmup)]
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, text=True, bufsize=1)
+        self.timed_out = False
+        self.header = ''
+        for line in self.process.stdout:
+            if line.startswith('ver\t'):
+                self.header = line
+                break
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def _kill(self):
+        self.timed_out = True
+        self.process.kill()
+
+    def run_job(self, alg, n, timeout=None):
+        """Run one sample of one version and return the job output, header included"""
+        self.process.stdin.write(f"{alg} {n} 1\n")
+        self.process.stdin.flush()
+        timer = threading.Timer(timeout, self._kill) if timeout else None
+        if timer:
+            timer.start()
+        lines = [self.header]
+        try:
+            for line in self.process.stdout:
+                if not line.strip():
+                    break  # a blank line closes the job
+                lines.append(line)
+        finally:
+            if timer:
+                timer.cancel()
+        if self.timed_out:
+            raise subprocess.TimeoutExpired(self.command, timeout)
+        return ''.join(lines)
+
+    def close(self):
+        if self.alive():
+            try:
+                self.process.stdin.write("quit\n")
+                self.process.stdin.close()
+                self.process.wait(timeout=10)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+
+
+# Warm JVMs for --java-mode batch, one per worker slot and data type. Keyed by slot rather
+# than thread, so every round of --adaptive (a new pool) reuses the warm JVMs on the same
+# CPUs; a slot is held by one pool thread at a time.
+_java_sessions = {}
+_java_sessions_lock = threading.Lock()
+
+
+def java_session(data_type, config):
+    """The calling worker's JVM for a data type, (re)started if it is not running"""
+    key = (getattr(_worker, 'slot', None), data_type)
+    with _java_sessions_lock:
+        session = _java_sessions.get(key)
+    if session is None or not session.alive():
+        if session is not None:
+            session.close()
+        session = JavaSession(data_type, config)
+        with _java_sessions_lock:
+            _java_sessions[key] = session
+    return session
+
+
+def close_java_sessions():
+    with _java_sessions_lock:
+        for session in _java_sessions.values():
+            session.close()
+        _java_sessions.clear()
+
+
+def design_key(run):
+    return run_key(run['Algoritmo'], run['Tamaño N'], run['Tipo Dato'], run['Lenguaje'], run['Repeticion'])
+
+
+def execute_run(run, config, log):
+    """Execute one run of the design and return its result row"""
+    log.start(design_key(run))
+    result = dict(run)
+    result['Tiempo (ms)'] = None
+    result['Normalized (ns)'] = None
+    result['Censored'] = False
+    result['OutputRaw'] = ''
+    start = time.perf_counter()
+    try:
+        if run['Lenguaje'] == 'C++' and config.cpp_mode == 'library':
+            kernels = config.c_kernels[run['Tipo Dato']]
+            result['CommandExecuted'] = f"{kernels.path}:ProductMat_{run['Algoritmo'].lower()}({run['Tamaño N']})"
+            parsed = run_in_process(run, config)
+            returncode, output = 0, ''
+        elif run['Lenguaje'] == 'Java' and config.java_mode == 'batch':
+            session = java_session(run['Tipo Dato'], config)
+            alg, n = run['Algoritmo'].upper(), run['Tamaño N']
+            result['CommandExecuted'] = f"{' '.join(session.command)} <<< '{alg} {n} 1'"
+            output = session.run_job(alg, n, config.timeout)
+            parsed = parse_result(output, alg)
+            returncode = 0 if session.alive() else session.process.returncode
+        else:
+            command = build_command(run, config)
+            result['CommandExecuted'] = ' '.join(command)
+            returncode, stdout, stderr = run_command(command, config.timeout)
+            parsed = parse_result(stdout, run['Algoritmo'])
+            output = stdout + stderr
+        if returncode == 0 and parsed is not None:
+            seconds, normalized, counts = parsed
+            result.update(counts)
+            result['Tiempo (ms)'] = seconds * 1000.0
+            result['Normalized (ns)'] = normalized
+            result['Status'] = COMPLETED
+        else:
+            # Program ran but output wasn't a valid row for this version
+            result['Status'] = 'Output Error'
+            result['OutputRaw'] = output.strip()
+    except subprocess.TimeoutExpired:
+        # Censored measurement: the run takes at least the timeout, record that bound
+        result['Status'] = CENSORED
+        result['Censored'] = True
+        result['Tiempo (ms)'] = config.timeout * 1000.0
+    except Exception as e:
+        result['Status'] = 'Execution Error'
+        result['Tiempo (ms)'] = -1
+        result['OutputRaw'] = str(e)
+        result.setdefault('CommandExecuted', '')
+    result['Wall (s)'] = round(time.perf_counter() - start, 3)
+    log.finish(design_key(run), result['Status'])
+    return result
+
+
+def run_design(design, config, log, writer, out_file):
+    """Run the design through the worker pool, appending each result as it completes;
+    returns the result rows"""
+    # Worker slots with disjoint CPU sets, so the threads of a parallel kernel never share a core
+    slots = queue.Queue()
+    for worker in range(config.workers):
+        slots.put((worker, set(config.cpus[worker * config.threads:(worker + 1) * config.threads])))
+
+    total = len(design)
+    results = []
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=config.workers, initializer=pin_worker, initargs=(slots,)) as pool:
+        futures = [pool.submit(execute_run, run, config, log) for run in design]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results.append(result)
+            with lock:
+                writer.writerow(result)
+                out_file.flush()
+            if result['Status'] != COMPLETED:
+                print(f"Run {result['Order Ejecucion']} ({result['Lenguaje']}, Alg:{result['Algoritmo']}, "
+                      f"N:{result['Tamaño N']}, Type:{result['Tipo Dato']}, Rep:{result['Repeticion']}): "
+                      f"{result['Status']}", file=sys.stderr)
+            print(f"\rExecuting run {done} of {total}", end='', flush=True)
+    print()
+    return results
+
+
+def cell_of(run):
+    return (run['Algoritmo'], int(run['Tamaño N']), run['Tipo Dato'], run['Lenguaje'])
+
+
+def relative_half_width(times):
+    """Half-width of the 95% CI of the mean, as a percentage of the mean; a cell whose
+    samples are all zero is below the timer's resolution and counts as converged"""
+    if len(times) < 2:
+        return math.inf
+    mean = statistics.fmean(times)
+    if mean <= 0:
+        return 0.0 if not any(times) else math.inf
+    return 100.0 * Z_95 * statistics.stdev(times) / math.sqrt(len(times)) / mean
+
+
+def load_history(path):
+    """Rows already written to an output CSV, so a resumed adaptive run keeps its samples"""
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def next_round(design, rows, config, order):
+    """One more repetition for every cell that is still short of the target error and
+    within its budget, in a randomized order"""
+    cells = {}
+    for row in rows:
+        cell = cells.setdefault(cell_of(row), {'times': [], 'reps': 0, 'wall': 0.0, 'errors': 0,
+                                               'censored': False})
+        cell['reps'] = max(cell['reps'], int(row['Repeticion']))
+        cell['wall'] += float(row.get('Wall (s)') or 0)
+        if row['Status'] == COMPLETED:
+            # 'Tiempo (ms)' comes from a %.4f s field that rounds fast runs to 0, the
+            # normalized time is printed from the unrounded seconds; rows of CSVs written
+            # before that column existed have none and are left out of the CI
+            if row.get('Normalized (ns)'):
+                cell['times'].append(float(row['Normalized (ns)']))
+        elif row['Status'] == CENSORED:
+            cell['censored'] = True
+        else:
+            cell['errors'] += 1
+
+    runs = []
+    for template in design:
+        cell = cells.get(cell_of(template))
+        if cell is None or cell['censored'] or cell['errors'] >= config.max_attempts:
+            continue
+        if cell['reps'] >= config.max_repetitions or cell['wall'] >= config.cell_budget:
+            continue
+        if relative_half_width(cell['times']) <= config.target_error:
+            continue
+        run = dict(template)
+        run['Repeticion'] = cell['reps'] + 1
+        runs.append(run)
+
+    config.rng.shuffle(runs)
+    for run in runs:
+        order += 1
+        run['Order Ejecucion'] = order
+    return runs
+
+
+def run_adaptive(design, config, log, writer, out_file, history):
+    """Run the initial repetitions, then keep sampling each cell until its CI is narrow
+    enough, its wall-clock budget is spent or it reaches --max-repetitions"""
+    pending = [run for run in design if log.should_run(design_key(run), config.max_attempts)]
+    results = run_design(pending, config, log, writer, out_file)
+    rows = history + results
+    templates = [run for run in design if run['Repeticion'] == 1]
+    order = max((int(row['Order Ejecucion']) for row in rows), default=0)
+    round_number = 1
+    while True:
+        runs = next_round(templates, rows, config, order)
+        if not runs:
+            return results
+        round_number += 1
+        print(f"Adaptive round {round_number}: {len(runs)} cells above {config.target_error}% error")
+        order += len(runs)
+        new_results = run_design(runs, config, log, writer, out_file)
+        results += new_results
+        rows += new_results
+
+
+def parse_list(value, cast=str):
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the 4-factor matrix multiplication experiment")
+    parser.add_argument('--algorithms', default=','.join(ALGORITHMS))
+    parser.add_argument('--sizes', default=','.join(str(n) for n in MATRIX_SIZES))
+    parser.add_argument('--dtypes', default=','.join(DATA_TYPES))
+    parser.add_argument('--languages', default=','.join(LANGUAGES))
+    parser.add_argument('--repetitions', type=int, default=REPETITIONS)
+    parser.add_argument('--seed', type=int, default=None, help="Seed for the randomized execution order")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Runs executed at the same time (default: %(default)s)")
+    parser.add_argument('--cpus', default=None,
+                        help="CPUs to pin the workers to, --threads consecutive CPUs per worker, e.g. "
+                             "2,3,4,5 (default: the last --workers x --threads CPUs)")
+    parser.add_argument('--tile', type=int, default=32, help="Tile size for versions g and h")
+    parser.add_argument('--threads', type=int, default=1, help="Threads per kernel")
+    parser.add_argument('--cpp-dir', default='cpp_build', help="Directory with cpp_float / cpp_double")
+    parser.add_argument('--cpp-mode', default='process', choices=['process', 'library'],
+                        help="process: launch cpp_<dtype> per run; library: call the kernels in-process "
+                             "from libmatmul_<dtype> (built in --cpp-dir if missing; --timeout does not apply)")
+    parser.add_argument('--compiler', default='gcc', help="Compiler for --cpp-mode library")
+    parser.add_argument('--java-classpath', default='.', help="Classpath with MatrixProductFloat/Double")
+    parser.add_argument('--java-mode', default='process', choices=['process', 'batch'],
+                        help="process: one JVM per run; batch: one warm JVM per worker fed jobs on stdin")
+    parser.add_argument('--java-warmup', type=int, default=3,
+                        help="Unrecorded warm-up iterations per job in --java-mode batch (default: %(default)s)")
+    parser.add_argument('--python-script', default='matrixProduct_Six_versions_python.py')
+    parser.add_argument('--python-backend', default='scalar', choices=['scalar', 'vectorized', 'jit'])
+    parser.add_argument('--output', default='experiment_results.csv', help="Path for the output CSV file")
+    parser.add_argument('--counters', action='store_true',
+                        help="Record perf_event hardware counters (Python runs and --cpp-mode library)")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="Seconds before a run is killed and recorded as a censored result")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Start with --repetitions per cell and keep sampling until the 95%% CI "
+                             "half-width is below --target-error")
+    parser.add_argument('--target-error', type=float, default=TARGET_ERROR,
+                        help="Target relative error in %% for --adaptive (default: %(default)s)")
+    parser.add_argument('--cell-budget', type=float, default=math.inf,
+                        help="Wall-clock seconds each cell may use in --adaptive mode")
+    parser.add_argument('--max-repetitions', type=int, default=100,
+                        help="Upper bound on repetitions per cell in --adaptive mode (default: %(default)s)")
+    parser.add_argument('--run-log', default=None,
+                        help="Durable log of run attempts (default: <output>_runlog.jsonl)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip runs the log marks as completed and append to the existing CSV")
+    parser.add_argument('--max-attempts', type=int, default=3,
+                        help="Attempts per run before a failing cell is given up (default: %(default)s)")
+    config = parser.parse_args()
+
+    if config.cpus:
+        config.cpus = parse_list(config.cpus, int)
+    else:
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else list(range(os.cpu_count() or 1))
+        config.cpus = available[-config.workers * config.threads:]
+    if len(config.cpus) < config.workers * config.threads:
+        parser.error("--cpus must list --threads CPUs per worker (--workers x --threads in all)")
+
+    config.rng = random.Random(config.seed)
+
+    print("Generating experimental design matrix...")
+    design = build_design(parse_list(config.algorithms), parse_list(config.sizes, int),
+                          parse_list(config.dtypes), parse_list(config.languages),
+                          config.repetitions, config.rng)
+    print(f"Generated {len(design)} total runs.")
+
+    if config.cpp_mode == 'library' and 'C++' in parse_list(config.languages):
+        config.max_n = max(parse_list(config.sizes, int))
+        config.c_kernels = {}
+        for data_type in parse_list(config.dtypes):
+            path = c_kernels.build_library(data_type, config.cpp_dir, config.compiler)
+            config.c_kernels[data_type] = c_kernels.CKernels(data_type, path, config.threads, config.tile)
+
+    output_dir = os.path.dirname(config.output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    log = RunLog(config.run_log or default_log_path(config.output), resume=config.resume)
+    pending = [run for run in design if log.should_run(design_key(run), config.max_attempts)]
+    if config.resume:
+        done = sum(1 for run in design if design_key(run) in log.completed)
+        print(f"Resuming: {done} runs already completed, "
+              f"{len(design) - done - len(pending)} given up after {config.max_attempts} attempts.")
+
+    print("Starting experiment execution...")
+    append = config.resume and os.path.exists(config.output) and os.path.getsize(config.output) > 0
+    history = load_history(config.output) if append and config.adaptive else []
+    try:
+        with open(config.output, 'a' if append else 'w', newline='', encoding='utf-8') as out_file:
+            writer = csv.DictWriter(out_file, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+            if not append:
+                writer.writeheader()
+                out_file.flush()
+            if config.adaptive:
+                results = run_adaptive(design, config, log, writer, out_file, history)
+            else:
+                results = run_design(pending, config, log, writer, out_file)
+    finally:
+        close_java_sessions()
+        log.close()
+
+    print("Experiment execution finished.")
+    print(f"Results saved to {config.output}")
+    errors = sum(1 for result in results if result['Status'] not in FINAL_STATUSES)
+    censored = sum(1 for result in results if result['Status'] == CENSORED)
+    print(f"Total runs: {len(results)}")
+    if censored:
+        print(f"Runs censored by the {config.timeout}s timeout: {censored}")
+    print(f"Runs with errors or output issues: {errors}")
+    if errors:
+        print("Check the 'Status' column and 'CommandExecuted'/'OutputRaw' for details on failed runs.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import json
+import os
+import threading
+
+# Durable run log shared by run_experiment.py and matrixProduct_Six_versions_python.py.
+# Every run is keyed by (algorithm, N, dtype, language, repetition) and leaves two JSON
+# lines: a "start" before it executes and an "end" with its status afterwards. Each line
+# is fsync'ed, so after a crash the log still says which cells finished, which failed and
+# how many times each one was attempted (a start without an end counts as a failure).
+# A run that hit its timeout is a censored measurement: it is final and never retried.
+
+COMPLETED = 'Completed'
+CENSORED = 'Timeout'
+FINAL_STATUSES = (COMPLETED, CENSORED)
+
+
+def run_key(algorithm, n, dtype, language, repetition):
+    """Normalize the identifying factors of a run into a hashable key"""
+    return (str(algorithm).lower(), int(n), str(dtype), str(language), int(repetition))
+
+
+def default_log_path(output):
+    """Run log that sits next to an output file"""
+    return os.path.splitext(output)[0] + '_runlog.jsonl'
+
+
+class RunLog:
+    """Append-only log of run attempts that survives crashes and restarts"""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.attempts = {}
+        self.completed = set()
+        self._lock = threading.Lock()
+        if resume and os.path.exists(path):
+            self._load()
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _load(self):
+        """Rebuild attempt counts and completed cells from an existing log"""
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                key = run_key(*record['key'])
+                if record['event'] == 'start':
+                    self.attempts[key] = self.attempts.get(key, 0) + 1
+                elif record['event'] == 'end' and record['status'] in FINAL_STATUSES:
+                    self.completed.add(key)
+
+    def should_run(self, key, max_attempts):
+        """True when the cell has no final result and still has attempts left"""
+        return key not in self.completed and self.attempts.get(key, 0) < max_attempts
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def start(self, key):
+        """Record that a run is about to execute"""
+        with self._lock:
+            self.attempts[key] = self.attempts.get(key, 0) + 1
+            self._write({'event': 'start', 'key': list(key)})
+
+    def finish(self, key, status):
+        """Record the final status of a run"""
+        with self._lock:
+            if status in FINAL_STATUSES:
+                self.completed.add(key)
+            self._write({'event': 'end', 'key': list(key), 'status': status})
+
+    def close(self):
+        self._file.close()
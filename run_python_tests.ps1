@@ -8,11 +8,9 @@ if (Test-Path results_python.txt) { Remove-Item results_python.txt }
 # Rename the output file in the Python script
 (Get-Content matrixProduct_Six_versions_python.py) -replace 'ReportS2_LHW00.txt', 'results_python.txt' | Set-Content matrixProduct_Six_versions_python.py
 
-# Run Python version for all matrix sizes
+# Run Python version for all matrix sizes in a single process (sweep mode),
+# in randomized order, streaming each row to results_python.txt as it finishes
 Write-Host "Running Python tests for all matrix sizes..."
-foreach ($size in $matrixSizes) {
-    Write-Host "`nTesting matrix size: $size"
-    python matrixProduct_Six_versions_python.py $size $samples
-}
+python matrixProduct_Six_versions_python.py --sizes ($matrixSizes -join ',') --samples $samples --shuffle --output results_python.txt
 
 Write-Host "`nAll tests completed! Results are saved in results_python.txt" 
\ No newline at end of file
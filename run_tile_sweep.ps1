@@ -0,0 +1,54 @@
+# Tile sizes to sweep for the blocked versions (G = tiled ijk, H = tiled kij).
+# Three double tiles of 32x32 fit in L1 (32 KB), 128x128 in L2 (512 KB),
+# and 512x512 in the L3 slice shared by a CCX on the Ryzen 5 / Ryzen 9 boxes.
+$tileSizes = @(16, 32, 64, 128, 256, 512)
+$matrixSizes = @(512, 1024, 2048, 4096)
+$samples = 5
+$versions = "GH"
+
+# Python is orders of magnitude slower, so it only runs the smaller sizes
+$pythonMatrixSizes = @(512, 1024)
+$pythonBackend = "vectorized"
+
+# Create results directory if it doesn't exist
+$resultsDir = "results_tiles"
+if (-not (Test-Path $resultsDir)) {
+    New-Item -ItemType Directory -Path $resultsDir
+}
+
+# Compile C and Java sources
+Write-Host "Compiling C and Java files..."
+if (-not (Test-Path "cpp_build")) {
+    New-Item -ItemType Directory -Path "cpp_build"
+}
+gcc -O2 -o cpp_build\cpp_float.exe matrixProduct_Six_versions_float.c
+gcc -O2 -o cpp_build\cpp_double.exe matrixProduct_Six_versions_double.c
+javac MatrixProductFloat.java
+javac MatrixProductDouble.java
+
+# Each tile size goes to its own file so the tile is known when loading the results
+foreach ($tile in $tileSizes) {
+    Write-Host "`nTesting tile size: $tile"
+    foreach ($dataType in @('float', 'double')) {
+        $cppFile = Join-Path $resultsDir "Cpp_tile_${tile}_${dataType}.txt"
+        $javaFile = Join-Path $resultsDir "Java_tile_${tile}_${dataType}.txt"
+        if (Test-Path $cppFile) { Remove-Item $cppFile }
+        if (Test-Path $javaFile) { Remove-Item $javaFile }
+
+        $javaClass = if ($dataType -eq 'float') { "MatrixProductFloat" } else { "MatrixProductDouble" }
+        foreach ($size in $matrixSizes) {
+            Write-Host "  $dataType, matrix size: $size"
+            & ".\cpp_build\cpp_$dataType.exe" $size $samples -t $tile -v $versions | Out-File -FilePath $cppFile -Append
+            java $javaClass $size $samples -t $tile -v $versions | Out-File -FilePath $javaFile -Append
+        }
+    }
+
+    $pythonFile = Join-Path $resultsDir "Py_tile_${tile}.txt"
+    if (Test-Path $pythonFile) { Remove-Item $pythonFile }
+    foreach ($size in $pythonMatrixSizes) {
+        Write-Host "  Python ($pythonBackend), matrix size: $size"
+        python matrixProduct_Six_versions_python.py $size $samples --backend $pythonBackend --tile $tile --versions $versions | Out-File -FilePath $pythonFile -Append
+    }
+}
+
+Write-Host "`nAll tile sweeps completed! Results are saved in the '$resultsDir' directory."
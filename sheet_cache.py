@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+# Shared workbook loader with an on-disk cache of parsed sheets, used by the analysis
+# scripts and the results store ingest. Every workbook gets a manifest in the cache
+# directory with its mtime, size and SHA-256 plus one key per sheet:
+#   - same mtime and size: every cached sheet is used without hashing the file
+#   - same content hash (file touched or copied): same, and the manifest is refreshed
+#   - changed content: each sheet's key is recomputed from its own cell values and only
+#     sheets whose key changed are parsed again
+# The read_excel arguments are part of the key, so header=None and header=0 reads of the
+# same sheet are cached separately. Sheets that have to be parsed can be spread over a
+# process pool (openpyxl parsing is CPU-bound); only the parent process writes the cache.
+
+DEFAULT_CACHE_DIR = '.sheet_cache'
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def file_hash(path):
+    """SHA-256 of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _options_key(options):
+    return hashlib.sha1(json.dumps(options, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+def _workbook_sheets(archive):
+    """(sheet name, worksheet member) in workbook order"""
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels.iter(f'{PKG_REL_NS}Relationship')}
+    sheets = []
+    for sheet in workbook.iter(f'{MAIN_NS}sheet'):
+        target = targets[sheet.get(f'{REL_NS}id')].lstrip('/')
+        sheets.append((sheet.get('name'), target if target.startswith('xl/') else 'xl/' + target))
+    return sheets
+
+
+def _shared_strings(archive):
+    """Text of every shared string, by index"""
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    root = ET.fromstring(archive.read('xl/sharedStrings.xml'))
+    return [''.join(t.text or '' for t in si.iter(f'{MAIN_NS}t')) for si in root.iter(f'{MAIN_NS}si')]
+
+
+def _cells_digest(xml, strings):
+    """Hash of a worksheet's cell references and values. Styles and how strings are stored
+    (shared table or inline) do not count, so rewriting the file leaves the key alone"""
+    digest = hashlib.sha256()
+    for cell in ET.fromstring(xml).iter(f'{MAIN_NS}c'):
+        kind = cell.get('t', 'n')
+        value = cell.find(f'{MAIN_NS}v')
+        text = value.text if value is not None and value.text is not None else ''
+        if kind == 's' and text:
+            index = int(text)
+            text = strings[index] if index < len(strings) else ''
+            kind = 'str'
+        elif kind == 'inlineStr':
+            text = ''.join(t.text or '' for t in cell.iter(f'{MAIN_NS}t'))
+            kind = 'str'
+        elif kind == 'n' and text:
+            text = repr(float(text))
+        if not text:
+            continue  # an empty styled cell is not content
+        digest.update(f"{cell.get('r')}\x1f{kind}\x1f{text}\x1e".encode())
+    return digest.hexdigest()
+
+
+def sheet_keys(path, content_hash):
+    """Content key of every sheet, computed from its own cells only, so editing one sheet
+    leaves the keys of the others alone. Files that are not xlsx archives get the
+    whole-file hash for every sheet"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            strings = _shared_strings(archive)
+            return {name: _cells_digest(archive.read(member), strings)
+                    for name, member in _workbook_sheets(archive)}
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        return {name: content_hash for name in pd.ExcelFile(path).sheet_names}
+
+
+class SheetCache:
+    """Parsed sheets of a workbook, cached on disk and reparsed only when they change"""
+
+    def __init__(self, path, cache_dir=DEFAULT_CACHE_DIR):
+        self.path = path
+        self.cache_dir = cache_dir
+        name = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+        self.prefix = os.path.join(cache_dir, name)
+        self.manifest_path = self.prefix + '.json'
+        self.changed = False
+        self.manifest = self._validate()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_manifest(self):
+        if not self.changed:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(temp, self.manifest_path)
+        self.changed = False
+
+    def _validate(self):
+        """Manifest whose sheet keys match the workbook as it is on disk now"""
+        stat = os.stat(self.path)
+        manifest = self._load_manifest()
+        if manifest and manifest['mtime'] == stat.st_mtime and manifest['size'] == stat.st_size:
+            return manifest
+        content_hash = file_hash(self.path)
+        if manifest and manifest['sha256'] == content_hash:
+            manifest.update(mtime=stat.st_mtime, size=stat.st_size)
+        else:
+            keys = sheet_keys(self.path, content_hash)
+            old = manifest['sheets'] if manifest else {}
+            # Keep the cached frames of unchanged sheets, drop those of changed ones
+            sheets = {}
+            for name, key in keys.items():
+                entry = old.get(name)
+                sheets[name] = entry if entry and entry['key'] == key else {'key': key, 'frames': {}}
+            for name, entry in old.items():
+                if sheets.get(name) is not entry:
+                    for frame in entry['frames'].values():
+                        try:
+                            os.remove(os.path.join(self.cache_dir, frame))
+                        except OSError:
+                            pass
+            manifest = {'path': self.path, 'mtime': stat.st_mtime, 'size': stat.st_size,
+                        'sha256': content_hash, 'sheets': sheets}
+        self.manifest = manifest
+        self.changed = True
+        self._save_manifest()
+        return manifest
+
+    @property
+    def sheet_names(self):
+        return list(self.manifest['sheets'])
+
+    def _frame_path(self, name, options):
+        key = self.manifest['sheets'][name]['key']
+        return f"{self.prefix}_{key[:16]}_{_options_key(options)}.pkl"
+
+    def cached(self, name, options):
+        """Cached frame of a sheet, or None when it has to be parsed"""
+        path = self._frame_path(name, options)
+        if _options_key(options) in self.manifest['sheets'][name]['frames'] and os.path.exists(path):
+            return pd.read_pickle(path)
+        return None
+
+    def store(self, name, options, df):
+        """Cache a parsed sheet; save_manifest() makes it visible to later runs"""
+        path = self._frame_path(name, options)
+        df.to_pickle(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        self.manifest['sheets'][name]['frames'][_options_key(options)] = os.path.basename(path)
+        self.changed = True
+
+    def save_manifest(self):
+        self._save_manifest()
+
+    def read(self, sheet_names=None, workers=1, errors=None, **options):
+        """Dict of sheet name -> DataFrame, as pd.read_excel(path, sheet_name=..., **options)"""
+        failed = {} if errors is not None else None
+        frames = read_workbooks([(self, sheet_names)], workers, failed, self.cache_dir, **options)[self.path]
+        if errors is not None:
+            errors.update({sheet: error for (_, sheet), error in failed.items()})
+        return frames
+
+
+def _parse_sheets(path, names, options):
+    """Parse sheets of one workbook; a sheet that fails comes back as its exception"""
+    try:
+        return dict(pd.read_excel(path, sheet_name=list(names), **options))
+    except Exception as e:
+        if len(names) == 1:
+            return {names[0]: e}
+    parsed = {}
+    for name in names:
+        try:
+            parsed[name] = pd.read_excel(path, sheet_name=name, **options)
+        except Exception as e:
+            parsed[name] = e
+    return parsed
+
+
+def read_workbooks(workbooks, workers=1, errors=None, cache_dir=DEFAULT_CACHE_DIR, **options):
+    """Read sheets of several workbooks, parsing the ones that are not cached across a
+    pool of worker processes. workbooks is a list of (path or SheetCache, sheet names or
+    None for all); the result maps each path to {sheet name: DataFrame} in the order asked
+    for. A sheet that fails to parse raises, or with an errors dict is recorded there under
+    (path, sheet name) and left out of the result"""
+    caches, frames, missing = [], {}, []
+    for workbook, names in workbooks:
+        cache = workbook if isinstance(workbook, SheetCache) else SheetCache(workbook, cache_dir)
+        names = cache.sheet_names if names is None else list(names)
+        caches.append((cache, names))
+        for name in names:
+            df = cache.cached(name, options)
+            if df is None:
+                missing.append((cache, name))
+            else:
+                frames[cache.path, name] = df
+
+    # One job per worker and workbook: every job opens the workbook once, then parses a
+    # share of its sheets
+    jobs = []
+    for cache, _ in caches:
+        names = [name for c, name in missing if c is cache]
+        batches = min(workers, len(names))
+        jobs += [(cache, names[i::batches]) for i in range(batches)]
+    parsed = {}
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = [executor.submit(_parse_sheets, cache.path, names, options) for cache, names in jobs]
+            for (cache, names), future in zip(jobs, futures):
+                try:
+                    results = future.result()
+                except Exception as e:  # the worker itself died
+                    results = {name: e for name in names}
+                for name, result in results.items():
+                    parsed[cache, name] = result
+    else:
+        for cache, names in jobs:
+            for name, result in _parse_sheets(cache.path, names, options).items():
+                parsed[cache, name] = result
+
+    for cache, name in missing:
+        result = parsed[cache, name]
+        if isinstance(result, Exception):
+            if errors is None:
+                raise result
+            errors[cache.path, name] = result
+            continue
+        cache.store(name, options, result)
+        frames[cache.path, name] = result
+    for cache, _ in caches:
+        cache.save_manifest()
+
+    return {cache.path: {name: frames[cache.path, name] for name in names if (cache.path, name) in frames}
+            for cache, names in caches}
+
+
+def sheet_names(path, cache_dir=DEFAULT_CACHE_DIR):
+    """Sheet names of a workbook in workbook order"""
+    return SheetCache(path, cache_dir).sheet_names
+
+
+def read_sheets(path, sheet_names=None, cache_dir=DEFAULT_CACHE_DIR, workers=1, errors=None, **options):
+    """Cached equivalent of pd.read_excel(path, sheet_name=None or a list, **options)"""
+    return SheetCache(path, cache_dir).read(sheet_names, workers, errors, **options)
+
+
+def read_sheet(path, sheet_name=0, cache_dir=DEFAULT_CACHE_DIR, **options):
+    """Cached equivalent of pd.read_excel(path, sheet_name=sheet_name, **options)"""
+    cache = SheetCache(path, cache_dir)
+    if isinstance(sheet_name, int):
+        sheet_name = cache.sheet_names[sheet_name]
+    return cache.read([sheet_name], **options)[sheet_name]
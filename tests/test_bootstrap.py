@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import bootstrap
+
+FACTORS = ['processor', 'version']
+
+
+def naive_samples(df, factors, resamples, seed):
+    """Resampled medians cell by cell and resample by resample, from the same uniform draws"""
+    df = df.sort_values(factors + ['Normalized_ns'], kind='stable')
+    values = df['Normalized_ns'].to_numpy()
+    uniforms = np.random.default_rng(seed).random((resamples, len(values)))
+    samples = np.empty((resamples, df.groupby(factors).ngroups))
+    start = 0
+    for cell, (_, group) in enumerate(df.groupby(factors, sort=True)):
+        size = len(group)
+        for r in range(resamples):
+            draws = (uniforms[r, start:start + size] * size).astype(int)
+            samples[r, cell] = np.median(values[start + draws])
+        start += size
+    return samples
+
+
+def test_medians_and_samples_match_naive_loop(benchmark_frame):
+    result = bootstrap.BootstrapMedians(benchmark_frame, FACTORS, resamples=200, seed=3)
+    expected = benchmark_frame.groupby(FACTORS)['Normalized_ns'].median()
+    np.testing.assert_allclose(result.medians, expected.to_numpy())
+    np.testing.assert_allclose(result.samples, naive_samples(benchmark_frame, FACTORS, 200, 3))
+
+
+def test_table_uses_percentiles(benchmark_frame):
+    result = bootstrap.BootstrapMedians(benchmark_frame, FACTORS, resamples=200, seed=3)
+    table = result.table(0.9)
+    np.testing.assert_allclose(table['ci_low'], np.percentile(result.samples, 5, axis=0))
+    np.testing.assert_allclose(table['ci_high'], np.percentile(result.samples, 95, axis=0))
+
+
+def test_ratio_of_processor_medians(benchmark_frame):
+    result = bootstrap.BootstrapMedians(benchmark_frame, FACTORS, resamples=200, seed=3)
+    ratio = result.ratio('processor', 'Ryzen 5', 'Ryzen 9')
+    medians = benchmark_frame.groupby(FACTORS)['Normalized_ns'].median()
+    expected = medians['Ryzen 5'] / medians['Ryzen 9']
+    np.testing.assert_allclose(ratio['ratio'].to_numpy(), expected.to_numpy())
+    assert (ratio['ci_low'] <= ratio['ratio']).all() and (ratio['ratio'] <= ratio['ci_high']).all()
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+import cell_stats
+
+
+def groups(df, factors):
+    return [group['Normalized_ns'].to_numpy() for _, group in df.groupby(factors, observed=True)]
+
+
+@pytest.mark.parametrize('factors', [['version'], ['processor', 'data_type'], cell_stats.FACTORS])
+def test_one_way_matches_scipy(benchmark_frame, factors):
+    result = cell_stats.CellStats(benchmark_frame).one_way(factors)
+    f_stat, p_anova = stats.f_oneway(*groups(benchmark_frame, factors))
+    h_stat, p_kruskal = stats.kruskal(*groups(benchmark_frame, factors))
+    assert result['F'] == pytest.approx(f_stat, rel=1e-9)
+    assert result['p_anova'] == pytest.approx(p_anova, rel=1e-7, abs=1e-300)
+    assert result['H'] == pytest.approx(h_stat, rel=1e-9)
+    assert result['p_kruskal'] == pytest.approx(p_kruskal, rel=1e-7, abs=1e-300)
+
+
+def test_means_match_groupby(benchmark_frame):
+    means = cell_stats.CellStats(benchmark_frame).means('version')
+    expected = benchmark_frame.groupby('version')['Normalized_ns'].mean()
+    np.testing.assert_allclose(means.to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+
+def test_levene_matches_scipy(benchmark_frame):
+    f_stat, p = cell_stats.levene(benchmark_frame, ['version', 'data_type'])
+    expected = stats.levene(*groups(benchmark_frame, ['version', 'data_type']))
+    assert f_stat == pytest.approx(expected.statistic, rel=1e-9)
+    assert p == pytest.approx(expected.pvalue, rel=1e-7)
+
+
+def test_shapiro_by_cell_matches_scipy(benchmark_frame):
+    table = cell_stats.shapiro_by_cell(benchmark_frame)
+    for (key, group), (_, row) in zip(benchmark_frame.groupby(cell_stats.FACTORS), table.iterrows()):
+        expected = stats.shapiro(group['Normalized_ns'])
+        assert row['W'] == pytest.approx(expected.statistic)
+        assert row['p'] == pytest.approx(expected.pvalue)
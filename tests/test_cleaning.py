@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import cleaning
+
+CELLS = ['version', 'data_type']
+
+
+def naive_outliers(df, method, threshold):
+    flags = []
+    for _, group in df.groupby(CELLS, sort=False):
+        x = group['Normalized_ns'].to_numpy()
+        if method == 'mad':
+            deviation = np.abs(x - np.median(x))
+            flagged = deviation / (1.4826 * np.median(deviation)) > threshold
+        elif method == 'iqr':
+            q1, q3 = np.percentile(x, [25, 75])
+            flagged = (x < q1 - threshold * (q3 - q1)) | (x > q3 + threshold * (q3 - q1))
+        else:
+            flagged = np.abs(x - x.mean()) > threshold * x.std()
+        flags.append(group.index[flagged])
+    return set(np.concatenate(flags))
+
+
+@pytest.mark.parametrize('method', ['mad', 'iqr', 'sigma'])
+def test_outlier_flags_match_per_cell_rules(benchmark_frame, method):
+    df = benchmark_frame.copy()
+    df.loc[df.index[::17], 'Normalized_ns'] *= 4  # a few spikes
+    flagged = cleaning.flag(df, CELLS, method=method, threshold=cleaning.METHODS[method])
+    assert set(flagged.index[flagged['outlier']]) == naive_outliers(df, method, cleaning.METHODS[method])
+
+
+def test_default_keeps_every_row(benchmark_frame):
+    cleaned = cleaning.clean(benchmark_frame, CELLS)
+    assert len(cleaned) == len(benchmark_frame)
+    assert list(cleaned.columns) == list(benchmark_frame.columns)
+
+
+def test_warmup_drops_first_samples_of_every_cell(benchmark_frame):
+    df = benchmark_frame.assign(sample=benchmark_frame.groupby(CELLS).cumcount())
+    cleaned = cleaning.clean(df, CELLS, warmup=2)
+    assert cleaned['sample'].min() == 2
+    assert len(cleaned) == len(df) - 2 * df.groupby(CELLS).ngroups
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+import statsmodels.formula.api as smf
+from statsmodels.stats.anova import anova_lm
+
+import factorial_anova
+
+FACTORS = ['processor', 'version', 'data_type']
+
+
+def reference(df, typ):
+    contrast = ', Sum' if typ == 3 else ''
+    formula = 'Normalized_ns ~ ' + ' * '.join(f"C({factor}{contrast})" for factor in FACTORS)
+    table = anova_lm(smf.ols(formula, data=df).fit(), typ=typ)
+    return table.drop(index='Intercept', errors='ignore')
+
+
+@pytest.mark.parametrize('typ', [1, 2, 3])
+def test_anova_table_matches_anova_lm(benchmark_frame, typ):
+    table = factorial_anova.anova_table(benchmark_frame, FACTORS, typ=typ)
+    expected = reference(benchmark_frame, typ)
+    assert len(table) == len(expected)
+    for column in ['sum_sq', 'df', 'F', 'PR(>F)']:
+        np.testing.assert_allclose(table[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                   rtol=1e-6, atol=1e-12, err_msg=f"typ {typ} {column}")
+
+
+def test_one_way_table_layout(benchmark_frame):
+    table = factorial_anova.anova_table(benchmark_frame, ['version'], typ=2)
+    assert list(table.index) == ['C(version)', 'Residual']
+    assert list(table.columns) == ['sum_sq', 'df', 'F', 'PR(>F)']
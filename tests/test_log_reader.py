@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import log_reader
+
+HEADER = "ver\ttypeData\tISA\t#sample\tn\ttime(s)\tNormalized(ns)\tthreads\n"
+ROWS = ["Java_ver(a)\tdouble\tx64\t00000\t00064\t0.0012\t4.5776\t1\n",
+        "Java_ver(a)\tdouble\tx64\t00001\t00064\t0.0011\t4.1962\t1\n",
+        "Java_ver(b)\tdouble\tx64\t00000\t00128\t0.0150\t7.1526\t1\n"]
+
+
+def write(path, text, encoding='utf-8'):
+    path.write_bytes(text.encode(encoding))
+    return str(path)
+
+
+@pytest.mark.parametrize('encoding, expected', [('utf-8', 'utf-8'), ('utf-8-sig', 'utf-8-sig'),
+                                                ('utf-16', 'utf-16'), ('utf-16-le', 'utf-16-le')])
+def test_encoding_detection(tmp_path, encoding, expected):
+    path = write(tmp_path / 'log.txt', HEADER + ''.join(ROWS), encoding)
+    fmt = log_reader.sniff(path)
+    assert fmt.encoding == expected
+    df = pd.concat(log_reader.read_chunks(path))
+    np.testing.assert_allclose(df['normalized_ns'], [4.5776, 4.1962, 7.1526])
+
+
+@pytest.mark.parametrize('decimal', ['.', ','])
+def test_decimal_detection(tmp_path, decimal):
+    rows = [row.replace('.', decimal) for row in ROWS]
+    path = write(tmp_path / 'log.txt', ''.join(rows))
+    fmt = log_reader.sniff(path)
+    assert fmt.decimal == decimal
+    assert fmt.skip == 0 and fmt.clean
+    df = pd.concat(log_reader.read_chunks(path))
+    np.testing.assert_allclose(df['time_s'], [0.0012, 0.0011, 0.0150])
+    assert df['n'].tolist() == [64, 64, 128]
+
+
+def test_transcript_rows_are_filtered(tmp_path):
+    text = "Compiling...\n" + HEADER + ROWS[0] + "Done with a\n\n" + ''.join(ROWS[1:]) + "bye\n"
+    path = write(tmp_path / 'log.txt', text)
+    assert not log_reader.sniff(path).clean
+    df = pd.concat(log_reader.read_chunks(path))
+    assert df['sample'].tolist() == [0, 1, 0]
+
+
+def test_stray_line_neither_drops_nor_repeats_rows(tmp_path):
+    rows = [f"Py_ver(c)\tfloat\tx64\t{s:05d}\t00064\t0.0100\t{s + 1}.5000\t1\n" for s in range(50)]
+    rows.insert(30, "Py_ver(c)\tfloat\tx64\t00099\toops\n")
+    path = write(tmp_path / 'log.txt', HEADER + ''.join(rows))
+    df = pd.concat(log_reader.read_chunks(path, chunk_rows=8))
+    assert df['sample'].tolist() == list(range(50))
+
+
+def test_warmup_rows_and_counters(tmp_path):
+    header = HEADER.rstrip('\n') + "\twarmup\tcycles\n"
+    rows = ["Java_ver(a)\tdouble\tx64\t00000\t00064\t0.0050\t9.0000\t1\t1\t500\n",
+            "Java_ver(a)\tdouble\tx64\t00000\t00064\t0.0012\t4.5000\t1\t0\t100\n",
+            "Java_ver(a)\tdouble\tx64\t00001\t00064\t0.0011\t4.2000\t1\t0\tNA\n"]
+    path = write(tmp_path / 'log.txt', header + ''.join(rows))
+    df = pd.concat(log_reader.read_chunks(path))
+    assert 'warmup' not in df.columns
+    assert df['sample'].tolist() == [0, 1]
+    np.testing.assert_allclose(df['cycles'], [100, np.nan])
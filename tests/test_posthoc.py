@@ -0,0 +1,43 @@
+import itertools
+
+import numpy as np
+import pytest
+from scipy import stats
+from statsmodels.stats.multitest import multipletests
+
+import cell_stats
+import posthoc
+
+
+def reference_dunn(df, factor, method):
+    """Dunn's test pair by pair, from a direct ranking of the pooled values"""
+    values = df['Normalized_ns'].to_numpy()
+    ranks = stats.rankdata(values)
+    n = len(values)
+    _, ties = np.unique(values, return_counts=True)
+    scale = n * (n + 1) / 12 - (ties ** 3 - ties).sum() / (12 * (n - 1))
+    levels = sorted(df[factor].unique())
+    p = []
+    for a, b in itertools.combinations(levels, 2):
+        ra, rb = ranks[(df[factor] == a).to_numpy()], ranks[(df[factor] == b).to_numpy()]
+        z = (ra.mean() - rb.mean()) / np.sqrt(scale * (1 / len(ra) + 1 / len(rb)))
+        p.append(2 * stats.norm.sf(abs(z)))
+    adjusted = multipletests(p, method=method)[1] if method else np.array(p)
+    return np.array(p), adjusted
+
+
+@pytest.mark.parametrize('correction, method', [('holm', 'holm'), ('bonferroni', 'bonferroni'),
+                                                ('bh', 'fdr_bh'), ('none', None)])
+def test_dunn_matches_pairwise_reference(benchmark_frame, correction, method):
+    table = posthoc.dunn(benchmark_frame, 'version', correction=correction)
+    p, adjusted = reference_dunn(benchmark_frame, 'version', method)
+    np.testing.assert_allclose(table['p'], p, rtol=1e-9)
+    np.testing.assert_allclose(table['p_adj'], adjusted, rtol=1e-9)
+    assert (table['reject'] == (adjusted < 0.05)).all()
+
+
+def test_dunn_reuses_ranks_of_finer_cells(benchmark_frame):
+    cells = cell_stats.CellStats(benchmark_frame)
+    shared = posthoc.dunn(benchmark_frame, 'version', cells=cells)
+    own = posthoc.dunn(benchmark_frame, 'version')
+    np.testing.assert_allclose(shared['p_adj'], own['p_adj'], rtol=1e-12)
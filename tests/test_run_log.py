@@ -0,0 +1,48 @@
+import run_log
+from run_log import CENSORED, COMPLETED, RunLog, run_key
+
+
+def test_resume_skips_final_runs_and_counts_attempts(tmp_path):
+    path = str(tmp_path / 'runs_runlog.jsonl')
+    done, timed_out, failed, crashed = (run_key('A', 64, 'float', 'C++', r) for r in range(1, 5))
+    log = RunLog(path)
+    for key, status in [(done, COMPLETED), (timed_out, CENSORED), (failed, 'Execution Error')]:
+        log.start(key)
+        log.finish(key, status)
+    log.start(crashed)  # no end: the process died during this run
+    log.close()
+
+    resumed = RunLog(path, resume=True)
+    assert not resumed.should_run(done, 3)
+    assert not resumed.should_run(timed_out, 3)
+    assert resumed.should_run(failed, 3) and not resumed.should_run(failed, 1)
+    assert resumed.attempts[crashed] == 1
+    assert resumed.should_run(run_key('a', '64', 'float', 'C++', '5'), 3)
+    resumed.close()
+
+
+def test_truncated_line_is_ignored(tmp_path):
+    path = str(tmp_path / 'runs_runlog.jsonl')
+    key = run_key('b', 128, 'double', 'Java', 1)
+    log = RunLog(path)
+    log.start(key)
+    log.finish(key, COMPLETED)
+    log.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "start", "key": ["b", 1')
+    resumed = RunLog(path, resume=True)
+    assert not resumed.should_run(key, 3)
+    resumed.close()
+
+
+def test_without_resume_the_log_starts_over(tmp_path):
+    path = str(tmp_path / 'runs_runlog.jsonl')
+    key = run_key('c', 64, 'float', 'Python', 1)
+    log = RunLog(path)
+    log.start(key)
+    log.finish(key, COMPLETED)
+    log.close()
+    restarted = RunLog(path)
+    assert restarted.should_run(key, 3)
+    restarted.close()
+    assert run_log.default_log_path('out/results.csv') == 'out/results_runlog.jsonl'
@@ -0,0 +1,319 @@
+import argparse
+import glob
+import os
+import re
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import researchpy as rp
+import seaborn as sns
+
+import cleaning
+import factorial_anova
+import plot_pipeline
+import results_store
+import sheet_cache
+
+# ANOVA of the benchmark results of every language and data type: a boxplot per group,
+# one-way ANOVA of version (with Tukey HSD when it is significant), the effect of the
+# matrix size and the sample size for a 3% error. Rows come from the results store when
+# it exists, otherwise from the sheets of every workbook. tr9.py and anovar5andr9.py run
+# this driver.
+
+def extract_version_info(sheet_name):
+    """Extract version, language, and data type from sheet name"""
+    # Example: "Cpp - float - ver(a)" -> ("Cpp", "float", "a")
+    match = re.match(r'([A-Za-z]+)\s*-\s*([a-z]+)\s*-\s*ver\(([a-z])\)', sheet_name)
+    if match:
+        return {
+            'language': match.group(1),
+            'data_type': match.group(2),
+            'version': match.group(3)
+        }
+    return None
+
+def normalize_column_name(df):
+    """Normalize column names to handle different naming patterns"""
+    # Dictionary of possible column name mappings
+    column_mappings = {
+        'normalized(ns)': 'Normalized_ns',
+        'normalized_ns': 'Normalized_ns',
+        'normalized': 'Normalized_ns',
+        'Ver': 'version',
+        'version': 'version',
+        'time(s)': 'time',
+        'time': 'time'
+    }
+    
+    # Rename columns if they exist
+    for old_name, new_name in column_mappings.items():
+        if old_name in df.columns:
+            df = df.rename(columns={old_name: new_name})
+    
+    return df
+
+def convert_to_numeric(df, column):
+    """Convert a column to numeric values, handling different formats"""
+    if column not in df.columns:
+        return df
+        
+    # If already numeric, return as is
+    if pd.api.types.is_numeric_dtype(df[column]):
+        return df
+        
+    # Try to convert to numeric, replacing commas with dots
+    try:
+        df[column] = pd.to_numeric(df[column].astype(str).str.replace(',', '.'), errors='coerce')
+    except:
+        print(f"Warning: Could not convert {column} to numeric")
+        
+    return df
+
+def render_boxplot(df_data, path=None, title=None):
+    """Boxplot of normalized execution times by version, saved to path or shown"""
+    sns.set(style="whitegrid")
+    plt.figure(figsize=(10, 6))
+    sns.boxplot(x='version', y='Normalized_ns', data=df_data)
+    plt.xlabel('Versión del Algoritmo')
+    plt.ylabel('Tiempo Normalizado (ns)')
+    plt.title(title or 'Distribución de Tiempos de Ejecución')
+    plt.tight_layout()
+    if path:
+        plt.savefig(path)
+        plt.close()
+    else:
+        plt.show()
+
+def boxplot_version(df_data, plot_name=None, title=None):
+    """Create and save a boxplot of normalized execution times by version"""
+    if plot_name:
+        # Skipped when the same data was already drawn with the same title
+        figure = plot_pipeline.Figure(f'plots/{plot_name}', render_boxplot,
+                                      df_data[['version', 'Normalized_ns']].reset_index(drop=True), title=title)
+        plot_pipeline.render_all([figure])
+    else:
+        render_boxplot(df_data, title=title)
+
+def detectar_outliers(data, umbral=3):
+    """Detect outliers using standard deviation method (cleaning.py applies it per cell)"""
+    data = np.asarray(data, dtype=float)
+    return data[np.abs(data - data.mean()) > umbral * data.std()].tolist()
+
+def run_anova_analysis(df):
+    """Run ANOVA analysis and print results"""
+    if df['version'].nunique() < 2:
+        print("Not enough unique versions for ANOVA analysis")
+        return None
+        
+    anova_table = factorial_anova.anova_table(df, ['version'], typ=2)
+    
+    print("===========          TABLA ANOVA one way         ================")
+    print(anova_table)
+    print(" ")
+    print("Valor p para C(version):", anova_table.loc['C(version)', 'PR(>F)'])
+    print("alpha: 0.05")
+    print("")
+    
+    if anova_table.loc['C(version)', 'PR(>F)'] < 0.05:
+        from statsmodels.stats.multicomp import pairwise_tukeyhsd
+        tukey = pairwise_tukeyhsd(df['Normalized_ns'], df['version'], alpha=0.05)
+        print("Prueba Post-hoc (Tukey HSD):")
+        print(tukey)
+    
+    return anova_table
+
+def analyze_array_size_effects(df):
+    """Analyze the effect of array size on execution time"""
+    if 'n' not in df.columns:
+        return None
+        
+    # Group by array size and calculate statistics
+    size_stats = df.groupby('n')['Normalized_ns'].agg(['mean', 'std', 'count'])
+    
+    # Run ANOVA for array size effect
+    anova_table = factorial_anova.anova_table(df, ['n'], typ=2)
+    
+    print("\n=========== Array Size Effect Analysis ===============")
+    print("\nArray Size Statistics:")
+    print(size_stats)
+    print("\nANOVA Results for Array Size Effect:")
+    print(anova_table)
+    
+    return anova_table
+
+def matched_sheets(excel_file):
+    """Sheets of a workbook whose names identify language, data type and version"""
+    return [sheet for sheet in sheet_cache.sheet_names(excel_file) if extract_version_info(sheet)]
+
+def process_excel_file(excel_file, sheet_data=None, sheet_errors=None, clean_options=None):
+    """Process a single Excel file and its sheets (already parsed ones if given)"""
+    print(f"\n{'='*80}")
+    print(f"Processing Excel file: {excel_file}")
+    print(f"{'='*80}")
+    
+    # Get list of available sheets
+    available_sheets = sheet_cache.sheet_names(excel_file)
+    print(f"Available sheets: {available_sheets}")
+    
+    # Group sheets by language and data type
+    sheet_groups = {}
+    for sheet in available_sheets:
+        info = extract_version_info(sheet)
+        if info:
+            key = (info['language'], info['data_type'])
+            if key not in sheet_groups:
+                sheet_groups[key] = []
+            sheet_groups[key].append((sheet, info['version']))
+    
+    # Parse every matched sheet once; unchanged sheets come from the cache
+    if sheet_data is None:
+        sheet_errors = {}
+        sheet_data = sheet_cache.read_sheets(excel_file, [sheet for sheets in sheet_groups.values()
+                                                          for sheet, _ in sheets], errors=sheet_errors)
+    
+    # Process each group of sheets
+    for (language, data_type), sheets in sheet_groups.items():
+        print(f"\nProcessing {language} {data_type} versions...")
+        
+        # Combine data from all versions
+        combined_data = []
+        for sheet, version in sheets:
+            try:
+                if sheet in sheet_errors:
+                    raise sheet_errors[sheet]
+                df = sheet_data[sheet]
+                print(f"\nColumns in {sheet}: {df.columns.tolist()}")
+                
+                # Normalize column names
+                df = normalize_column_name(df)
+                
+                # Add version information
+                df['version'] = version
+                df['language'] = language
+                df['data_type'] = data_type
+                
+                # Convert time columns to numeric
+                df = convert_to_numeric(df, 'time')
+                df = convert_to_numeric(df, 'Normalized_ns')
+                
+                # Convert time to normalized nanoseconds if needed
+                if 'time' in df.columns and 'Normalized_ns' not in df.columns:
+                    df['Normalized_ns'] = df['time'] * 1e9
+                
+                combined_data.append(df)
+            except Exception as e:
+                print(f"Error reading sheet {sheet}: {str(e)}")
+                continue
+        
+        if not combined_data:
+            continue
+            
+        # Combine all data
+        df = pd.concat(combined_data, ignore_index=True)
+        analyze_group(df, language, data_type, clean_options)
+
+def process_store_source(source, clean_options=None):
+    """Process the rows of one result file from the columnar results store"""
+    print(f"\n{'='*80}")
+    print(f"Processing {source} from {results_store.DEFAULT_STORE}")
+    print(f"{'='*80}")
+    
+    df = results_store.load_results(source=source)
+    df = df.rename(columns={'normalized_ns': 'Normalized_ns', 'time_s': 'time'})
+    for (language, data_type), group in df.groupby(['language', 'data_type'], observed=True):
+        print(f"\nProcessing {language} {data_type} versions...")
+        group = group.copy()
+        group['version'] = group['version'].astype(str)
+        analyze_group(group, language, data_type, clean_options)
+
+def analyze_group(df, language, data_type, clean_options=None):
+    """Boxplot, ANOVA and sample size for all versions of one language and data type"""
+    # Clean and prepare data
+    df['version'] = df['version'].str.strip()
+    
+    # Flag warm-up samples and outliers per version and size; the analysis uses the rest
+    df = cleaning.clean(df, ['version', 'n'], label=f"{language} {data_type}", **(clean_options or {}))
+    
+    print("\nData Summary:")
+    print(df.info())
+    print("\nFirst few rows:")
+    print(df.head())
+    
+    # Run ANOVA and create boxplot
+    plot_name = f'boxplot_{language}_{data_type}.png'
+    title = f'Distribución de Tiempos de Ejecución - {language} {data_type}'
+    boxplot_version(df, plot_name, title)
+    anova_results = run_anova_analysis(df)
+    
+    # Analyze array size effects
+    size_anova = analyze_array_size_effects(df)
+    
+    # Print version statistics
+    print("\n================= Resumen de Estadísticas por Versión=============")
+    print(rp.summary_cont(df['Normalized_ns'].groupby(df['version'])))
+    
+    # Calculate sample size
+    Stat_data = df[["Normalized_ns", "version"]].groupby("version").agg({
+        "Normalized_ns": ["min", "max", "median", "mean", "std", "var"]
+    })
+    Stat_data = Stat_data.Normalized_ns
+    
+    Er = 3  # 3%
+    Error_abs = Stat_data['mean'] * (Er/100)
+    Z = 1.96  # 95% confidence
+    
+    print("\nCálculo del Error absoluto equivalente a Er=3%")
+    print(Error_abs)
+    print("\nCálculo del Tamaño de Muestra")
+    print(Stat_data['var'] * (Z*Z) / (Error_abs*Error_abs))
+
+def main():
+    parser = argparse.ArgumentParser(description="ANOVA of the benchmark results per language and data type")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes used to parse workbook sheets")
+    cleaning.add_arguments(parser)
+    args = parser.parse_args()
+    clean_options = cleaning.options(args)
+    os.makedirs('plots', exist_ok=True)
+    
+    # Results already ingested into the columnar store (python results_store.py)
+    if results_store.store_exists():
+        sources = results_store.load_results(columns=['source'])['source']
+        for source in sorted(str(source) for source in sources.unique() if str(source).endswith('.xlsx')):
+            try:
+                process_store_source(source, clean_options)
+            except Exception as e:
+                print(f"Error processing {source}: {str(e)}")
+        return
+    
+    # Find all Excel files in the workspace
+    excel_files = sorted(glob.glob("*.xlsx")) + sorted(glob.glob("data/*.xlsx"))
+    
+    if not excel_files:
+        print("No Excel files found in the workspace or data directory")
+        return
+        
+    print(f"Found {len(excel_files)} Excel files to process")
+    
+    # Parse the matched sheets of every workbook in one worker pool
+    workbooks = []
+    for excel_file in excel_files:
+        try:
+            workbooks.append((excel_file, matched_sheets(excel_file)))
+        except Exception as e:
+            print(f"Error processing {excel_file}: {str(e)}")
+    errors = {}
+    loaded = sheet_cache.read_workbooks(workbooks, args.workers, errors)
+    
+    # Process each Excel file, in order
+    for excel_file, _ in workbooks:
+        try:
+            sheet_errors = {sheet: error for (path, sheet), error in errors.items() if path == excel_file}
+            process_excel_file(excel_file, loaded[excel_file], sheet_errors, clean_options)
+        except Exception as e:
+            print(f"Error processing {excel_file}: {str(e)}")
+            continue
+
+if __name__ == "__main__":
+    main()